@@ -0,0 +1,293 @@
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+import yaml.fast
+from yaml.nodes import ScalarNode
+from iot_sensor_simulator import IoTFleetSimulator
+
+CONFIGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'configs')
+
+class UncachedSafeLoader(yaml.SafeLoader):
+    """SafeLoader that keeps a single value in its implicit resolution cache."""
+    IMPLICIT_CACHE_SIZE = 0
+
+class LineBufferedSafeDumper(yaml.SafeDumper):
+    """SafeDumper that writes its output to the stream at every line break."""
+    FLUSH_CHUNKS = 1
+
+class CountingStream:
+    """Binary stream wrapper that counts the writes it receives."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        self.stream.write(data)
+
+class NullStream:
+    """Text stream that discards everything written to it."""
+
+    def write(self, data):
+        pass
+
+def generate_sensor_json(devices, rounds, seed=0):
+    """
+    Generates an IoT simulator JSON export and returns its text.
+    """
+    random.seed(seed)
+    simulator = IoTFleetSimulator(num_devices=devices)
+    for _ in range(rounds):
+        for device_simulator in simulator.simulators:
+            simulator.message_queue.extend(device_simulator.generate_batch())
+    fd, path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        simulator.export_to_json(path)
+        with open(path, 'r') as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+def best_time(function, repeat):
+    """
+    Returns the best wall time of `repeat` calls to `function`.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def plain_scalars(text):
+    """
+    Returns the values of all plain scalars in the document.
+    """
+    return [event.value for event in yaml.parse(text, Loader=yaml.SafeLoader)
+            if isinstance(event, yaml.ScalarEvent) and event.implicit[0]]
+
+def benchmark_resolver(text, repeat):
+    """
+    Times implicit tag resolution of the document's plain scalars.
+    """
+    values = plain_scalars(text)
+    results = {}
+    for loader_class in (UncachedSafeLoader, yaml.SafeLoader):
+        loader = loader_class('')
+        def resolve_all():
+            for value in values:
+                loader.resolve(ScalarNode, value, (True, False))
+        results[loader_class.__name__] = best_time(resolve_all, repeat)
+    return len(values), results
+
+def benchmark_load(text, repeat):
+    """
+    Times loading the document with each loader.
+    """
+    results = {}
+    for loader_class in (UncachedSafeLoader, yaml.SafeLoader, yaml.FastSafeLoader):
+        results[loader_class.__name__] = best_time(
+                lambda: yaml.load(text, Loader=loader_class), repeat)
+    return results
+
+def benchmark_dump(text, repeat):
+    """
+    Times dumping the document as UTF-8 to an unbuffered file with each
+    dumper and counts the writes that reach the file.
+    """
+    data = json.loads(text)
+    fd, path = tempfile.mkstemp(suffix='.yaml')
+    os.close(fd)
+    results = {}
+    writes = {}
+    try:
+        for dumper_class in (LineBufferedSafeDumper, yaml.SafeDumper):
+            def dump():
+                with open(path, 'wb', buffering=0) as f:
+                    stream = CountingStream(f)
+                    yaml.dump(data, stream, Dumper=dumper_class, encoding='utf-8')
+                writes[dumper_class.__name__] = stream.writes
+            results[dumper_class.__name__] = best_time(dump, repeat)
+    finally:
+        os.remove(path)
+    return results, writes
+
+def config_documents():
+    """
+    Returns the text and documents of each file in data/configs that loads,
+    largest first.
+    """
+    files = []
+    for name in sorted(os.listdir(CONFIGS_DIR)):
+        with open(os.path.join(CONFIGS_DIR, name), 'r') as f:
+            text = f.read()
+        try:
+            documents = list(yaml.safe_load_all(text))
+        except yaml.YAMLError:
+            continue
+        if documents:
+            files.append((name, text, documents))
+    files.sort(key=lambda item: -len(item[1]))
+    return files
+
+def benchmark_configs(repeat):
+    """
+    Times loading and dumping each config file with the pure-Python classes
+    and, when libyaml is available, the C ones. Small files are processed
+    several times per run; the times are per file.
+    """
+    loaders = [yaml.SafeLoader, yaml.FastSafeLoader]
+    dumpers = [yaml.SafeDumper]
+    if yaml.__with_libyaml__:
+        loaders.append(yaml.CSafeLoader)
+        dumpers.append(yaml.CSafeDumper)
+    rows = {}
+    for name, text, documents in config_documents():
+        number = max(1, 100000 // len(text))
+        results = {}
+        for loader_class in loaders:
+            def load():
+                for _ in range(number):
+                    for _ in yaml.load_all(text, Loader=loader_class):
+                        pass
+            results['load ' + loader_class.__name__] = best_time(load, repeat) / number
+        for dumper_class in dumpers:
+            def dump():
+                for _ in range(number):
+                    yaml.dump_all(documents, Dumper=dumper_class)
+            results['dump ' + dumper_class.__name__] = best_time(dump, repeat) / number
+        rows[f"{name} ({len(text) / 1024:.1f} KiB)"] = results
+    return rows
+
+def print_table(title, rows):
+    columns = list(next(iter(rows.values())))
+    print(title)
+    print(f"  {'':<36}" + ''.join(f"{column:>20}" for column in columns))
+    totals = dict.fromkeys(columns, 0.0)
+    for name, results in rows.items():
+        print(f"  {name:<36}" + ''.join(f"{results[column] * 1000:17.3f} ms" for column in columns))
+        for column in columns:
+            totals[column] += results[column]
+    print(f"  {'total':<36}" + ''.join(f"{totals[column] * 1000:17.3f} ms" for column in columns))
+
+def generate_readings(nodes, seed=0):
+    """
+    Returns readings whose representation tree has about `nodes` nodes.
+    """
+    random.seed(seed)
+    # A reading is a mapping node with three keys and three values
+    return [{'t': number, 'v': round(random.random(), 3), 's': 'ok'}
+            for number in range(max(1, nodes // 7))]
+
+def benchmark_serialize(nodes, repeat):
+    """
+    Times serializing a tree of about `nodes` nodes with and without the
+    anchor pass and measures the memory allocated while serializing.
+    """
+    node = yaml.SafeDumper(NullStream()).represent_data(generate_readings(nodes))
+    results = {}
+    peaks = {}
+    for aliases in (True, False):
+        name = 'aliases' if aliases else 'no aliases'
+        def serialize():
+            yaml.serialize(node, NullStream(), Dumper=yaml.SafeDumper, aliases=aliases)
+        results[name] = best_time(serialize, repeat)
+        tracemalloc.start()
+        try:
+            serialize()
+            peaks[name] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return results, peaks
+
+def import_times(snippet, repeat):
+    """
+    Runs `snippet` with `-X importtime` in `repeat` fresh interpreters.
+    Returns the best own import time of each yaml module (without the
+    modules it imports) and the best wall time of the process, in seconds.
+    """
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+    modules = {}
+    walls = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', snippet],
+                                 cwd=data_dir, capture_output=True, text=True, check=True)
+        walls.append(time.perf_counter() - start)
+        for line in process.stderr.splitlines():
+            fields = line.partition('import time:')[2].split('|')
+            if len(fields) != 3 or not fields[0].strip().isdigit():
+                continue
+            name = fields[2].strip()
+            if name == 'yaml' or name.startswith('yaml.'):
+                seconds = int(fields[0]) / 1e6
+                modules[name] = min(modules.get(name, seconds), seconds)
+    return modules, min(walls)
+
+def benchmark_import(repeat):
+    """
+    Cold start of a loading program against one that also uses the dumpers.
+    """
+    results = {}
+    modules = {}
+    for name, snippet in (("import + safe_load", "import yaml; yaml.safe_load('a: 1')"),
+                          ("import + safe_dump", "import yaml; yaml.safe_dump({'a': 1})")):
+        modules[name], results[name] = import_times(snippet, repeat)
+    return results, modules
+
+def print_results(title, results):
+    baseline = next(iter(results.values()))
+    print(title)
+    for name, seconds in results.items():
+        print(f"  {name:<20} {seconds * 1000:9.1f} ms  {baseline / seconds:5.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the bundled YAML loader and dumper on IoT sensor data')
+    parser.add_argument('--devices', type=int, default=50, help='Number of simulated devices')
+    parser.add_argument('--rounds', type=int, default=20, help='Readings generated per device sensor')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is reported)')
+    parser.add_argument('--import-repeat', type=int, default=10,
+                        help='Interpreters started per import time measurement (best is reported)')
+    parser.add_argument('--nodes', type=int, nargs='+', default=[10**5],
+                        help='Node counts of the serializer benchmark trees (e.g. 100000 1000000 10000000)')
+    args = parser.parse_args()
+
+    print(f"yaml.fast uses {yaml.fast.SafeLoader.__name__} and {yaml.fast.SafeDumper.__name__}"
+          + ("" if yaml.__with_libyaml__ else " (libyaml is not available)"))
+    print_table("Config files:", benchmark_configs(args.repeat))
+
+    text = generate_sensor_json(args.devices, args.rounds)
+    print(f"Sensor JSON: {len(text) / 1024:.0f} KiB")
+
+    count, results = benchmark_resolver(text, args.repeat)
+    print_results(f"Implicit resolution of {count} plain scalars:", results)
+    print_results("Load:", benchmark_load(text, args.repeat))
+    results, writes = benchmark_dump(text, args.repeat)
+    print_results("Dump:", results)
+    for name, count in writes.items():
+        print(f"  {name:<20} {count:9d} writes")
+    results, modules = benchmark_import(args.import_repeat)
+    print_results("Cold start (-X importtime):", results)
+    for name, times in modules.items():
+        print(f"  {name:<20} {sum(times.values()) * 1000:9.1f} ms  in {len(times)} yaml modules")
+    for nodes in args.nodes:
+        results, peaks = benchmark_serialize(nodes, args.repeat)
+        print_results(f"Serialize {nodes} nodes:", results)
+        for name, peak in peaks.items():
+            print(f"  {name:<20} {peak / 1024:9.0f} KiB allocated")
+
+if __name__ == "__main__":
+    main()
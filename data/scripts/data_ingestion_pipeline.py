@@ -8,12 +8,11 @@ import json
 import asyncio
 import logging
 import time
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Tuple
 from dataclasses import dataclass, asdict
-from datetime import datetime, timedelta
-from collections import defaultdict, deque
-import statistics
+from datetime import datetime, timedelta, timezone
 import hashlib
+import math
 from enum import Enum
 from abc import ABC, abstractmethod
 import redis
@@ -72,39 +71,282 @@ class DataProcessor(ABC):
         pass
 
 
+class RollingWindows:
+    """
+    Sliding windows of many series, stored as the rows of one NumPy matrix
+    Series are keyed by (device_id, sensor_type) and interned to row numbers.
+    Rows of series idle for longer than idle_timeout seconds are reused.
+    """
+    
+    ARRAYS = ['values', 'heads', 'counts', 'means', 'm2s', 'runs', 'slides', 'last_seen']
+    
+    def __init__(self, window_size: int, capacity: int = 1024, idle_timeout: float = 3600.0):
+        self.window_size = window_size
+        self.idle_timeout = idle_timeout
+        self.slots: Dict[Tuple[str, str], int] = {}
+        self.keys: List[Optional[Tuple[str, str]]] = [None] * capacity
+        self.free = list(range(capacity - 1, -1, -1))  # Lowest rows are used first
+        self.values = np.zeros((capacity, window_size))
+        self.heads = np.zeros(capacity, dtype=np.int32)  # Next column to write
+        self.counts = np.zeros(capacity, dtype=np.int32)
+        self.means = np.zeros(capacity)
+        self.m2s = np.zeros(capacity)  # Sums of squared deviations from the means
+        self.runs = np.zeros(capacity, dtype=np.int32)  # Trailing values equal to the newest one
+        self.slides = np.zeros(capacity, dtype=np.int32)
+        self.last_seen = np.full(capacity, np.inf)  # Monotonic time; inf for free rows
+        
+    def __len__(self) -> int:
+        return len(self.slots)
+    
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return key in self.slots
+    
+    def __getitem__(self, key: Tuple[str, str]) -> np.ndarray:
+        """Values of a window, oldest first"""
+        slot = self.slots[key]
+        count = self.counts[slot]
+        row = self.values[slot]
+        if count < self.window_size:
+            return row[:count].copy()
+        head = self.heads[slot]
+        return np.concatenate((row[head:], row[:head]))
+    
+    def slot(self, key: Tuple[str, str], now: float) -> int:
+        """Row of a series, allocating one for new keys, and mark it as seen"""
+        slot = self.slots.get(key)
+        if slot is None:
+            if not self.free:
+                self.evict_idle(now)
+                if not self.free:
+                    self.grow()
+            slot = self.free.pop()
+            self.slots[key] = slot
+            self.keys[slot] = key
+        self.last_seen[slot] = now
+        return slot
+    
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Free the rows of series not seen for idle_timeout seconds"""
+        if now is None:
+            now = time.monotonic()
+        idle = np.flatnonzero(self.last_seen < now - self.idle_timeout)
+        for slot in idle.tolist():
+            del self.slots[self.keys[slot]]
+            self.keys[slot] = None
+        self.heads[idle] = 0
+        self.counts[idle] = 0
+        self.means[idle] = 0.0
+        self.m2s[idle] = 0.0
+        self.runs[idle] = 0
+        self.slides[idle] = 0
+        self.last_seen[idle] = np.inf
+        self.free.extend(reversed(idle.tolist()))
+        return len(idle)
+    
+    def grow(self):
+        """Double the number of rows"""
+        old_capacity = len(self.counts)
+        capacity = 2 * old_capacity
+        for name in self.ARRAYS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:old_capacity] = old
+            setattr(self, name, new)
+        self.last_seen[old_capacity:] = np.inf
+        self.keys.extend([None] * old_capacity)
+        self.free.extend(range(capacity - 1, old_capacity - 1, -1))
+    
+    def stdev(self, slot: int) -> float:
+        """Sample standard deviation of a window"""
+        count = self.counts[slot]
+        if count < 2 or self.runs[slot] >= count:  # Constant window
+            return 0.0
+        return math.sqrt(max(float(self.m2s[slot]), 0.0) / (count - 1))
+    
+    def append(self, slot: int, value: float):
+        """Add a value to one window, evicting its oldest value when full"""
+        count = int(self.counts[slot])
+        head = int(self.heads[slot])
+        row = self.values[slot]
+        mean = float(self.means[slot])
+        m2 = float(self.m2s[slot])
+        self.runs[slot] = self.runs[slot] + 1 if count and value == row[head - 1] else 1
+        
+        if count < self.window_size:
+            # Welford update for a growing window
+            delta = value - mean
+            new_mean = mean + delta / (count + 1)
+            m2 += delta * (value - new_mean)
+            self.counts[slot] = count + 1
+        else:
+            # Replace the oldest value in a full window
+            oldest = float(row[head])
+            new_mean = mean + (value - oldest) / count
+            m2 += (value - oldest) * (value - new_mean + oldest - mean)
+            self.slides[slot] += 1
+        
+        row[head] = value
+        self.heads[slot] = (head + 1) % self.window_size
+        self.means[slot] = new_mean
+        self.m2s[slot] = m2
+        if self.slides[slot] >= self.window_size:
+            self.recompute(slot)
+    
+    def append_rows(self, slots: np.ndarray, values: np.ndarray):
+        """
+        Add one value to each of several distinct windows
+        Does the same arithmetic as append, element-wise
+        """
+        counts = self.counts[slots]
+        heads = self.heads[slots]
+        means = self.means[slots]
+        m2s = self.m2s[slots]
+        previous = self.values[slots, heads - 1]
+        self.runs[slots] = np.where((counts > 0) & (values == previous), self.runs[slots] + 1, 1)
+        
+        growing = counts < self.window_size
+        oldest = self.values[slots, heads]
+        delta = values - means
+        grown_means = means + delta / (counts + 1)
+        grown_m2s = m2s + delta * (values - grown_means)
+        full = np.maximum(counts, 1)
+        slid_means = means + (values - oldest) / full
+        slid_m2s = m2s + (values - oldest) * (values - slid_means + oldest - means)
+        
+        self.values[slots, heads] = values
+        self.heads[slots] = (heads + 1) % self.window_size
+        self.counts[slots] = np.where(growing, counts + 1, counts)
+        self.means[slots] = np.where(growing, grown_means, slid_means)
+        self.m2s[slots] = np.where(growing, grown_m2s, slid_m2s)
+        self.slides[slots] += ~growing
+        for slot in slots[self.slides[slots] >= self.window_size]:
+            self.recompute(slot)
+    
+    def recompute(self, slot: int):
+        """Recompute the mean and variance of a full window to stop rounding drift"""
+        self.slides[slot] = 0
+        row = self.values[slot].tolist()
+        mean = math.fsum(row) / len(row)
+        self.means[slot] = mean
+        self.m2s[slot] = math.fsum((v - mean) ** 2 for v in row)
+
+
 class AnomalyDetector:
     """Real-time anomaly detection using statistical methods"""
     
-    def __init__(self, window_size: int = 100, z_threshold: float = 3.0):
+    # Batch rounds with fewer readings than this are scored one by one
+    MIN_VECTOR_ROUND = 16
+    
+    def __init__(self, window_size: int = 100, z_threshold: float = 3.0,
+                 capacity: int = 1024, idle_timeout: float = 3600.0):
         self.window_size = window_size
         self.z_threshold = z_threshold
-        self.device_histories = defaultdict(lambda: deque(maxlen=window_size))
+        self.device_histories = RollingWindows(window_size, capacity, idle_timeout)
         
     def detect(self, device_id: str, sensor_type: str, value: float) -> float:
         """
         Detect anomalies using Z-score method
         Returns anomaly score (0-1, where 1 is highly anomalous)
+        Non-finite values score 0 and are kept out of the window
         """
-        key = f"{device_id}_{sensor_type}"
-        history = self.device_histories[key]
-        
-        if len(history) < 10:  # Not enough data
-            history.append(value)
+        value = float(value)
+        if not math.isfinite(value):
+            return 0.0
+        slot = self.device_histories.slot((device_id, sensor_type), time.monotonic())
+        return self.score(slot, value)
+    
+    def score(self, slot: int, value: float) -> float:
+        """Score a value against a window, then add it to the window"""
+        histories = self.device_histories
+        if histories.counts[slot] < 10:  # Not enough data
+            histories.append(slot, value)
             return 0.0
         
-        mean = statistics.mean(history)
-        stdev = statistics.stdev(history)
+        # O(1) per reading: the window keeps its mean and variance up to date
+        mean = float(histories.means[slot])
+        stdev = histories.stdev(slot)
         
         if stdev == 0:
             z_score = 0
         else:
             z_score = abs((value - mean) / stdev)
         
-        history.append(value)
+        histories.append(slot, value)
         
         # Normalize to 0-1 scale
         anomaly_score = min(z_score / self.z_threshold, 1.0)
         return anomaly_score
+    
+    def detect_batch(self, device_ids: List[str], sensor_types: List[str],
+                     values: np.ndarray) -> np.ndarray:
+        """
+        Score a batch of readings in order, as repeated calls to detect would
+        Readings of different series are scored together with NumPy, in
+        rounds that take the next unscored reading of every series
+        """
+        values = np.asarray(values, dtype=float)
+        finite = np.isfinite(values)
+        if not finite.all():
+            # Non-finite values score 0 and are kept out of the windows
+            scores = np.zeros(len(values))
+            indices = np.flatnonzero(finite).tolist()
+            scores[indices] = self.detect_batch([device_ids[i] for i in indices],
+                                                [sensor_types[i] for i in indices],
+                                                values[indices])
+            return scores
+        
+        histories = self.device_histories
+        now = time.monotonic()
+        keys = list(zip(device_ids, sensor_types))
+        known = histories.slots.get
+        slots = np.array([known(key, -1) for key in keys], dtype=np.int64)
+        
+        # Mark known series as seen before new ones may evict idle rows
+        found = slots >= 0
+        histories.last_seen[slots[found]] = now
+        for index in np.flatnonzero(~found).tolist():
+            slots[index] = histories.slot(keys[index], now)
+        scores = np.zeros(len(values))
+        if not len(values):
+            return scores
+        
+        # Rank of each reading among the readings of its series
+        order = np.argsort(slots, kind='stable')
+        sorted_slots = slots[order]
+        group_starts = np.flatnonzero(np.r_[True, sorted_slots[1:] != sorted_slots[:-1]])
+        group_sizes = np.diff(np.r_[group_starts, len(slots)])
+        ranks = np.empty(len(slots), dtype=np.int64)
+        ranks[order] = np.arange(len(slots)) - np.repeat(group_starts, group_sizes)
+        
+        by_round = np.argsort(ranks, kind='stable')
+        round_ends = np.cumsum(np.bincount(ranks))
+        round_start = 0
+        for round_end in round_ends:
+            readings = by_round[round_start:round_end]
+            round_start = round_end
+            if len(readings) < self.MIN_VECTOR_ROUND:
+                for reading in readings:
+                    scores[reading] = self.score(slots[reading], values[reading])
+                continue
+            scores[readings] = self.score_rows(slots[readings], values[readings])
+        return scores
+    
+    def score_rows(self, slots: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Score one value for each of several distinct windows, then add them"""
+        histories = self.device_histories
+        counts = histories.counts[slots]
+        means = histories.means[slots]
+        constant = (counts < 2) | (histories.runs[slots] >= counts)
+        variances = np.maximum(histories.m2s[slots], 0.0) / np.maximum(counts - 1, 1)
+        stdevs = np.where(constant, 0.0, np.sqrt(variances))
+        
+        z_scores = np.zeros(len(values))
+        np.divide(np.abs(values - means), stdevs, out=z_scores, where=stdevs != 0)
+        scores = np.minimum(z_scores / self.z_threshold, 1.0)
+        scores[counts < 10] = 0.0
+        
+        histories.append_rows(slots, values)
+        return scores
 
 
 class StreamProcessor(DataProcessor):
@@ -139,20 +381,25 @@ class StreamProcessor(DataProcessor):
             }
         }
     
-    async def process(self, data: Dict[str, Any]) -> ProcessedData:
-        """Process incoming sensor data"""
-        sensor_type = data.get('sensor_type', 'unknown')
+    def convert_value(self, sensor_type: str, value: Any) -> Any:
+        """Convert a value and clamp it to the valid range of its sensor type"""
         rules = self.processing_rules.get(sensor_type, {})
         
         # Apply unit conversion
         converter = rules.get('unit_conversion', lambda x: x)
-        processed_value = converter(data['value'])
+        processed_value = converter(value)
         
         # Validate range
         min_val, max_val = rules.get('validation_range', (float('-inf'), float('inf')))
         if not min_val <= processed_value <= max_val:
             logger.warning(f"Value {processed_value} out of range for {sensor_type}")
             processed_value = max(min_val, min(max_val, processed_value))
+        return processed_value
+    
+    async def process(self, data: Dict[str, Any]) -> ProcessedData:
+        """Process incoming sensor data"""
+        sensor_type = data.get('sensor_type', 'unknown')
+        processed_value = self.convert_value(sensor_type, data['value'])
         
         # Detect anomalies
         anomaly_score = self.anomaly_detector.detect(
@@ -172,12 +419,202 @@ class StreamProcessor(DataProcessor):
             anomaly_score=anomaly_score,
             metadata=data.get('metadata', {})
         )
+    
+    async def process_batch(self, batch: List[Dict[str, Any]]) -> List[ProcessedData]:
+        """
+        Process a batch of sensor data with NumPy
+        Gives the same results as processing the messages one by one
+        """
+        device_ids = [data['device_id'] for data in batch]
+        sensor_types = [data.get('sensor_type', 'unknown') for data in batch]
+        timestamps = [data['timestamp'] for data in batch]
+        raw_values = [data['value'] for data in batch]
+        
+        # Values are converted one by one, so a value that process would
+        # reject raises here before any window is updated
+        processed_values = [self.convert_value(sensor_type, value)
+                            for sensor_type, value in zip(sensor_types, raw_values)]
+        
+        # Detect anomalies
+        anomaly_scores = self.anomaly_detector.detect_batch(
+            device_ids,
+            sensor_types,
+            np.array(processed_values, dtype=float)
+        )
+        
+        return [
+            ProcessedData(
+                device_id=device_ids[i],
+                sensor_type=sensor_types[i],
+                timestamp=timestamps[i],
+                raw_value=raw_values[i],
+                processed_value=processed_values[i],
+                aggregation_window='1s',
+                aggregation_type='instant',
+                anomaly_score=float(anomaly_scores[i]),
+                metadata=batch[i].get('metadata', {})
+            )
+            for i in range(len(batch))
+        ]
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch with relative error guarantees (DDSketch)
+    Values are counted in logarithmic buckets, so a quantile is off by at
+    most relative_accuracy and the size depends on the range of the values,
+    not their number
+    """
+    
+    # Values closer to zero than this are counted as zero
+    MIN_INDEXABLE = 1e-9
+    
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive: Dict[int, int] = {}
+        self.negative: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+    
+    def add(self, value: float):
+        """Count a value; NaNs and infinities are not counted"""
+        if value > self.MIN_INDEXABLE:
+            if value == math.inf:
+                return
+            bucket = math.ceil(math.log(value) / self.log_gamma)
+            self.positive[bucket] = self.positive.get(bucket, 0) + 1
+        elif value < -self.MIN_INDEXABLE:
+            if value == -math.inf:
+                return
+            bucket = math.ceil(math.log(-value) / self.log_gamma)
+            self.negative[bucket] = self.negative.get(bucket, 0) + 1
+        elif value == value:
+            self.zero_count += 1
+        else:
+            return
+        self.count += 1
+    
+    def merge(self, other: 'QuantileSketch'):
+        """Add the counts of a sketch with the same accuracy"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracies")
+        for bucket, count in other.positive.items():
+            self.positive[bucket] = self.positive.get(bucket, 0) + count
+        for bucket, count in other.negative.items():
+            self.negative[bucket] = self.negative.get(bucket, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+    
+    def copy(self) -> 'QuantileSketch':
+        sketch = QuantileSketch(self.relative_accuracy)
+        sketch.merge(self)
+        return sketch
+    
+    def quantiles(self, qs: List[float]) -> List[float]:
+        """Estimate the values at the given quantiles, in increasing order"""
+        if not self.count:
+            return [0.0] * len(qs)
+        # Buckets from the most negative values up, as (count, value)
+        buckets = [(self.negative[b], -self.bucket_value(b)) for b in sorted(self.negative, reverse=True)]
+        if self.zero_count:
+            buckets.append((self.zero_count, 0.0))
+        buckets += [(self.positive[b], self.bucket_value(b)) for b in sorted(self.positive)]
+        
+        results = []
+        index = 0
+        seen = buckets[0][0]
+        for q in qs:
+            rank = q * (self.count - 1)
+            while seen <= rank and index + 1 < len(buckets):
+                index += 1
+                seen += buckets[index][0]
+            results.append(buckets[index][1])
+        return results
+    
+    def bucket_value(self, bucket: int) -> float:
+        return 2 * self.gamma ** bucket / (self.gamma + 1)
+
+
+class WindowStats:
+    """Count, sum, min, max and variance of a window, plus a quantile sketch"""
+    
+    __slots__ = ('count', 'sum', 'min', 'max', 'mean', 'm2', 'sketch')
+    
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sketch = QuantileSketch(relative_accuracy)
+    
+    def add(self, value: float):
+        """Add a value with Welford's update"""
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.sketch.add(value)
+    
+    def merge(self, other: 'WindowStats'):
+        """Combine the statistics of another window into this one (Chan et al.)"""
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.sketch.merge(other.sketch)
+    
+    def merged(self, other: 'WindowStats') -> 'WindowStats':
+        """Return the combination of this window and another one"""
+        stats = WindowStats(self.sketch.relative_accuracy)
+        stats.merge(self)
+        stats.merge(other)
+        return stats
+    
+    def to_aggregates(self) -> Dict[str, float]:
+        """Return the aggregates stored for the window"""
+        if not self.count:
+            return {}
+        p50, p95, p99 = self.sketch.quantiles([0.5, 0.95, 0.99])
+        return {
+            'avg': self.mean,
+            'min': self.min,
+            'max': self.max,
+            'count': self.count,
+            'sum': self.sum,
+            'stddev': math.sqrt(max(self.m2, 0.0) / (self.count - 1)) if self.count > 1 else 0,
+            'p50': p50,
+            'p95': p95,
+            'p99': p99
+        }
 
 
 class TimeSeriesAggregator:
-    """Aggregates time-series data over different windows"""
+    """
+    Aggregates time-series data over different windows
+    A point only updates the finest window it falls in. A window is closed
+    once the watermark (the latest timestamp seen minus allowed_lateness)
+    passes its end: its final aggregates are queued for storage, it is merged
+    into the enclosing window of the next size and dropped. Points for closed
+    windows are counted in late_points and ignored. Only the windows changed
+    since the last collect_aggregates call are reported again.
+    """
     
-    def __init__(self):
+    def __init__(self, allowed_lateness: float = 60.0, relative_accuracy: float = 0.01):
         self.windows = {
             '1m': timedelta(minutes=1),
             '5m': timedelta(minutes=5),
@@ -185,39 +622,150 @@ class TimeSeriesAggregator:
             '1h': timedelta(hours=1),
             '24h': timedelta(hours=24)
         }
-        self.buffers = defaultdict(lambda: defaultdict(list))
+        # Each window size divides the next one
+        self.sizes = {name: int(delta.total_seconds()) for name, delta in self.windows.items()}
+        names = list(self.windows)
+        self.parents = dict(zip(names, names[1:] + [None]))
+        self.children = dict(zip(names, [None] + names[:-1]))
+        self.finest = names[0]
+        self.allowed_lateness = allowed_lateness
+        self.relative_accuracy = relative_accuracy
+        # window name -> window start (epoch seconds) -> (device_id, sensor_type) -> stats.
+        # A series has an entry in every enclosing window of an open one, empty
+        # until a finer window is merged into it.
+        self.open_windows: Dict[str, Dict[int, Dict[Tuple[str, str], WindowStats]]] = {
+            name: {} for name in names
+        }
+        self.closed: List[Tuple[str, str, str, str, Dict[str, float]]] = []
+        # (window name, window start, series) of the open windows with new points
+        self.dirty = set()
+        self.watermark = -math.inf
+        self.late_points = 0
         
     def add_data(self, device_id: str, sensor_type: str, value: float, timestamp: str):
-        """Add data point to aggregation buffers"""
-        key = f"{device_id}_{sensor_type}"
-        ts = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        """Add data point to its finest window"""
+        ts = self.parse_timestamp(timestamp)
+        size = self.sizes[self.finest]
+        start = int(ts // size) * size
+        if start + size <= self.watermark:
+            self.late_points += 1
+            return
         
-        for window_name, window_delta in self.windows.items():
-            window_key = self.get_window_key(ts, window_delta)
-            self.buffers[window_name][f"{key}_{window_key}"].append(value)
+        key = (device_id, sensor_type)
+        series = self.open_windows[self.finest].get(start)
+        if series is None:
+            series = self.open_windows[self.finest][start] = {}
+        stats = series.get(key)
+        if stats is None:
+            stats = series[key] = WindowStats(self.relative_accuracy)
+            self.add_enclosing_windows(self.finest, start, key)
+        stats.add(value)
+        self.dirty.add((self.finest, start, key))
+        
+        watermark = ts - self.allowed_lateness
+        if watermark > self.watermark:
+            # Windows of every size end on a boundary of the finest ones
+            crossed = watermark // size != self.watermark // size
+            self.watermark = watermark
+            if crossed:
+                self.close_windows()
     
-    def get_window_key(self, timestamp: datetime, delta: timedelta) -> str:
-        """Get window key for timestamp"""
-        window_start = timestamp - (timestamp - datetime.min) % delta
-        return window_start.isoformat()
+    def add_enclosing_windows(self, name: str, start: int, key: Tuple[str, str]):
+        """Make sure the windows enclosing an open window have an entry for its series"""
+        parent = self.parents[name]
+        while parent is not None:
+            size = self.sizes[parent]
+            start = start // size * size
+            series = self.open_windows[parent].setdefault(start, {})
+            if key in series:
+                break
+            series[key] = WindowStats(self.relative_accuracy)
+            parent = self.parents[parent]
     
-    def compute_aggregates(self, window: str, key: str) -> Dict[str, float]:
-        """Compute aggregates for a window"""
-        values = self.buffers[window].get(key, [])
-        if not values:
-            return {}
+    def parse_timestamp(self, timestamp: str) -> float:
+        """Return an ISO timestamp as epoch seconds, reading naive ones as UTC"""
+        ts = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        return ts.timestamp()
+    
+    def get_window_key(self, start: int) -> str:
+        """Get window key for a window start"""
+        return datetime.fromtimestamp(start, timezone.utc).isoformat()
+    
+    def close_windows(self):
+        """Close the windows that end before the watermark, finest first"""
+        for name, size in self.sizes.items():
+            parent = self.parents[name]
+            open_windows = self.open_windows[name]
+            for start in [s for s in open_windows if s + size <= self.watermark]:
+                window_key = None
+                for key, stats in open_windows.pop(start).items():
+                    parent_entry = None
+                    if parent is not None:
+                        parent_size = self.sizes[parent]
+                        parent_entry = (parent, start // parent_size * parent_size, key)
+                        self.open_windows[parent][parent_entry[1]][key].merge(stats)
+                    # A window without new points was stored with its final aggregates
+                    if (name, start, key) in self.dirty:
+                        self.dirty.discard((name, start, key))
+                        if parent_entry is not None:
+                            self.dirty.add(parent_entry)
+                        if window_key is None:
+                            window_key = self.get_window_key(start)
+                        self.closed.append((name, key[0], key[1], window_key, stats.to_aggregates()))
+    
+    def collect_aggregates(self):
+        """
+        Yield (window, device_id, sensor_type, window_start, aggregates) for
+        the windows closed and the open windows changed since the last call
+        """
+        closed, self.closed = self.closed, []
+        yield from closed
         
-        return {
-            'avg': statistics.mean(values),
-            'min': min(values),
-            'max': max(values),
-            'count': len(values),
-            'sum': sum(values),
-            'stddev': statistics.stdev(values) if len(values) > 1 else 0,
-            'p50': statistics.median(values),
-            'p95': np.percentile(values, 95) if values else 0,
-            'p99': np.percentile(values, 99) if values else 0
-        }
+        # A new point changes the running aggregates of every enclosing window
+        dirty, self.dirty = self.dirty, set()
+        for name, start, key in list(dirty):
+            parent = self.parents[name]
+            while parent is not None:
+                size = self.sizes[parent]
+                start = start // size * size
+                if (parent, start, key) in dirty:
+                    break
+                dirty.add((parent, start, key))
+                parent = self.parents[parent]
+        
+        cache = {}
+        for name, start, key in dirty:
+            aggregates = self.window_stats(name, start, key, cache).to_aggregates()
+            if aggregates:
+                yield name, key[0], key[1], self.get_window_key(start), aggregates
+    
+    def window_stats(self, name: str, start: int, key: Tuple[str, str], cache: Dict) -> WindowStats:
+        """Return the running statistics of an open window, with its open finer windows"""
+        entry = (name, start, key)
+        stats = cache.get(entry)
+        if stats is not None:
+            return stats
+        stats = self.open_windows[name][start][key]
+        child = self.children[name]
+        if child is not None:
+            size = self.sizes[name]
+            for child_start, series in self.open_windows[child].items():
+                if start <= child_start < start + size and key in series:
+                    stats = stats.merged(self.window_stats(child, child_start, key, cache))
+        cache[entry] = stats
+        return stats
+    
+    def mark_unstored(self, rows: List[Tuple[str, str, str, str, Dict[str, float]]]):
+        """Report rows from collect_aggregates again on the next call"""
+        for row in rows:
+            name, device_id, sensor_type, window_key = row[:4]
+            start = int(self.parse_timestamp(window_key))
+            if (device_id, sensor_type) in self.open_windows[name].get(start, {}):
+                self.dirty.add((name, start, (device_id, sensor_type)))
+            else:
+                self.closed.append(row)
 
 
 class KafkaIngestionPipeline:
@@ -228,9 +776,12 @@ class KafkaIngestionPipeline:
         self.producer = None
         self.consumer = None
         self.processor = StreamProcessor()
-        self.aggregator = TimeSeriesAggregator()
+        processing = config.get('processing', {})
+        self.aggregator = TimeSeriesAggregator(processing.get('allowed_lateness', 60.0))
         self.storage = DataStorage(config.get('storage', {}))
         self.cache = CacheManager(config.get('cache', {}))
+        self.batch_threshold = processing.get('batch_threshold', 64)
+        self.max_poll_records = processing.get('max_poll_records', 500)
         
     def initialize(self):
         """Initialize Kafka connections"""
@@ -261,8 +812,39 @@ class KafkaIngestionPipeline:
         """Process a single message"""
         # Process through stream processor
         processed = await self.processor.process(message)
+        await self.store_processed(processed)
+        return processed
+    
+    async def process_batch(self, messages: List[Dict[str, Any]]) -> List[ProcessedData]:
+        """Process a poll batch, falling back to single messages if it fails"""
+        try:
+            batch = await self.processor.process_batch(messages)
+        except Exception as e:
+            logger.error(f"Error processing batch, retrying messages one by one: {e}")
+            return await self.process_messages(messages)
         
-        # Add to aggregation buffers
+        results = []
+        for processed in batch:
+            try:
+                await self.store_processed(processed)
+                results.append(processed)
+            except Exception as e:
+                logger.error(f"Error storing message: {e}")
+        return results
+    
+    async def process_messages(self, messages: List[Dict[str, Any]]) -> List[ProcessedData]:
+        """Process messages one by one, skipping those that fail"""
+        results = []
+        for data in messages:
+            try:
+                results.append(await self.process_message(data))
+            except Exception as e:
+                logger.error(f"Error processing message: {e}")
+        return results
+    
+    async def store_processed(self, processed: ProcessedData):
+        """Aggregate, cache and store a processed reading"""
+        # Add to the aggregation windows
         self.aggregator.add_data(
             processed.device_id,
             processed.sensor_type,
@@ -275,8 +857,6 @@ class KafkaIngestionPipeline:
         
         # Store in persistent storage
         await self.storage.store(processed)
-        
-        return processed
     
     async def run(self):
         """Main processing loop"""
@@ -285,30 +865,40 @@ class KafkaIngestionPipeline:
         start_time = time.time()
         
         try:
-            for message in self.consumer:
-                try:
-                    data = message.value
-                    processed = await self.process_message(data)
-                    
+            while True:
+                records = self.consumer.poll(timeout_ms=1000, max_records=self.max_poll_records)
+                messages = [record.value for partition in records.values() for record in partition]
+                
+                # Large polls are scored as one vectorized batch
+                if len(messages) >= self.batch_threshold:
+                    results = await self.process_batch(messages)
+                else:
+                    results = await self.process_messages(messages)
+                
+                for processed in results:
                     # Send processed data to output topic
-                    self.producer.send(
-                        self.config['kafka']['output_topic'],
-                        value=asdict(processed)
-                    )
-                    
-                    message_count += 1
+                    try:
+                        self.producer.send(
+                            self.config['kafka']['output_topic'],
+                            value=asdict(processed)
+                        )
+                    except Exception as e:
+                        logger.error(f"Error sending message: {e}")
+                
+                previous_count = message_count
+                message_count += len(results)
+                
+                # Log statistics periodically
+                if message_count // 1000 > previous_count // 1000:
+                    elapsed = time.time() - start_time
+                    rate = message_count / elapsed
+                    logger.info(f"Processed {message_count} messages | Rate: {rate:.1f} msg/s")
                     
-                    # Log statistics periodically
-                    if message_count % 1000 == 0:
-                        elapsed = time.time() - start_time
-                        rate = message_count / elapsed
-                        logger.info(f"Processed {message_count} messages | Rate: {rate:.1f} msg/s")
-                        
-                        # Trigger aggregate computation
+                    # Trigger aggregate computation
+                    try:
                         await self.compute_and_store_aggregates()
-                        
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}")
+                    except Exception as e:
+                        logger.error(f"Error computing aggregates: {e}")
                     
         except KeyboardInterrupt:
             logger.info("Shutting down pipeline...")
@@ -316,12 +906,10 @@ class KafkaIngestionPipeline:
             self.cleanup()
     
     async def compute_and_store_aggregates(self):
-        """Compute and store time-window aggregates"""
-        for window in self.aggregator.windows.keys():
-            for key in list(self.aggregator.buffers[window].keys()):
-                aggregates = self.aggregator.compute_aggregates(window, key)
-                if aggregates:
-                    await self.storage.store_aggregates(window, key, aggregates)
+        """Store the aggregates of the windows closed or changed since the last call"""
+        rows = list(self.aggregator.collect_aggregates())
+        if not await self.storage.store_aggregates(rows):
+            self.aggregator.mark_unstored(rows)
     
     def cleanup(self):
         """Clean up resources"""
@@ -408,32 +996,19 @@ class DataStorage:
             logger.error(f"Failed to flush batch: {e}")
             self.connection.rollback()
     
-    async def store_aggregates(self, window: str, key: str, aggregates: Dict[str, float]):
-        """Store aggregated data"""
+    async def store_aggregates(self, rows: List[Tuple[str, str, str, str, Dict[str, float]]]) -> bool:
+        """
+        Upsert (window, device_id, sensor_type, window_start, aggregates) rows
+        in one statement and one transaction; return False if it failed
+        """
+        if not rows:
+            return True
         if not self.connection:
             self.connect()
         
         try:
             with self.connection.cursor() as cursor:
-                device_id, sensor_type, window_start = key.rsplit('_', 2)
-                
-                cursor.execute(
-                    """
-                    INSERT INTO sensor_aggregates
-                    (device_id, sensor_type, window, window_start, avg_value, min_value, 
-                     max_value, count, sum_value, stddev, p50, p95, p99)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (device_id, sensor_type, window, window_start) DO UPDATE
-                    SET avg_value = EXCLUDED.avg_value,
-                        min_value = EXCLUDED.min_value,
-                        max_value = EXCLUDED.max_value,
-                        count = EXCLUDED.count,
-                        sum_value = EXCLUDED.sum_value,
-                        stddev = EXCLUDED.stddev,
-                        p50 = EXCLUDED.p50,
-                        p95 = EXCLUDED.p95,
-                        p99 = EXCLUDED.p99
-                    """,
+                values = [
                     (
                         device_id, sensor_type, window, window_start,
                         aggregates.get('avg'), aggregates.get('min'),
@@ -442,13 +1017,42 @@ class DataStorage:
                         aggregates.get('p50'), aggregates.get('p95'),
                         aggregates.get('p99')
                     )
-                )
+                    for window, device_id, sensor_type, window_start, aggregates in rows
+                ]
+                self.upsert_aggregates(cursor, values)
                 
                 self.connection.commit()
+                logger.debug(f"Stored {len(values)} aggregates")
+                return True
                 
         except Exception as e:
             logger.error(f"Failed to store aggregates: {e}")
             self.connection.rollback()
+            return False
+    
+    def upsert_aggregates(self, cursor, values: List[Tuple]):
+        """Insert or update aggregate rows"""
+        execute_values(
+            cursor,
+            """
+            INSERT INTO sensor_aggregates
+            (device_id, sensor_type, window, window_start, avg_value, min_value, 
+             max_value, count, sum_value, stddev, p50, p95, p99)
+            VALUES %s
+            ON CONFLICT (device_id, sensor_type, window, window_start) DO UPDATE
+            SET avg_value = EXCLUDED.avg_value,
+                min_value = EXCLUDED.min_value,
+                max_value = EXCLUDED.max_value,
+                count = EXCLUDED.count,
+                sum_value = EXCLUDED.sum_value,
+                stddev = EXCLUDED.stddev,
+                p50 = EXCLUDED.p50,
+                p95 = EXCLUDED.p95,
+                p99 = EXCLUDED.p99
+            """,
+            values,
+            page_size=1000
+        )
     
     def close(self):
         """Close database connection"""
@@ -534,6 +1138,10 @@ def load_config() -> Dict[str, Any]:
             'host': 'localhost',
             'port': 6379,
             'ttl': 3600
+        },
+        'processing': {
+            'batch_threshold': 64,
+            'max_poll_records': 500
         }
     }
 
@@ -1,11 +1,17 @@
 #!/usr/bin/env python3
-import yaml
+import os
 import sys
 
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+import yaml.fast
+
 def fix_yaml(filename):
     try:
         with open(filename, 'r') as f:
-            data = yaml.safe_load(f)
+            data = yaml.fast.load(f)
         # Placeholder: Add YAML fixing logic here
         print(f'YAML file {filename} loaded successfully. No fixes implemented yet.')
     except yaml.YAMLError as e:
@@ -12,6 +12,8 @@ import uuid
 import math
 import asyncio
 import argparse
+import os
+import sys
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
@@ -20,6 +22,11 @@ import numpy as np
 from collections import deque
 import hashlib
 
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+
 
 class SensorType(Enum):
     """Supported IoT sensor types"""
@@ -446,11 +453,37 @@ class IoTFleetSimulator:
         
         print(f"Data exported to {output_file}")
     
-    def export_to_kafka_format(self) -> List[Dict]:
-        """Format data for Kafka ingestion"""
-        messages = []
+    def export_to_yaml(self, output_file: str = "sensor_data.yaml", kafka_format: bool = False):
+        """Export generated data to a YAML file, writing readings as they are formatted"""
+        if kafka_format:
+            data = self.iter_kafka_messages()
+        else:
+            data = {
+                'metadata': {
+                    'generated_at': datetime.utcnow().isoformat(),
+                    'num_devices': len(self.devices),
+                    'num_readings': len(self.message_queue)
+                },
+                'devices': (self.device_record(device) for device in self.devices),
+                'readings': (asdict(reading) for reading in self.message_queue)
+            }
+        
+        with open(output_file, 'w') as f:
+            yaml.safe_stream_dump(data, f, sort_keys=False)
+        
+        print(f"Data exported to {output_file}")
+    
+    def device_record(self, device: DeviceProfile) -> Dict[str, Any]:
+        """Device profile as plain data, with enums replaced by their values"""
+        record = asdict(device)
+        record['sensors'] = [sensor.value for sensor in device.sensors]
+        record['status'] = device.status.value
+        return record
+    
+    def iter_kafka_messages(self):
+        """Yield readings formatted for Kafka ingestion, one at a time"""
         for reading in self.message_queue:
-            message = {
+            yield {
                 'key': reading.device_id,
                 'value': asdict(reading),
                 'timestamp': reading.timestamp,
@@ -459,8 +492,10 @@ class IoTFleetSimulator:
                     'device_id': reading.device_id
                 }
             }
-            messages.append(message)
-        return messages
+    
+    def export_to_kafka_format(self) -> List[Dict]:
+        """Format data for Kafka ingestion"""
+        return list(self.iter_kafka_messages())
 
 
 async def main():
@@ -1,24 +1,21 @@
-import json
 import sys
 import os
 
-def validate_json(file_path):
+from validation_cache import open_cache
+from validation_engine import validate_file
+
+def validate_json(file_path, cache=None):
     """Validates if the content of a given file is valid JSON."""
     if not os.path.exists(file_path):
         print(f"Error: File not found at '{file_path}'")
         return False
     
-    try:
-        with open(file_path, 'r') as f:
-            json.load(f)
-        print(f"Success: '{file_path}' is valid JSON.")
-        return True
-    except json.JSONDecodeError as e:
-        print(f"Error: '{file_path}' is not valid JSON. Details: {e}")
-        return False
-    except Exception as e:
-        print(f"An unexpected error occurred while processing '{file_path}': {e}")
+    result = validate_file(file_path, 'json', cache)
+    if not result['valid']:
+        print(f"Error: '{file_path}' is not valid JSON. Details: {result['error']}")
         return False
+    print(f"Success: '{file_path}' is valid JSON.")
+    return True
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -26,8 +23,9 @@ if __name__ == "__main__":
         sys.exit(1)
     
     all_valid = True
+    cache = open_cache()
     for i in range(1, len(sys.argv)):
-        if not validate_json(sys.argv[i]):
+        if not validate_json(sys.argv[i], cache):
             all_valid = False
     
     if not all_valid:
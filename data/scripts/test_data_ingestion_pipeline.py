@@ -0,0 +1,534 @@
+import unittest
+import asyncio
+import contextlib
+import math
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import warnings
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from data_ingestion_pipeline import (AnomalyDetector, DataStorage, KafkaIngestionPipeline,
+                                     QuantileSketch, StreamProcessor, TimeSeriesAggregator)
+
+def reference_scores(readings, window_size=100, z_threshold=3.0):
+    # The detector as it was before the running statistics: mean and stdev
+    # of the whole window for every reading.
+    histories = {}
+    scores = []
+    for device_id, sensor_type, value in readings:
+        history = histories.setdefault((device_id, sensor_type), deque(maxlen=window_size))
+        if len(history) < 10:
+            history.append(value)
+            scores.append(0.0)
+            continue
+        mean = statistics.mean(history)
+        stdev = statistics.stdev(history)
+        z_score = 0 if stdev == 0 else abs((value - mean) / stdev)
+        history.append(value)
+        scores.append(min(z_score / z_threshold, 1.0))
+    return scores
+
+def random_readings(seed, count):
+    rng = random.Random(seed)
+    readings = []
+    for _ in range(count):
+        device = rng.randrange(5)
+        sensor = rng.choice(['temperature', 'pressure'])
+        if sensor == 'pressure':
+            value = 1013.25 + rng.gauss(0, 0.01)
+        elif rng.random() < 0.3:
+            value = 21.5  # Long constant stretches
+        else:
+            value = rng.gauss(20, 5) * (10 if rng.random() < 0.01 else 1)
+        readings.append((f"device-{device}", sensor, value))
+    return readings
+
+class TestAnomalyDetector(unittest.TestCase):
+
+    def assert_scores_match(self, readings, **kwds):
+        detector = AnomalyDetector(**kwds)
+        scores = [detector.detect(*reading) for reading in readings]
+        for index, (score, expected) in enumerate(zip(scores, reference_scores(readings, **kwds))):
+            self.assertAlmostEqual(score, expected, places=9, msg=index)
+
+    def test_matches_full_window_statistics(self):
+        for seed in range(5):
+            self.assert_scores_match(random_readings(seed, 5000))
+
+    def test_small_window(self):
+        self.assert_scores_match(random_readings(7, 3000), window_size=12, z_threshold=2.0)
+
+    def test_constant_window_scores_zero(self):
+        readings = [('d', 'vibration', float(v)) for v in range(20)]
+        readings += [('d', 'vibration', 0.1)] * 150
+        detector = AnomalyDetector()
+        scores = [detector.detect(*reading) for reading in readings]
+        self.assertEqual(scores[-50:], [0.0] * 50)
+        self.assert_scores_match(readings)
+
+    def test_batches_match_single_readings(self):
+        readings = random_readings(3, 6000)
+        detector = AnomalyDetector()
+        expected = [detector.detect(*reading) for reading in readings]
+        rng = random.Random(3)
+        for window_size in [100, 12]:
+            batched = AnomalyDetector(window_size=window_size)
+            single = AnomalyDetector(window_size=window_size)
+            start = 0
+            while start < len(readings):
+                batch = readings[start:start + rng.choice([1, 5, 50, 500, 2000])]
+                start += len(batch)
+                device_ids, sensor_types, values = zip(*batch)
+                scores = batched.detect_batch(device_ids, sensor_types, np.array(values))
+                self.assertEqual(scores.tolist(), [single.detect(*reading) for reading in batch])
+            if window_size == 100:
+                self.assertEqual(scores.tolist(), expected[-len(batch):])
+            for key in single.device_histories.slots:
+                self.assertEqual(batched.device_histories[key].tolist(),
+                                 single.device_histories[key].tolist())
+
+    def test_windows_grow(self):
+        detector = AnomalyDetector()
+        readings = [(f"device-{i % 3000}", 'humidity', float(i % 7)) for i in range(12000)]
+        device_ids, sensor_types, values = zip(*readings)
+        detector.detect_batch(device_ids, sensor_types, np.array(values))
+        self.assertEqual(len(detector.device_histories), 3000)
+        self.assertEqual(detector.device_histories['device-5', 'humidity'].tolist(),
+                         [5.0, 2.0, 6.0, 3.0])
+
+    def test_idle_series_are_evicted(self):
+        detector = AnomalyDetector(capacity=4, idle_timeout=60.0)
+        histories = detector.device_histories
+        for device in ['a', 'b', 'c', 'd']:
+            histories.slot((device, 'pressure'), 0.0)
+            histories.append(histories.slots[device, 'pressure'], 1000.0)
+        histories.slot(('a', 'pressure'), 50.0)
+        
+        # Only the series not seen since time 0 make room for the new one
+        slot = histories.slot(('e', 'pressure'), 100.0)
+        self.assertEqual(len(histories.counts), 4)
+        self.assertEqual(sorted(histories.slots), [('a', 'pressure'), ('e', 'pressure')])
+        self.assertEqual(slot, 1)
+        self.assertEqual(histories['e', 'pressure'].tolist(), [])
+        self.assertEqual(histories['a', 'pressure'].tolist(), [1000.0])
+        
+        # Without idle series the matrix grows
+        for device in ['f', 'g', 'h']:
+            histories.slot((device, 'pressure'), 100.0)
+        self.assertEqual(len(histories.counts), 8)
+        self.assertEqual(len(histories), 5)
+        self.assertEqual(histories.evict_idle(200.0), 5)
+        self.assertEqual(len(histories), 0)
+
+    def test_non_finite_values_are_skipped(self):
+        readings = random_readings(8, 3000)
+        bad = {50: float('nan'), 400: float('inf'), 401: float('-inf'), 2500: float('nan')}
+        dirty = [(device_id, sensor_type, bad.get(index, value))
+                 for index, (device_id, sensor_type, value) in enumerate(readings)]
+        clean = [reading for index, reading in enumerate(readings) if index not in bad]
+        expected = reference_scores(clean)
+        for index in sorted(bad):
+            expected.insert(index, 0.0)
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            single = AnomalyDetector()
+            scores = [single.detect(*reading) for reading in dirty]
+            batched = AnomalyDetector()
+            device_ids, sensor_types, values = zip(*dirty)
+            batch_scores = batched.detect_batch(device_ids, sensor_types, np.array(values)).tolist()
+        for index, (score, batch_score) in enumerate(zip(scores, batch_scores)):
+            self.assertAlmostEqual(score, expected[index], places=9, msg=index)
+            self.assertAlmostEqual(batch_score, expected[index], places=9, msg=index)
+        
+        # A window that saw a NaN recovers at once
+        detector = AnomalyDetector()
+        values = [float(i % 10) for i in range(200)]
+        values[50] = float('nan')
+        scores = [detector.detect('d', 'light', value) for value in values]
+        self.assertTrue(all(math.isfinite(score) for score in scores))
+        self.assertEqual(detector.device_histories['d', 'light'].tolist()[-1], 9.0)
+
+
+class TestStreamProcessor(unittest.TestCase):
+
+    def test_process_batch_matches_process(self):
+        rng = random.Random(5)
+        messages = []
+        for i in range(3000):
+            sensor_type = rng.choice(['temperature', 'humidity', 'pressure', 'vibration', 'light'])
+            value = rng.choice([rng.gauss(50, 40), rng.randrange(-100, 1200), float('nan')])
+            messages.append({'device_id': f"d{rng.randrange(20)}", 'sensor_type': sensor_type,
+                             'value': value, 'timestamp': f"2025-09-01T00:00:{i % 60:02d}Z",
+                             'metadata': {'seq': i}})
+        single = StreamProcessor()
+        batched = StreamProcessor()
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            expected = [asyncio.run(single.process(message)) for message in messages]
+            results = []
+            for start in range(0, len(messages), 700):
+                results += asyncio.run(batched.process_batch(messages[start:start + 700]))
+        self.assertEqual(len(results), len(expected))
+        for result, processed in zip(results, expected):
+            # The reprs of NaNs are equal
+            self.assertEqual(repr(result), repr(processed))
+
+    def test_mixed_value_types(self):
+        rng = random.Random(6)
+        values = [25, 25.5, -80, 120.0, True, '25.5', None, [1], 1013]
+        messages = []
+        for i in range(400):
+            messages.append({'device_id': f"d{rng.randrange(3)}",
+                             'sensor_type': rng.choice(['temperature', 'pressure', 'light']),
+                             'value': rng.choice(values), 'timestamp': f"2025-09-01T00:00:{i % 60:02d}Z",
+                             'metadata': {'seq': i}})
+        valid = [message for message in messages if type(message['value']) in (int, float, bool)]
+        
+        # The batch path rejects what process rejects, without touching the windows
+        batched = StreamProcessor()
+        with self.assertRaises(TypeError):
+            asyncio.run(batched.process_batch(messages))
+        self.assertEqual(len(batched.anomaly_detector.device_histories), 0)
+        
+        single = FakePipeline([])
+        expected = asyncio.run(single.process_messages(messages))
+        pipeline = FakePipeline([])
+        results = asyncio.run(pipeline.process_batch(messages))
+        self.assertEqual([repr(result) for result in results], [repr(result) for result in expected])
+        self.assertEqual([result.metadata['seq'] for result in results],
+                         [message['metadata']['seq'] for message in valid])
+        
+        # Ints and bools keep their type
+        results = asyncio.run(StreamProcessor().process_batch(valid))
+        expected = [asyncio.run(processor.process(message))
+                    for processor in [StreamProcessor()] for message in valid]
+        self.assertEqual([repr(result) for result in results], [repr(result) for result in expected])
+        self.assertIn(int, {type(result.processed_value) for result in results})
+        self.assertIn(bool, {type(result.processed_value) for result in results})
+
+
+def timed_readings(seed, count, start=datetime(2025, 9, 1, tzinfo=timezone.utc)):
+    # Readings a second apart, some of them a little out of order.
+    rng = random.Random(seed)
+    readings = []
+    for i in range(count):
+        ts = start + timedelta(seconds=i - rng.choice([0, 0, 0, 5, 30]))
+        value = rng.choice([rng.gauss(20, 5), -rng.expovariate(0.1), 0.0])
+        readings.append((f"device-{rng.randrange(3)}", 'temperature', value, ts.isoformat()))
+    return readings
+
+class TestTimeSeriesAggregator(unittest.TestCase):
+
+    def assert_matches_values(self, aggregates, values, accuracy=0.01):
+        self.assertEqual(aggregates['count'], len(values))
+        self.assertEqual(aggregates['min'], min(values))
+        self.assertEqual(aggregates['max'], max(values))
+        self.assertAlmostEqual(aggregates['sum'], sum(values), places=6)
+        self.assertAlmostEqual(aggregates['avg'], statistics.mean(values), places=9)
+        stddev = statistics.stdev(values) if len(values) > 1 else 0
+        self.assertAlmostEqual(aggregates['stddev'], stddev, places=9)
+        ordered = sorted(values)
+        for name, q in [('p50', 0.5), ('p95', 0.95), ('p99', 0.99)]:
+            expected = ordered[int(q * (len(values) - 1))]
+            self.assertLessEqual(abs(aggregates[name] - expected), accuracy * abs(expected) + 1e-9)
+
+    def test_windows_match_raw_values(self):
+        aggregator = TimeSeriesAggregator(allowed_lateness=60.0)
+        readings = timed_readings(1, 4 * 3600)
+        for reading in readings:
+            aggregator.add_data(*reading)
+        
+        expected = defaultdict(list)
+        for device_id, sensor_type, value, timestamp in readings:
+            ts = datetime.fromisoformat(timestamp)
+            for name, delta in aggregator.windows.items():
+                size = int(delta.total_seconds())
+                start = int(ts.timestamp()) // size * size
+                expected[name, device_id, sensor_type,
+                         datetime.fromtimestamp(start, timezone.utc).isoformat()].append(value)
+        
+        collected = {}
+        for window, device_id, sensor_type, window_start, aggregates in aggregator.collect_aggregates():
+            key = (window, device_id, sensor_type, window_start)
+            self.assertNotIn(key, collected)
+            collected[key] = aggregates
+        self.assertEqual(aggregator.late_points, 0)
+        self.assertEqual(sorted(collected), sorted(expected))
+        for key, values in expected.items():
+            self.assert_matches_values(collected[key], values)
+
+    def test_closed_windows_are_evicted(self):
+        aggregator = TimeSeriesAggregator(allowed_lateness=30.0)
+        for reading in timed_readings(2, 2 * 3600):
+            aggregator.add_data(*reading)
+        # Only the windows the watermark has not passed are kept
+        watermark = aggregator.watermark
+        for name, size in aggregator.sizes.items():
+            for start in aggregator.open_windows[name]:
+                self.assertGreater(start + size, watermark)
+        self.assertLessEqual(len(aggregator.open_windows['1m']), 2)
+        self.assertEqual(len(aggregator.open_windows['1h']), 1)
+        
+        # Windows are reported again only when they change
+        first = list(aggregator.collect_aggregates())
+        self.assertEqual(len({entry[:4] for entry in first}), len(first))
+        self.assertIn(('1h', 'device-0', 'temperature', '2025-09-01T00:00:00+00:00'),
+                      [entry[:4] for entry in first])
+        self.assertEqual(list(aggregator.collect_aggregates()), [])
+        aggregator.add_data('device-1', 'temperature', 1.0, '2025-09-01T01:59:59Z')
+        self.assertEqual(sorted(entry[:4] for entry in aggregator.collect_aggregates()),
+                         [(window, 'device-1', 'temperature', start) for window, start in [
+                             ('15m', '2025-09-01T01:45:00+00:00'), ('1h', '2025-09-01T01:00:00+00:00'),
+                             ('1m', '2025-09-01T01:59:00+00:00'), ('24h', '2025-09-01T00:00:00+00:00'),
+                             ('5m', '2025-09-01T01:55:00+00:00')]])
+
+    def test_incremental_collection_matches_full_collection(self):
+        readings = timed_readings(3, 3 * 3600)
+        full = TimeSeriesAggregator(allowed_lateness=20.0)
+        incremental = TimeSeriesAggregator(allowed_lateness=20.0)
+        stored = {}
+        rng = random.Random(3)
+        for reading in readings:
+            full.add_data(*reading)
+            incremental.add_data(*reading)
+            if rng.random() < 0.01:
+                for entry in incremental.collect_aggregates():
+                    stored[entry[:4]] = entry[4]
+        for entry in incremental.collect_aggregates():
+            stored[entry[:4]] = entry[4]
+        expected = {entry[:4]: entry[4] for entry in full.collect_aggregates()}
+        self.assertEqual(sorted(stored), sorted(expected))
+        for key, aggregates in expected.items():
+            # Merging in another order can change the last bits
+            for name, value in aggregates.items():
+                self.assertAlmostEqual(stored[key][name], value, places=9, msg=(key, name))
+
+    def test_late_points_are_dropped(self):
+        aggregator = TimeSeriesAggregator(allowed_lateness=10.0)
+        aggregator.add_data('d', 'light', 1.0, '2025-09-01T00:00:30Z')
+        aggregator.add_data('d', 'light', 2.0, '2025-09-01T00:01:15Z')
+        aggregator.add_data('d', 'light', 3.0, '2025-09-01T00:00:59Z')
+        aggregator.add_data('d', 'light', 4.0, '2025-09-01T00:01:01')
+        self.assertEqual(aggregator.late_points, 1)
+        aggregates = {(entry[0], entry[3]): entry[4] for entry in aggregator.collect_aggregates()}
+        self.assertEqual(aggregates['1m', '2025-09-01T00:00:00+00:00']['count'], 1)
+        self.assertEqual(aggregates['1m', '2025-09-01T00:01:00+00:00']['count'], 2)
+        self.assertEqual(aggregates['5m', '2025-09-01T00:00:00+00:00']['sum'], 7.0)
+
+    def test_sketch_merges_and_skips_non_finite_values(self):
+        rng = random.Random(4)
+        values = [rng.lognormvariate(0, 3) * rng.choice([1, -1]) for _ in range(20000)]
+        parts = [QuantileSketch() for _ in range(4)]
+        for index, value in enumerate(values):
+            parts[index % 4].add(value)
+        for value in [float('nan'), float('inf'), float('-inf')]:
+            parts[0].add(value)
+        sketch = parts[0].copy()
+        for part in parts[1:]:
+            sketch.merge(part)
+        self.assertEqual(sketch.count, len(values))
+        ordered = sorted(values)
+        qs = [0.0, 0.01, 0.25, 0.5, 0.75, 0.99, 1.0]
+        for q, estimate in zip(qs, sketch.quantiles(qs)):
+            expected = ordered[int(q * (len(values) - 1))]
+            self.assertLessEqual(abs(estimate - expected), 0.01 * abs(expected))
+        self.assertLess(len(sketch.positive) + len(sketch.negative), 2000)
+        with self.assertRaises(ValueError):
+            sketch.merge(QuantileSketch(0.05))
+
+
+class SQLiteConnection:
+    # A stand-in for a psycopg2 connection that counts commits.
+    
+    def __init__(self):
+        self.db = sqlite3.connect(':memory:')
+        self.db.execute("""
+            CREATE TABLE sensor_aggregates (
+                device_id TEXT, sensor_type TEXT, "window" TEXT, window_start TEXT,
+                avg_value REAL, min_value REAL, max_value REAL, count INTEGER, sum_value REAL,
+                stddev REAL, p50 REAL, p95 REAL, p99 REAL,
+                PRIMARY KEY (device_id, sensor_type, "window", window_start))
+            """)
+        self.commits = 0
+    
+    def cursor(self):
+        return contextlib.closing(self.db.cursor())
+    
+    def commit(self):
+        self.commits += 1
+        self.db.commit()
+    
+    def rollback(self):
+        self.db.rollback()
+    
+    def close(self):
+        self.db.close()
+
+class SQLiteStorage(DataStorage):
+    # DataStorage with the aggregate upsert written for SQLite.
+    
+    def __init__(self):
+        DataStorage.__init__(self, {})
+        self.connection = SQLiteConnection()
+        self.upserted = []
+        self.fail = False
+    
+    def upsert_aggregates(self, cursor, values):
+        if self.fail:
+            raise sqlite3.OperationalError("database is locked")
+        self.upserted.append(len(values))
+        cursor.executemany("""
+            INSERT INTO sensor_aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (device_id, sensor_type, "window", window_start) DO UPDATE
+            SET avg_value = excluded.avg_value, min_value = excluded.min_value,
+                max_value = excluded.max_value, count = excluded.count,
+                sum_value = excluded.sum_value, stddev = excluded.stddev,
+                p50 = excluded.p50, p95 = excluded.p95, p99 = excluded.p99
+            """, values)
+    
+    def rows(self):
+        return self.connection.db.execute(
+            'SELECT * FROM sensor_aggregates ORDER BY device_id, sensor_type, "window", window_start').fetchall()
+
+class TestAggregateFlush(unittest.TestCase):
+
+    def make_pipeline(self):
+        pipeline = KafkaIngestionPipeline({})
+        pipeline.storage = SQLiteStorage()
+        return pipeline
+
+    def add_readings(self, pipeline, devices, second):
+        for device in devices:
+            pipeline.aggregator.add_data(f"device-{device}", 'pressure', 1000.0 + device + second,
+                                         f"2025-09-01T00:00:{second:02d}Z")
+
+    def test_flush_cost_follows_changed_series(self):
+        pipeline = self.make_pipeline()
+        storage = pipeline.storage
+        self.add_readings(pipeline, range(2000), 0)
+        asyncio.run(pipeline.compute_and_store_aggregates())
+        self.assertEqual(storage.upserted, [2000 * 5])
+        
+        # Each flush writes the five windows of the changed series only, in one commit
+        for second, changed in [(1, 10), (2, 100), (3, 0), (4, 1000)]:
+            self.add_readings(pipeline, range(changed), second)
+            asyncio.run(pipeline.compute_and_store_aggregates())
+        self.assertEqual(storage.upserted, [10000, 50, 500, 5000])
+        self.assertEqual(storage.connection.commits, 4)
+        self.assertEqual(len(storage.rows()), 10000)
+        
+        self.assertEqual(list(pipeline.aggregator.collect_aggregates()), [])
+        row = storage.connection.db.execute(
+            'SELECT count, max_value FROM sensor_aggregates WHERE device_id = ? AND "window" = ?',
+            ('device-5', '24h')).fetchone()
+        self.assertEqual(row, (4, 1009.0))
+
+    def test_failed_flush_is_retried(self):
+        pipeline = self.make_pipeline()
+        storage = pipeline.storage
+        self.add_readings(pipeline, range(3), 0)
+        storage.fail = True
+        asyncio.run(pipeline.compute_and_store_aggregates())
+        self.assertEqual(storage.rows(), [])
+        storage.fail = False
+        self.add_readings(pipeline, range(1), 1)
+        asyncio.run(pipeline.compute_and_store_aggregates())
+        self.assertEqual(storage.upserted, [15])
+        self.assertEqual([row[7] for row in storage.rows()], [2] * 5 + [1] * 10)
+
+
+class FakeRecord:
+    def __init__(self, value):
+        self.value = value
+
+class FakeConsumer:
+    # Returns the given polls, then stops the pipeline like Ctrl-C would.
+    
+    def __init__(self, polls):
+        self.polls = list(polls)
+    
+    def poll(self, timeout_ms, max_records):
+        if not self.polls:
+            raise KeyboardInterrupt
+        return {'partition-0': [FakeRecord(value) for value in self.polls.pop(0)]}
+    
+    def close(self):
+        pass
+
+class FakeProducer:
+    def __init__(self):
+        self.sent = []
+    
+    def send(self, topic, value):
+        if value['metadata'].get('unsendable'):
+            raise ValueError("message too large")
+        self.sent.append(value)
+    
+    def close(self):
+        pass
+
+class FakeStorage:
+    def __init__(self):
+        self.stored = []
+    
+    async def store(self, processed):
+        self.stored.append(processed)
+    
+    def close(self):
+        pass
+
+class FakeCache:
+    async def store(self, processed):
+        pass
+
+class FakePipeline(KafkaIngestionPipeline):
+    
+    def __init__(self, polls):
+        KafkaIngestionPipeline.__init__(self, {'kafka': {'output_topic': 'processed'}})
+        self.polls = polls
+        self.storage = FakeStorage()
+        self.cache = FakeCache()
+        self.flushes = 0
+    
+    def initialize(self):
+        self.consumer = FakeConsumer(self.polls)
+        self.producer = FakeProducer()
+    
+    async def compute_and_store_aggregates(self):
+        self.flushes += 1
+        raise ConnectionError("database is down")
+
+class TestPipelineRun(unittest.TestCase):
+
+    def messages(self, count, start=0):
+        return [{'device_id': f"d{i % 7}", 'sensor_type': 'temperature', 'value': 20.0 + i % 5,
+                 'timestamp': f"2025-09-01T00:{i // 60 % 60:02d}:{i % 60:02d}Z", 'metadata': {'seq': i}}
+                for i in range(start, start + count)]
+
+    def test_bad_records_are_skipped(self):
+        first = self.messages(100)
+        first[50]['timestamp'] = 'garbage'
+        first[70]['metadata']['unsendable'] = True
+        second = self.messages(950, 100)
+        third = self.messages(5, 1050)
+        pipeline = FakePipeline([first, second, third])
+        self.assertGreater(len(first), pipeline.batch_threshold)
+        self.assertLess(len(third), pipeline.batch_threshold)
+        asyncio.run(pipeline.run())
+        
+        seqs = [i for i in range(1055) if i not in (50, 70)]
+        self.assertEqual([value['metadata']['seq'] for value in pipeline.producer.sent], seqs)
+        self.assertEqual(len(pipeline.storage.stored), 1054)
+        self.assertEqual(pipeline.flushes, 1)
+
+if __name__ == '__main__':
+    unittest.main()
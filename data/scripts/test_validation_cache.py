@@ -0,0 +1,120 @@
+import unittest
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import validation_engine
+from validation_cache import ValidationCache, main
+from validation_engine import validate_file, validate_paths
+
+class TestValidationCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.dir, 'gaa.db')
+        self.cache = ValidationCache(self.db_path)
+        self.checked = []
+        self.original = validation_engine.check_file
+        def counting_check_file(path, kind):
+            self.checked.append(path)
+            return self.original(path, kind)
+        validation_engine.check_file = counting_check_file
+
+    def tearDown(self):
+        validation_engine.check_file = self.original
+        self.cache.close()
+        shutil.rmtree(self.dir)
+
+    def write(self, name, content):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_unchanged_file_is_not_parsed(self):
+        path = self.write('bad.yaml', 'a: [1, 2\n')
+        first = validate_file(path, cache=self.cache)
+        self.assertEqual(validate_file(path, cache=self.cache), first)
+        self.assertEqual(self.checked, [path])
+        self.assertFalse(first['valid'])
+        self.assertEqual((first['line'], first['column']), (2, 1))
+        stats = self.cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 1, 1))
+        self.assertEqual(stats['invalid_entries'], 1)
+
+    def test_cache_persists(self):
+        path = self.write('good.json', '{"a": 1}')
+        validate_file(path, cache=self.cache)
+        self.cache.close()
+        self.cache = ValidationCache(self.db_path)
+        self.assertTrue(validate_file(path, cache=self.cache)['valid'])
+        self.assertEqual(self.checked, [path])
+
+    def test_changed_file_is_validated_again(self):
+        path = self.write('config.yaml', 'a: 1\n')
+        self.assertTrue(validate_file(path, cache=self.cache)['valid'])
+        self.write('config.yaml', 'a: [1\n')
+        self.assertFalse(validate_file(path, cache=self.cache)['valid'])
+        # Same content and size with a new mtime is still a hit
+        os.utime(path, ns=(0, 10**9))
+        self.assertFalse(validate_file(path, cache=self.cache)['valid'])
+        self.assertEqual(self.checked, [path, path])
+
+    def test_same_size_change_with_new_mtime(self):
+        path = self.write('value.yaml', 'a: 1\n')
+        validate_file(path, cache=self.cache)
+        self.write('value.yaml', 'a: [\n')
+        os.utime(path, ns=(0, 2 * 10**9))
+        self.assertFalse(validate_file(path, cache=self.cache)['valid'])
+        self.assertEqual(len(self.checked), 2)
+
+    def test_validate_paths_with_cache(self):
+        paths = [self.write('f%02d.yaml' % number, 'n: %d\n' % number) for number in range(20)]
+        missing = os.path.join(self.dir, 'missing.yaml')
+        first = list(validate_paths(paths + [missing], workers=1, cache=self.cache))
+        self.checked = []
+        second = list(validate_paths(paths + [missing], workers=1, cache=self.cache))
+        self.assertEqual(first, second)
+        self.assertEqual(self.checked, [missing])
+
+    def test_stats_command_counts_earlier_runs(self):
+        path = self.write('a.yaml', 'a: 1\n')
+        for _ in range(3):
+            validate_file(path, cache=self.cache)
+        self.cache.close()
+        self.cache = ValidationCache(self.db_path)
+        validate_file(path, cache=self.cache)
+        # Hits not saved yet are counted by the instance that made them
+        stats = self.cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (3, 1))
+        self.cache.close()
+        output = io.StringIO()
+        with redirect_stdout(output):
+            main(['--db', self.db_path, 'stats'])
+        stats = json.loads(output.getvalue())
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (3, 1, 0.75))
+        self.cache = ValidationCache(self.db_path)
+
+    def test_invalidate_command(self):
+        first = self.write('a.yaml', 'a: 1\n')
+        second = self.write('b.yaml', 'b: 1\n')
+        validate_file(first, cache=self.cache)
+        validate_file(second, cache=self.cache)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            main(['--db', self.db_path, 'invalidate', first])
+            main(['--db', self.db_path, 'stats'])
+        self.assertIn('Removed 1 cached verdict(s)', output.getvalue())
+        stats = json.loads(output.getvalue().split('\n', 1)[1])
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(self.cache.invalidate(), 1)
+        self.assertEqual(self.cache.get_stats()['entries'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import validation_engine
+from validation_engine import collect_paths, validate_file, validate_paths, main
+
+CONFIGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'configs')
+
+class TestValidationEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write(self, name, content):
+        path = os.path.join(self.dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content.encode('utf-8') if isinstance(content, str) else content)
+        return path
+
+    def test_collect_paths(self):
+        first = self.write('a.yaml', 'a: 1\n')
+        second = self.write('nested/b.json', '{}')
+        self.write('nested/notes.txt', 'text')
+        third = self.write('nested/c.yml', 'c: 3\n')
+        missing = os.path.join(self.dir, 'missing.yaml')
+        self.assertEqual(collect_paths([self.dir]), [first, second, third])
+        self.assertEqual(collect_paths([os.path.join(self.dir, '**', '*.y*ml'), first, missing]),
+                [first, third, missing])
+
+    def test_validate_file(self):
+        result = validate_file(self.write('multi.yaml', 'a: 1\n---\nb: 2\n'))
+        self.assertTrue(result['valid'])
+        self.assertIsNone(result['error'])
+        result = validate_file(self.write('bad.yaml', 'a: 1\nb: [1, 2\n'))
+        self.assertFalse(result['valid'])
+        self.assertEqual((result['format'], result['line'], result['column']), ('yaml', 3, 1))
+        result = validate_file(self.write('bad.json', '{\n  "a": 1,\n}'))
+        self.assertFalse(result['valid'])
+        self.assertEqual((result['format'], result['line'], result['column']), ('json', 3, 1))
+        result = validate_file(self.write('latin.yaml', b'a: \xe9\n'))
+        self.assertFalse(result['valid'])
+        result = validate_file(os.path.join(self.dir, 'missing.json'))
+        self.assertFalse(result['valid'])
+        self.assertIn('FileNotFoundError', result['error'])
+        self.assertFalse(validate_file(self.write('data.txt', '{a: 1}'), 'json')['valid'])
+
+    def test_parallel_matches_serial(self):
+        for number in range(40):
+            if number % 3:
+                self.write('file%02d.yaml' % number, 'n: %d\n' % number)
+            else:
+                self.write('file%02d.json' % number, '{"n": %d' % number)
+        serial = list(validate_paths([self.dir], workers=1))
+        self.assertEqual(len(serial), 40)
+        self.assertEqual(list(validate_paths([self.dir], workers=2)), serial)
+        self.assertEqual(sum(result['valid'] for result in serial), 26)
+
+    def test_worker_failure_does_not_abort(self):
+        paths = [self.write('ok%02d.yaml' % number, 'ok: true\n') for number in range(20)]
+        original = validation_engine.validate_batch
+        def failing_batch(paths):
+            raise RuntimeError("boom")
+        validation_engine.validate_batch = failing_batch
+        try:
+            results = list(validate_paths(paths, workers=2))
+        finally:
+            validation_engine.validate_batch = original
+        self.assertEqual([result['path'] for result in results], paths)
+        self.assertTrue(all('worker failed' in result['error'] for result in results))
+
+    def test_cli_streams_json_lines(self):
+        self.write('good.yaml', 'a: 1\n')
+        self.write('bad.yaml', 'a: b: c\n')
+        output = io.StringIO()
+        with redirect_stdout(output):
+            status = main([self.dir, os.path.join(self.dir, 'missing.yaml'), '--workers', '1'])
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(status, 1)
+        self.assertEqual([result['valid'] for result in results], [False, True, False])
+
+    def test_configs_sweep(self):
+        results = list(validate_paths([CONFIGS_DIR], workers=2))
+        names = sorted(name for name in os.listdir(CONFIGS_DIR)
+                if name.endswith(('.yaml', '.yml', '.json')))
+        self.assertEqual([os.path.basename(result['path']) for result in results], names)
+
+if __name__ == '__main__':
+    unittest.main()
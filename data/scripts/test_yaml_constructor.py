@@ -0,0 +1,74 @@
+import unittest
+import os
+import sys
+
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+
+class TestConstructorDispatch(unittest.TestCase):
+
+    def test_add_constructor_after_load(self):
+        class PointLoader(yaml.SafeLoader):
+            pass
+        with self.assertRaises(yaml.constructor.ConstructorError):
+            yaml.load("!point [1, 2]", Loader=PointLoader)
+        PointLoader.add_constructor('!point',
+                lambda loader, node: tuple(loader.construct_sequence(node)))
+        self.assertEqual(yaml.load("!point [1, 2]", Loader=PointLoader), (1, 2))
+        with self.assertRaises(yaml.constructor.ConstructorError):
+            yaml.load("!point [1, 2]", Loader=yaml.SafeLoader)
+
+    def test_base_class_changes_reach_subclasses(self):
+        class BaseLoader(yaml.SafeLoader):
+            pass
+        class DerivedLoader(BaseLoader):
+            pass
+        self.assertEqual(yaml.load("!!str 1", Loader=DerivedLoader), '1')
+        BaseLoader.add_constructor('tag:yaml.org,2002:str',
+                lambda loader, node: 'str:' + loader.construct_scalar(node))
+        self.assertEqual(yaml.load("!!str 1", Loader=DerivedLoader), 'str:1')
+        self.assertEqual(yaml.load("!!str 1", Loader=yaml.SafeLoader), '1')
+
+    def test_multi_constructor_prefix_misses(self):
+        class PrefixLoader(yaml.SafeLoader):
+            pass
+        PrefixLoader.add_multi_constructor('!a/',
+                lambda loader, suffix, node: ('a', suffix))
+        self.assertEqual(yaml.load("[!a/x 1, !a/y 2]", Loader=PrefixLoader),
+                [('a', 'x'), ('a', 'y')])
+        for attempt in range(2):
+            with self.assertRaises(yaml.constructor.ConstructorError) as context:
+                yaml.load("!b/x 1", Loader=PrefixLoader)
+            self.assertIn("'!b/x'", str(context.exception))
+        PrefixLoader.add_multi_constructor('!b/',
+                lambda loader, suffix, node: ('b', suffix))
+        self.assertEqual(yaml.load("!b/x 1", Loader=PrefixLoader), ('b', 'x'))
+        PrefixLoader.add_multi_constructor(None,
+                lambda loader, tag, node: ('any', tag))
+        self.assertEqual(yaml.load("!c 1", Loader=PrefixLoader), ('any', '!c'))
+
+    def test_kind_fallback(self):
+        class KindLoader(yaml.BaseLoader):
+            pass
+        data = "!x [a, !y {b: c}, !z d]"
+        for attempt in range(2):
+            self.assertEqual(yaml.load(data, Loader=KindLoader), ['a', {'b': 'c'}, 'd'])
+
+    def test_dispatch_cache_is_bounded(self):
+        class SmallCacheLoader(yaml.SafeLoader):
+            DISPATCH_CACHE_SIZE = 4
+        SmallCacheLoader.add_multi_constructor('!n',
+                lambda loader, suffix, node: int(suffix))
+        document = '[' + ', '.join('!n%d x' % number for number in range(20)) + ']'
+        self.assertEqual(yaml.load(document, Loader=SmallCacheLoader), list(range(20)))
+        self.assertLessEqual(len(SmallCacheLoader.yaml_dispatch_state[-1]), 4)
+
+    def test_full_loader_python_tags(self):
+        self.assertEqual(yaml.load("!!python/tuple [1, 2]", Loader=yaml.FullLoader), (1, 2))
+        self.assertEqual(yaml.load("!!python/name:os.path.join", Loader=yaml.UnsafeLoader),
+                os.path.join)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import io
+import os
+import random
+import sys
+
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+
+class LineDumper(yaml.SafeDumper):
+    # Write to the stream at every line break
+    FLUSH_CHUNKS = 1
+
+class SmallChunkDumper(yaml.SafeDumper):
+    FLUSH_CHUNKS = 16
+
+class RecordingStream:
+    # A stream without `encoding`, so the dumper encodes the output itself
+
+    def __init__(self):
+        self.writes = []
+
+    def write(self, data):
+        self.writes.append(data)
+
+DOCUMENTS = [
+    {'a': 1, 'b': [1, 2.5, None, True], 'c': {'d': 'e'}},
+    ['plain', 'with: colon', "single 'quoted'", 'multi\nline\ntext\n', 'été', ''],
+    {'long': 'word ' * 100, 'nested': [[1, [2, [3]]], {'x': {'y': {'z': []}}}]},
+    [{'id': 'sensor-%d' % k, 'value': k * 0.5, 'tags': ['t%d' % k] * 3} for k in range(200)],
+]
+
+class TestBufferedEmitter(unittest.TestCase):
+
+    def test_output_matches_line_writes(self):
+        for document in DOCUMENTS:
+            for kwds in ({}, {'default_flow_style': True}, {'canonical': True},
+                    {'allow_unicode': True, 'width': 20}):
+                for Dumper in (SmallChunkDumper, yaml.SafeDumper):
+                    self.assertEqual(yaml.dump(document, Dumper=Dumper, **kwds),
+                            yaml.dump(document, Dumper=LineDumper, **kwds))
+
+    def test_encoded_output(self):
+        for encoding in ('utf-8', 'utf-16-le', 'utf-16-be'):
+            for document in DOCUMENTS:
+                text = yaml.dump(document, Dumper=yaml.SafeDumper, allow_unicode=True)
+                data = yaml.dump(document, Dumper=SmallChunkDumper,
+                        allow_unicode=True, encoding=encoding)
+                if encoding.startswith('utf-16'):
+                    text = '\ufeff' + text
+                self.assertEqual(data, text.encode(encoding))
+
+    def test_writes_are_chunked(self):
+        document = DOCUMENTS[-1]
+        stream = RecordingStream()
+        yaml.dump(document, stream, Dumper=SmallChunkDumper, encoding='utf-8')
+        self.assertGreater(len(stream.writes), 1)
+        for data in stream.writes:
+            self.assertIsInstance(data, bytes)
+            self.assertTrue(data.endswith(b'\n'))
+        self.assertEqual(b''.join(stream.writes),
+                yaml.dump(document, Dumper=yaml.SafeDumper, encoding='utf-8'))
+        line_stream = RecordingStream()
+        yaml.dump(document, line_stream, Dumper=LineDumper, encoding='utf-8')
+        self.assertLess(len(stream.writes) * 2, len(line_stream.writes))
+
+    def test_documents_are_flushed(self):
+        stream = RecordingStream()
+        yaml.dump_all(DOCUMENTS[:3], stream, Dumper=yaml.SafeDumper)
+        self.assertEqual(stream.writes,
+                [yaml.dump(DOCUMENTS[0], Dumper=yaml.SafeDumper)]
+                + [yaml.dump(document, Dumper=yaml.SafeDumper, explicit_start=True)
+                    for document in DOCUMENTS[1:3]])
+
+    def test_stream_flush_is_called(self):
+        class FlushingStream(io.StringIO):
+            flushed = ''
+            def flush(self):
+                self.flushed = self.getvalue()
+        stream = FlushingStream()
+        yaml.dump({'a': 1}, stream, Dumper=yaml.SafeDumper)
+        self.assertEqual(stream.flushed, 'a: 1\n')
+
+def analysis_flags(analysis):
+    return (analysis.scalar, analysis.empty, analysis.multiline,
+            analysis.allow_flow_plain, analysis.allow_block_plain,
+            analysis.allow_single_quoted, analysis.allow_double_quoted,
+            analysis.allow_block)
+
+class TestScalarAnalysis(unittest.TestCase):
+
+    def test_fast_path_matches_character_walk(self):
+        alphabet = 'aZ09_.-'
+        generator = random.Random(2012)
+        scalars = ['', '-', '.', '--', '---', '...', '-1.5', '.inf', 'a-b', '---x', '....']
+        scalars += [''.join(generator.choice(alphabet) for k in range(generator.randint(1, 6)))
+                for attempt in range(2000)]
+        scalars += [scalar + ch for scalar in scalars[:200] for ch in ' :#\n\xe9']
+        for allow_unicode in (False, True):
+            emitter = yaml.SafeDumper(io.StringIO(), allow_unicode=allow_unicode)
+            for scalar in scalars:
+                self.assertEqual(analysis_flags(emitter.analyze_scalar(scalar)),
+                        analysis_flags(emitter.analyze_scalar_characters(scalar)), scalar)
+                # Cached
+                self.assertEqual(analysis_flags(emitter.analyze_scalar(scalar)),
+                        analysis_flags(emitter.analyze_scalar_characters(scalar)), scalar)
+
+    def test_cache_is_bounded_lru(self):
+        class SmallCacheDumper(yaml.SafeDumper):
+            ANALYSIS_CACHE_SIZE = 3
+        emitter = SmallCacheDumper(io.StringIO())
+        for scalar in ('a', 'b', 'c', 'a', 'd'):
+            emitter.analyze_scalar(scalar)
+        self.assertEqual(list(emitter.analyses), ['c', 'a', 'd'])
+        emitter.analyze_scalar('x' * (emitter.ANALYSIS_CACHE_VALUE_LENGTH + 1))
+        self.assertEqual(list(emitter.analyses), ['c', 'a', 'd'])
+
+    def test_cache_can_be_disabled(self):
+        class UncachedDumper(yaml.SafeDumper):
+            ANALYSIS_CACHE_SIZE = 0
+        for document in DOCUMENTS:
+            self.assertEqual(yaml.dump(document, Dumper=UncachedDumper),
+                    yaml.dump(document, Dumper=yaml.SafeDumper))
+
+if __name__ == '__main__':
+    unittest.main()
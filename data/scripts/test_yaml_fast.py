@@ -0,0 +1,49 @@
+import unittest
+import io
+import os
+import sys
+
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+import yaml.fast
+
+CONFIGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'configs')
+
+class TestFastFacade(unittest.TestCase):
+
+    def test_selected_classes(self):
+        self.assertEqual(yaml.fast.__with_libyaml__, yaml.__with_libyaml__)
+        if yaml.__with_libyaml__:
+            self.assertIs(yaml.fast.SafeLoader, yaml.CSafeLoader)
+            self.assertIs(yaml.fast.SafeDumper, yaml.CSafeDumper)
+        else:
+            self.assertIs(yaml.fast.SafeLoader, yaml.FastSafeLoader)
+            self.assertIs(yaml.fast.SafeDumper, yaml.SafeDumper)
+
+    def test_matches_safe_functions(self):
+        for name in sorted(os.listdir(CONFIGS_DIR)):
+            with open(os.path.join(CONFIGS_DIR, name), 'rb') as f:
+                content = f.read()
+            try:
+                documents = list(yaml.safe_load_all(content))
+            except yaml.YAMLError:
+                with self.assertRaises(yaml.MarkedYAMLError):
+                    list(yaml.fast.load_all(io.BytesIO(content)))
+                continue
+            self.assertEqual(list(yaml.fast.load_all(io.BytesIO(content))), documents, name)
+            self.assertEqual(yaml.fast.dump_all(documents), yaml.safe_dump_all(documents), name)
+            if len(documents) == 1:
+                self.assertEqual(yaml.fast.load(content), documents[0], name)
+                self.assertEqual(yaml.fast.dump(documents[0], sort_keys=False, encoding='utf-8'),
+                        yaml.safe_dump(documents[0], sort_keys=False, encoding='utf-8'), name)
+
+    def test_only_basic_tags(self):
+        with self.assertRaises(yaml.constructor.ConstructorError):
+            yaml.fast.load("!!python/object/apply:os.getcwd []")
+        with self.assertRaises(yaml.representer.RepresenterError):
+            yaml.fast.dump(object())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import os
+import re
+import subprocess
+import sys
+
+# Use the bundled yaml package from the data directory
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, DATA_DIR)
+
+import yaml
+from yaml.resolver import LazyRegexp
+
+DUMPER_MODULES = ['yaml.emitter', 'yaml.serializer', 'yaml.representer', 'yaml.dumper', 'yaml.cyaml']
+
+def run_python(code):
+    process = subprocess.run([sys.executable, '-c', code], cwd=DATA_DIR,
+                             capture_output=True, text=True, check=True)
+    return process.stdout.split()
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_loading_does_not_import_dumpers(self):
+        loaded = run_python("import sys, yaml; yaml.safe_load('a: [1, 2.5, true, ~, 2001-12-14]'); "
+                            "print(*sorted(sys.modules))")
+        self.assertIn('yaml.loader', loaded)
+        for name in DUMPER_MODULES:
+            self.assertNotIn(name, loaded)
+
+    def test_dumper_names_are_resolved_on_use(self):
+        output = run_python("import yaml; print(yaml.safe_dump({'a': [1]}) == 'a:\\n- 1\\n', "
+                            "yaml.Dumper.__module__, yaml.representer.__name__, "
+                            "yaml.__with_libyaml__, hasattr(yaml, 'CLoader'))")
+        self.assertEqual(output[:3], ['True', 'yaml.dumper', 'yaml.representer'])
+        self.assertEqual(output[3], output[4])
+        with self.assertRaises(AttributeError):
+            yaml.NoSuchDumper
+        for name in ('Dumper', 'SafeDumper', 'StreamSafeDumper', 'dumper', 'CLoader'):
+            self.assertIn(name, dir(yaml))
+
+    def test_star_import_exports_dumpers(self):
+        output = run_python("from yaml import *; import yaml; "
+                            "print(yaml.__with_libyaml__, 'CLoader' in dir(), 'CDumper' in dir(), "
+                            "*sorted(set(dir()) - {'yaml'}))")
+        self.assertEqual(output[0], output[1])
+        self.assertEqual(output[0], output[2])
+        exported = set(output[3:])
+        for name in ['Dumper', 'SafeDumper', 'BaseDumper', 'StreamSafeDumper', 'dump', 'safe_dump',
+                     'safe_stream_dump', 'emitter', 'representer', 'SafeLoader', 'load', 'YAMLError']:
+            self.assertIn(name, exported)
+        for name in ['LAZY_MODULES', 'DUMPER_NAMES', 'fast', 'incremental']:
+            self.assertNotIn(name, exported)
+        self.assertIn('Dumper', yaml.__all__)
+
+    def test_yaml_object_default_dumper(self):
+        class Reading(yaml.YAMLObject):
+            yaml_tag = '!reading'
+            def __init__(self, value):
+                self.value = value
+        self.assertIs(Reading.yaml_dumper, yaml.Dumper)
+        self.assertEqual(yaml.dump(Reading(1.5)), '!reading\nvalue: 1.5\n')
+        self.assertEqual(yaml.load('!reading {value: 2}', Loader=yaml.Loader).value, 2)
+
+class TestLazyRegexp(unittest.TestCase):
+
+    def test_matches_compiled_pattern(self):
+        for tag, regexp in yaml.resolver.Resolver.yaml_implicit_resolvers['1']:
+            self.assertIsInstance(regexp, LazyRegexp)
+        pattern = r'''^(?:[-+]?(?:0|[1-9][0-9_]*)
+                    |[-+]?0x[0-9a-fA-F_]+)$'''
+        lazy = LazyRegexp(pattern, re.X)
+        compiled = re.compile(pattern, re.X)
+        for value in ('0', '-12', '0x1F', '1_000', 'x', '', '1.5', '01'):
+            self.assertEqual(bool(lazy.match(value)), bool(compiled.match(value)), value)
+        self.assertEqual(lazy.pattern, compiled.pattern)
+        self.assertEqual(lazy.flags, re.X)
+        self.assertEqual(lazy.search(' 0x1F'), None)
+        self.assertEqual(lazy.fullmatch('-12').group(), '-12')
+
+if __name__ == '__main__':
+    unittest.main()
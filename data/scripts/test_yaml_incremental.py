@@ -0,0 +1,170 @@
+import unittest
+import os
+import random
+import sys
+
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+from yaml.incremental import IncrementalDocument
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CONFIGS_DIR = os.path.join(DATA_DIR, 'configs')
+
+DOCUMENT = """\
+# Settings
+version: 1
+name: "agents"
+limits:
+  cpu: 2
+  memory: 512
+workers:
+  - id: 1
+    role: scanner
+  - id: 2
+    role: parser
+notes: |
+  first line
+  second line
+"""
+
+# Roots whose properties come before the first key. No fragment refers
+# to their anchors, which would make the trees recursive.
+ROOT_PROPERTIES = ["&top \n# c\n\n", "!!map\n", "&root !!map\n"]
+
+# Fragments inserted by the random edits, valid and invalid.
+FRAGMENTS = [
+    'key: value\n', 'limits: 3\n', '  extra: 1\n', '  - 9\n', 'x', ': ', '\n', '# note\n',
+    '"', "'", '[', ']', '{a: 1}', '---\n', '...\n', '%YAML 1.1\n', '? k\n', '<<: {m: 1}\n',
+    '&a ', '*a', 'ref: *a\n', 'anchor: &a [1]\n', '\t', '  ', '-', '|\n', ' >\n  folded\n',
+]
+
+def node_fields(node):
+    if node is None:
+        return None
+    if isinstance(node, yaml.ScalarNode):
+        value = node.value
+    else:
+        value = [node_fields(item) if isinstance(item, yaml.Node)
+                else (node_fields(item[0]), node_fields(item[1])) for item in node.value]
+    return (node.__class__.__name__, node.tag, value,
+            mark_fields(node.start_mark), mark_fields(node.end_mark))
+
+def mark_fields(mark):
+    if isinstance(mark, int):
+        return mark
+    return (mark.name, mark.index, mark.line, mark.column)
+
+def expected_result(text, Loader):
+    # The data and tree of a fresh parse. Constructing the data flattens
+    # merge keys in the tree. None if the text does not compose, and the
+    # error class if it does not construct.
+    try:
+        node = yaml.compose(text, Loader=Loader)
+    except yaml.YAMLError:
+        return None
+    try:
+        data = Loader('').construct_document(node) if node is not None else None
+    except yaml.YAMLError as exc:
+        data = exc.__class__
+    return data, node_fields(node)
+
+def document_result(document):
+    try:
+        data = document.data
+    except yaml.YAMLError as exc:
+        data = exc.__class__
+    return data, node_fields(document.node)
+
+def random_edit(rng, text):
+    start = rng.randrange(len(text)+1)
+    end = min(len(text), start+rng.choice([0, 0, 1, 3, 10, 40]))
+    replacement = rng.choice(FRAGMENTS+[''])
+    return start, end, replacement
+
+class TestIncrementalDocument(unittest.TestCase):
+
+    def check_random_edits(self, text, seed, count, Loader=yaml.SafeLoader):
+        rng = random.Random(seed)
+        document = IncrementalDocument(text, Loader=Loader, name='<unicode string>')
+        incremental = 0
+        for _ in range(count):
+            start, end, replacement = random_edit(rng, document.text)
+            new_text = document.text[:start]+replacement+document.text[end:]
+            expected = expected_result(new_text, Loader)
+            if expected is None:
+                old_text = document.text
+                with self.assertRaises(yaml.YAMLError):
+                    document.edit(start, end, replacement)
+                self.assertEqual(document.text, old_text)
+                continue
+            incremental += document.edit(start, end, replacement)
+            self.assertEqual(document.text, new_text)
+            self.assertEqual(document_result(document), expected,
+                    (seed, start, end, replacement))
+        return incremental
+
+    def test_random_edits_match_full_parse(self):
+        incremental = 0
+        for seed in range(60):
+            incremental += self.check_random_edits(DOCUMENT, seed, 40)
+        self.assertGreater(incremental, 500)
+
+    def test_random_edits_with_root_properties(self):
+        for properties in ROOT_PROPERTIES:
+            for seed in range(10):
+                self.check_random_edits(properties+DOCUMENT, seed, 30)
+                self.check_random_edits(properties+DOCUMENT, seed, 10, Loader=yaml.FastSafeLoader)
+
+    def test_root_start_mark_is_kept(self):
+        text = "&a \n# c\n\ndatabase:\n  host: x\n  port: 5432\nother: 1\n"
+        document = IncrementalDocument(text)
+        start = text.index('x\n')
+        self.assertTrue(document.edit(start, start+1, 'y'))
+        self.assertEqual(node_fields(document.node),
+                node_fields(yaml.compose(document.text)))
+        self.assertEqual(mark_fields(document.node.start_mark), ('<unicode string>', 0, 0, 0))
+
+    def test_random_edits_of_configs(self):
+        for name in ['iot_dashboard_api.yaml', 'gaa-cicd.yml', 'settings.yaml']:
+            with open(os.path.join(CONFIGS_DIR, name), encoding='utf-8') as f:
+                text = f.read()
+            self.check_random_edits(text, name, 30)
+
+    def test_fast_safe_loader(self):
+        for seed in range(10):
+            self.check_random_edits(DOCUMENT, seed, 20, Loader=yaml.FastSafeLoader)
+
+    def test_only_touched_entries_are_parsed(self):
+        parsed = []
+        class CountingLoader(yaml.SafeLoader):
+            def __init__(self, stream):
+                parsed.append(stream)
+                yaml.SafeLoader.__init__(self, stream)
+        document = IncrementalDocument(DOCUMENT, Loader=CountingLoader)
+        del parsed[:]
+        start = document.text.index('512')
+        self.assertTrue(document.edit(start, start+3, '1024'))
+        self.assertEqual(parsed, ['limits:\n  cpu: 2\n  memory: 1024\n'])
+        self.assertEqual(document.data['limits'], {'cpu': 2, 'memory': 1024})
+        self.assertEqual(document.node.value[-1][0].start_mark.line, 11)
+
+    def test_fallback_to_full_parse(self):
+        document = IncrementalDocument(DOCUMENT)
+        self.assertFalse(document.edit(0, 0, '---\n'))
+        self.assertTrue(document.edit(len(document.text), len(document.text), 'more: 1\n'))
+        start = document.text.index('name')
+        self.assertFalse(document.edit(start, start, 'ref: &r 1\nother: *r\n'))
+        self.assertFalse(document.edit(0, 0, ''))
+
+    def test_errors_keep_the_document(self):
+        document = IncrementalDocument(DOCUMENT)
+        start = document.text.index('agents"')+6
+        with self.assertRaises(yaml.YAMLError):
+            document.edit(start, start+1, '')
+        self.assertEqual(document.text, DOCUMENT)
+        self.assertEqual(document.data, yaml.safe_load(DOCUMENT))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+import unittest
+import io
+import os
+import pickle
+import sys
+
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+from yaml.error import Mark
+from yaml.reader import Reader
+from yaml.scanner import Scanner
+from yaml.parser import Parser
+from yaml.composer import Composer
+from yaml.constructor import SafeEventConstructor
+from yaml.resolver import Resolver
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CONFIGS_DIR = os.path.join(DATA_DIR, 'configs')
+
+def collect_files():
+    paths = [os.path.join(CONFIGS_DIR, name) for name in sorted(os.listdir(CONFIGS_DIR))]
+    paths += [os.path.join(DATA_DIR, name) for name in sorted(os.listdir(DATA_DIR))
+            if name.endswith(('.yaml', '.yml'))]
+    return [path for path in paths if os.path.isfile(path)]
+
+def load_or_error(stream, Loader, load=yaml.load_all):
+    try:
+        return list(load(stream, Loader=Loader))
+    except yaml.YAMLError as exc:
+        return ('error', str(exc))
+
+def load_single(stream, Loader):
+    return [yaml.load(stream, Loader=Loader)]
+
+INVALID_DOCUMENTS = [
+    "a: b: c\n",
+    "a: [1, 2\n",
+    "- a\nb: c\n",
+    "{a: 1, b: *x}\n",
+    "x\n---\ny\n",
+    "\ufeffa:\n  b: 1\n c: 2\n",
+    "key: 'unterminated\n",
+    "first: line\r\nsecond: line\r\n  bad: indent\r\n",
+    "a: &x 1\nb: &x 2\n",
+    "? [a, b]\n: c\n",
+    "- !!binary 'not base64!'\n",
+]
+
+EVENT_DOCUMENTS = [
+    "a: 1\nb: [x, 2.5, null, true, 2001-12-14]\nc: {d: !!binary aGk=}\n",
+    "base: &b {x: 1, y: 2}\nderived:\n  <<: *b\n  y: 3\n  z: 4\n",
+    "- &a {a: 1, b: 1}\n- &b {b: 2, c: 2}\n- {c: 3, <<: [*a, *b], d: 3}\n",
+    "- {a: 1, <<: {a: 2, b: 2}, <<: {b: 3, c: 3}, a: 4, a: 5}\n",
+    "- &x [1, *x]\n- &y {self: *y}\n",
+    "list: &l [1, 2]\nsame: *l\n",
+    "=: value\n&k =: anchored\n",
+    "s: !!set {a, b}\no: !!omap [a: 1, b: 2]\np: !!pairs [a: 1, a: 2]\n",
+    "? !!str 1\n: !!int '2'\n? !!float '3'\n: !!str {=: x}\n",
+    "- !!map {a: 1}\n- !!seq [1]\n- !!str\n- !!null ''\n",
+]
+
+class EventLoader(Reader, Scanner, Parser, Composer, SafeEventConstructor, Resolver):
+
+    def __init__(self, stream):
+        Reader.__init__(self, stream)
+        Scanner.__init__(self)
+        Parser.__init__(self)
+        Composer.__init__(self)
+        SafeEventConstructor.__init__(self)
+        Resolver.__init__(self)
+
+class TestSafeEventConstructor(unittest.TestCase):
+
+    def test_documents_match_safe_loader(self):
+        for document in EVENT_DOCUMENTS:
+            for Loader in (EventLoader, yaml.FastSafeLoader):
+                self.assertEqual(repr(load_or_error(document, Loader)),
+                        repr(load_or_error(document, yaml.SafeLoader)), document)
+
+    def test_configs_match_safe_loader(self):
+        for path in collect_files():
+            with open(path, 'rb') as f:
+                data = f.read()
+            self.assertEqual(load_or_error(data, EventLoader),
+                    load_or_error(data, yaml.SafeLoader), path)
+
+    def test_error_messages_match_safe_loader(self):
+        for document in INVALID_DOCUMENTS + ["a: 1\n<<: 2\n", "<<: [{a: 1}, b]\n"]:
+            self.assertEqual(load_or_error(document, EventLoader, load_single),
+                    load_or_error(document, yaml.SafeLoader, load_single))
+
+    def test_aliases_keep_identity(self):
+        data = yaml.load("a: &x [1]\nb: *x\nc: &y {d: *x}\ne: [*y]\n",
+                Loader=EventLoader)
+        self.assertIs(data['a'], data['b'])
+        self.assertIs(data['c']['d'], data['a'])
+        self.assertIs(data['e'][0], data['c'])
+
+    def test_custom_constructors_are_used(self):
+        class CustomLoader(EventLoader):
+            pass
+        CustomLoader.add_constructor('tag:yaml.org,2002:int',
+                lambda loader, node: ('int', loader.construct_scalar(node)))
+        CustomLoader.add_constructor('!point',
+                lambda loader, node: tuple(loader.construct_sequence(node)))
+        data = yaml.load("a: 1\nb: !point [1, 2]\n", Loader=CustomLoader)
+        self.assertEqual(data, {'a': ('int', '1'), 'b': (('int', '1'), ('int', '2'))})
+
+    def test_path_resolvers_fall_back_to_nodes(self):
+        class PathLoader(EventLoader):
+            pass
+        PathLoader.add_path_resolver('!point', ['point'], dict)
+        PathLoader.add_constructor('!point',
+                lambda loader, node: 'point')
+        data = yaml.load("point: {x: 1}\nother: {x: 1}\n", Loader=PathLoader)
+        self.assertEqual(data, {'point': 'point', 'other': {'x': 1}})
+
+    def test_no_nodes_without_anchors(self):
+        created = []
+        def counting(original):
+            def init(self, *args, **kwds):
+                created.append(args)
+                original(self, *args, **kwds)
+            return init
+        loader = EventLoader("a: [1, 2.5]\nb: {c: d}\n")
+        originals = [(cls, cls.__init__) for cls in
+                (yaml.nodes.ScalarNode, yaml.nodes.CollectionNode)]
+        for cls, original in originals:
+            cls.__init__ = counting(original)
+        try:
+            data = loader.get_single_data()
+            self.assertEqual(created, [])
+            self.assertEqual(data, yaml.load("a: [1, 2.5]\nb: {c: d}\n",
+                    Loader=yaml.SafeLoader))
+            self.assertNotEqual(created, [])
+        finally:
+            for cls, original in originals:
+                cls.__init__ = original
+
+class TestFastSafeLoader(unittest.TestCase):
+
+    def test_configs_match_safe_loader(self):
+        for path in collect_files():
+            with open(path, 'rb') as f:
+                data = f.read()
+            self.assertEqual(load_or_error(data, yaml.FastSafeLoader),
+                    load_or_error(data, yaml.SafeLoader), path)
+
+    def test_error_messages_match_safe_loader(self):
+        for document in INVALID_DOCUMENTS:
+            expected = load_or_error(document, yaml.SafeLoader, load_single)
+            self.assertEqual(expected[0], 'error', document)
+            self.assertEqual(load_or_error(document, yaml.FastSafeLoader, load_single),
+                    expected)
+            data = document.encode('utf-8')
+            self.assertEqual(load_or_error(data, yaml.FastSafeLoader, load_single),
+                    load_or_error(data, yaml.SafeLoader, load_single))
+
+    def test_error_marks_are_built(self):
+        with self.assertRaises(yaml.MarkedYAMLError) as context:
+            yaml.load("a: 1\nb: [1, 2\n", Loader=yaml.FastSafeLoader)
+        mark = context.exception.problem_mark
+        self.assertIsInstance(mark, Mark)
+        self.assertEqual((mark.line, mark.column), (2, 0))
+        self.assertIsInstance(context.exception.context_mark, Mark)
+
+    def test_file_stream_keeps_name(self):
+        stream = io.StringIO("a: [1, 2\n")
+        stream.name = 'settings.yaml'
+        with self.assertRaises(yaml.MarkedYAMLError) as context:
+            yaml.load(stream, Loader=yaml.FastSafeLoader)
+        self.assertIn('in "settings.yaml", line 2, column 1', str(context.exception))
+
+    def test_no_marks_on_happy_path(self):
+        created = []
+        original = Mark.__init__
+        def counting_init(self, *args):
+            created.append(args)
+            original(self, *args)
+        Mark.__init__ = counting_init
+        try:
+            node = yaml.compose("a: [1, 2]\nb: {c: d}\n", Loader=yaml.FastSafeLoader)
+            yaml.load("- x\n- y: z\n", Loader=yaml.FastSafeLoader)
+        finally:
+            Mark.__init__ = original
+        self.assertEqual(created, [])
+        self.assertIsInstance(node.start_mark, int)
+
+class TestSlots(unittest.TestCase):
+
+    def test_objects_have_no_dict(self):
+        document = "a: &x [1, 2]\nb: {c: *x}\n"
+        objects = list(yaml.scan(document)) + list(yaml.parse(document))
+        node = yaml.compose(document)
+        objects += [node, node.start_mark] + [item for pair in node.value for item in pair]
+        for obj in objects:
+            self.assertFalse(hasattr(obj, '__dict__'), obj)
+
+    def test_nodes_and_errors_pickle(self):
+        node = yaml.compose("a: [1, 2]\nb: {c: d}\n")
+        self.assertEqual(repr(pickle.loads(pickle.dumps(node))), repr(node))
+        with self.assertRaises(yaml.MarkedYAMLError) as context:
+            yaml.safe_load("a: [1, 2\n")
+        exc = pickle.loads(pickle.dumps(context.exception))
+        self.assertEqual(str(exc), str(context.exception))
+
+if __name__ == '__main__':
+    unittest.main()
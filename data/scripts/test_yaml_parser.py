@@ -0,0 +1,146 @@
+import unittest
+import os
+import random
+import sys
+
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+from yaml.reader import Reader
+from yaml.scanner import Scanner
+from yaml.parser import Parser, TOKEN_IDS, OTHER_TOKEN, SCALAR_TOKEN
+from yaml_reference_parser import ReferenceParser
+
+CONFIGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'configs')
+
+class EventParser(Reader, Scanner, Parser):
+
+    def __init__(self, stream):
+        Reader.__init__(self, stream)
+        Scanner.__init__(self)
+        Parser.__init__(self)
+
+class ReferenceEventParser(Reader, Scanner, ReferenceParser):
+
+    def __init__(self, stream):
+        Reader.__init__(self, stream)
+        Scanner.__init__(self)
+        ReferenceParser.__init__(self)
+
+def mark_fields(mark):
+    if mark is None:
+        return None
+    return (mark.index, mark.line, mark.column)
+
+def event_fields(event):
+    fields = []
+    for cls in event.__class__.__mro__:
+        for key in cls.__dict__.get('__slots__', ()):
+            value = getattr(event, key)
+            fields.append((key, mark_fields(value) if key.endswith('_mark') else value))
+    return sorted(fields)
+
+def parse_result(parser_class, text):
+    # The events (with their marks) and the error the parser ends with.
+    parser = parser_class(text)
+    events = []
+    try:
+        while parser.check_event():
+            event = parser.get_event()
+            events.append((event.__class__.__name__, event_fields(event)))
+    except yaml.YAMLError as exc:
+        error = (exc.__class__.__name__, str(exc))
+    else:
+        error = None
+    return events, error
+
+SCALARS = ['a', 'b c', '1', '-2.5', '~', 'null', 'true', "'q'", '"d\\n"', 'x:y', '']
+PROPERTIES = ['', '', '', '&a ', '!t ', '!!str ', '&b !!int ', '!x &c ', '!e!t ']
+
+def generate_node(generator, depth, indent, flow):
+    kind = generator.random()
+    prefix = generator.choice(PROPERTIES)
+    if kind < 0.1:
+        return '*' + generator.choice('abc')
+    if depth > 3 or kind < 0.45:
+        return prefix + generator.choice(SCALARS)
+    count = generator.randint(0, 3)
+    if flow or kind < 0.6:
+        if generator.random() < 0.5:
+            items = [generate_node(generator, depth+1, indent, True) for k in range(count)]
+            return prefix + '[' + ', '.join(items) + ']'
+        items = [generate_node(generator, depth+1, indent, True) + ': '
+                + generate_node(generator, depth+1, indent, True) for k in range(count)]
+        if items and generator.random() < 0.3:
+            items[0] = '? ' + items[0]
+        return prefix + '{' + ', '.join(items) + '}'
+    space = ' ' * (indent + 2)
+    if kind < 0.75:
+        lines = ['- ' + generate_node(generator, depth+1, indent+2, False) for k in range(count+1)]
+    else:
+        lines = []
+        for k in range(count+1):
+            key = generator.choice(['k%d' % k, '? k%d\n%s' % (k, space), '"k%d"' % k])
+            lines.append(key + ': ' + generate_node(generator, depth+1, indent+2, False))
+            if generator.random() < 0.2:
+                # An indentless sequence
+                lines[-1] = key + ':\n' + space + '- 1\n' + space + '- 2'
+    return prefix + '\n' + space + ('\n' + space).join(lines)
+
+def generate_stream(generator):
+    documents = []
+    for k in range(generator.randint(1, 3)):
+        header = generator.choice(['', '---\n', '--- ', '%YAML 1.1\n---\n',
+                '%TAG !e! tag:example.com,2000:\n---\n'][bool(documents):])
+        documents.append(header + generate_node(generator, 0, -2, False).lstrip('\n') + '\n'
+                + generator.choice(['', '...\n']))
+    return ''.join(documents)
+
+def mutate(generator, text):
+    characters = list(text)
+    for k in range(generator.randint(1, 3)):
+        position = generator.randint(0, len(characters))
+        action = generator.random()
+        if action < 0.4 and position < len(characters):
+            del characters[position]
+        else:
+            characters.insert(position, generator.choice('-?:,[]{}&*!|>#\'" \n\tx'))
+    return ''.join(characters)
+
+class TestTableDrivenParser(unittest.TestCase):
+
+    def assertSameEvents(self, text):
+        self.assertEqual(parse_result(EventParser, text),
+                parse_result(ReferenceEventParser, text), text)
+
+    def test_differential_fuzz(self):
+        generator = random.Random(2018)
+        errors = 0
+        for attempt in range(1500):
+            text = generate_stream(generator)
+            if attempt % 2:
+                text = mutate(generator, text)
+            self.assertSameEvents(text)
+            errors += parse_result(EventParser, text)[1] is not None
+        # Both the happy path and the error paths are exercised
+        self.assertGreater(errors, 300)
+        self.assertLess(errors, 1200)
+
+    def test_config_files(self):
+        for name in sorted(os.listdir(CONFIGS_DIR)):
+            with open(os.path.join(CONFIGS_DIR, name), 'rb') as f:
+                self.assertSameEvents(f.read())
+
+    def test_token_ids(self):
+        class CustomScalarToken(yaml.ScalarToken):
+            pass
+        parser = EventParser('a')
+        parser.tokens[0] = CustomScalarToken('a', True, None, None)
+        self.assertEqual(parser.peek_token_id(), SCALAR_TOKEN)
+        self.assertEqual(TOKEN_IDS[CustomScalarToken], SCALAR_TOKEN)
+        parser.tokens[0] = yaml.Token(None, None)
+        self.assertEqual(parser.peek_token_id(), OTHER_TOKEN)
+
+if __name__ == '__main__':
+    unittest.main()
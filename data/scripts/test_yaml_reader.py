@@ -0,0 +1,154 @@
+import unittest
+import io
+import os
+import random
+import sys
+import tempfile
+
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+from yaml.reader import Reader, ReaderError
+
+CONFIGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'configs')
+
+class ChunkedReader(Reader):
+    # Never take the whole-file path, so every stream goes through update_raw
+    WHOLE_FILE_LIMIT = -1
+
+class CharByCharReader(Reader):
+    # The original per-character implementation of `forward`
+
+    def forward(self, length=1):
+        if self.pointer+length+1 >= len(self.buffer):
+            self.update(length+1)
+        while length:
+            ch = self.buffer[self.pointer]
+            self.pointer += 1
+            self.index += 1
+            if ch in '\n\x85\u2028\u2029'  \
+                    or (ch == '\r' and self.buffer[self.pointer] != '\n'):
+                self.line += 1
+                self.column = 0
+            elif ch != '\uFEFF':
+                self.column += 1
+            length -= 1
+
+def read_all(reader):
+    # Walk the reader one character at a time and record every position
+    positions = []
+    while True:
+        ch = reader.peek()
+        positions.append((ch, reader.index, reader.line, reader.column))
+        if ch == '\0':
+            return positions
+        reader.forward()
+
+class TestYamlReader(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.yaml')
+        os.close(fd)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def write(self, data):
+        with open(self.path, 'wb') as f:
+            f.write(data)
+
+    def test_regular_file_is_read_at_once(self):
+        self.write(b"key: value\nlist:\n  - item1\n  - item2\n")
+        with open(self.path, 'rb') as f:
+            reader = Reader(f)
+            self.assertTrue(reader.eof)
+            self.assertIsNone(reader.raw_buffer)
+            self.assertEqual(reader.encoding, 'utf-8')
+            self.assertEqual(reader.buffer, "key: value\nlist:\n  - item1\n  - item2\n\0")
+
+    def test_non_regular_stream_is_chunked(self):
+        stream = io.BytesIO(b"key: value\n")
+        reader = Reader(stream)
+        self.assertFalse(reader.is_whole_file(stream))
+        self.assertEqual(reader.prefix(3), 'key')
+
+    def test_whole_file_matches_chunked(self):
+        data = ("a: 1\r\nb: été\n" * 2000 + "c:  d\x85e\r").encode('utf-8')
+        self.write(data)
+        for mode in ('rb', 'r'):
+            with open(self.path, mode, newline='' if mode == 'r' else None) as f:
+                whole = read_all(Reader(f))
+            with open(self.path, mode, newline='' if mode == 'r' else None) as f:
+                chunked = read_all(ChunkedReader(f))
+            self.assertEqual(whole, chunked)
+
+    def test_utf16_file(self):
+        self.write("key: value\n".encode('utf-16'))
+        with open(self.path, 'rb') as f:
+            reader = Reader(f)
+            self.assertEqual(reader.encoding, 'utf-16-le')
+            self.assertEqual(reader.prefix(4), '\ufeffkey')
+
+    def test_non_printable_position(self):
+        self.write(b"key: value\n" * 1000 + b"bad: \x07\n")
+        for reader_class in (Reader, ChunkedReader):
+            with open(self.path, 'rb') as f:
+                with self.assertRaises(ReaderError) as context:
+                    read_all(reader_class(f))
+            self.assertEqual(context.exception.position, 11005)
+
+    def test_invalid_utf8_position(self):
+        self.write(b"key: value\n" * 1000 + b"bad: \xff\n")
+        for reader_class in (Reader, ChunkedReader):
+            with open(self.path, 'rb') as f:
+                with self.assertRaises(ReaderError) as context:
+                    read_all(reader_class(f))
+            self.assertEqual(context.exception.position, 11005)
+
+    def test_bulk_forward_matches_char_by_char(self):
+        alphabet = 'ab :-\n\r\x85\u2028\u2029\uFEFF'
+        generator = random.Random(2002)
+        for attempt in range(200):
+            data = ''.join(generator.choice(alphabet) for k in range(200))
+            steps = [generator.randint(0, 12) for k in range(60)]
+            for stream in (data, data.encode('utf-8')):
+                expected = CharByCharReader(stream)
+                reader = Reader(stream)
+                for length in steps:
+                    if reader.pointer+length >= len(reader.buffer)-1:
+                        break
+                    expected.forward(length)
+                    reader.forward(length)
+                    self.assertEqual(
+                            (reader.index, reader.line, reader.column),
+                            (expected.index, expected.line, expected.column),
+                            (data, steps))
+
+    def test_bulk_forward_chunked_stream(self):
+        data = ('key: value\r\n' * 500 + 'x\r') * 3
+        expected = CharByCharReader(io.StringIO(data))
+        reader = Reader(io.StringIO(data))
+        while reader.index+37 < len(data):
+            expected.forward(37)
+            reader.forward(37)
+            self.assertEqual((reader.index, reader.line, reader.column),
+                    (expected.index, expected.line, expected.column))
+
+    def test_load_configs(self):
+        for name in sorted(os.listdir(CONFIGS_DIR)):
+            if not name.endswith(('.yaml', '.yml')):
+                continue
+            path = os.path.join(CONFIGS_DIR, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            try:
+                expected = yaml.safe_load(data)
+            except yaml.YAMLError:
+                continue
+            with open(path, 'rb') as f:
+                self.assertEqual(yaml.safe_load(f), expected, name)
+
+if __name__ == '__main__':
+    unittest.main()
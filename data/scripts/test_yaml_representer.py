@@ -0,0 +1,77 @@
+import unittest
+import math
+import os
+import random
+import sys
+
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+
+class GenericSafeDumper(yaml.SafeDumper):
+    # Always go through the representer lookup and alias checks
+    yaml_primitive_representers = {}
+
+class GenericDumper(yaml.Dumper):
+    yaml_primitive_representers = {}
+
+def sample_values():
+    generator = random.Random(2013)
+    values = [None, True, False, 0, -1, 2**70, '', 'text', 'yes', '1.5', 'a: b',
+            0.0, -0.0, 0.1, 1.5, -2.25, 1e17, 1e-05, 1.5e300, 123456789.123,
+            float('inf'), float('-inf')]
+    values += [generator.uniform(-1e6, 1e6) for k in range(200)]
+    values += [generator.random() * 10 ** generator.randint(-30, 30) for k in range(200)]
+    return values
+
+class TestPrimitiveRepresenters(unittest.TestCase):
+
+    def test_output_matches_generic_path(self):
+        values = sample_values()
+        documents = [values, {'values': values, 'nested': [{'v': v, 1: v} for v in values[:30]]},
+                [(1, 2.5), {3, 'x'}, b'bytes', [None, [True, [1.0]]]]]
+        for document in documents:
+            for kwds in ({}, {'default_flow_style': None}, {'default_style': '"'}):
+                self.assertEqual(yaml.dump(document, Dumper=yaml.SafeDumper, **kwds),
+                        yaml.dump(document, Dumper=GenericSafeDumper, **kwds))
+                self.assertEqual(yaml.dump(document, Dumper=yaml.Dumper, **kwds),
+                        yaml.dump(document, Dumper=GenericDumper, **kwds))
+
+    def test_floats_round_trip(self):
+        for value in sample_values() + [float('nan')]:
+            text = yaml.dump(value, Dumper=yaml.SafeDumper)
+            self.assertTrue(text.startswith(yaml.dump(value, Dumper=GenericSafeDumper)))
+            loaded = yaml.safe_load(text)
+            if isinstance(value, float) and math.isnan(value):
+                self.assertTrue(math.isnan(loaded))
+            else:
+                self.assertEqual(loaded, value)
+        self.assertEqual(yaml.safe_dump([1e17, float('nan'), float('-inf')]),
+                '- 1.0e+17\n- .nan\n- -.inf\n')
+
+    def test_custom_representers_are_used(self):
+        class CustomDumper(yaml.SafeDumper):
+            pass
+        CustomDumper.add_representer(float,
+                lambda dumper, data: dumper.represent_scalar('!f', '%.1f' % data))
+        self.assertEqual(yaml.dump([1.25, 2, {'a': 3.5}], Dumper=CustomDumper),
+                "- !f '1.2'\n- 2\n- a: !f '3.5'\n")
+        self.assertEqual(yaml.dump([1.25], Dumper=yaml.SafeDumper), "- 1.25\n")
+
+    def test_aliases_can_be_disabled(self):
+        shared = {'unit': 'C'}
+        data = {'a': shared, 'b': shared}
+        self.assertIn('&id001', yaml.safe_dump(data))
+        self.assertEqual(yaml.safe_dump(data, aliases=False),
+                'a:\n  unit: C\nb:\n  unit: C\n')
+        self.assertEqual(yaml.dump(data, Dumper=yaml.Dumper, aliases=False),
+                'a:\n  unit: C\nb:\n  unit: C\n')
+        recursive = []
+        recursive.append(recursive)
+        self.assertEqual(yaml.safe_dump(recursive), '&id001\n- *id001\n')
+        with self.assertRaises(RecursionError):
+            yaml.safe_dump(recursive, aliases=False)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import os
+import re
+import sys
+
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+from yaml.nodes import ScalarNode
+from yaml.resolver import Resolver
+
+VALUES = ['', '~', 'null', 'Null', 'true', 'No', 'on', '0', '-1', '0x1F', '0o7',
+        '1_000', '190:20:30', '1.5', '-.inf', '.NaN', '6.8523015e+5', '2001-12-14',
+        '2001-12-14t21:59:43.10-05:00', '<<', '=', 'text', 'Yes please', '12 apples',
+        'true\n', '1\n']
+
+def reference_resolve(resolver, value):
+    # The resolution of plain scalars without any caching
+    resolvers = resolver.yaml_implicit_resolvers.get(value[:1], [])
+    for tag, regexp in resolvers + resolver.yaml_implicit_resolvers.get(None, []):
+        if regexp.match(value):
+            return tag
+    return resolver.DEFAULT_SCALAR_TAG
+
+def resolve(resolver_class, value):
+    return resolver_class().resolve(ScalarNode, value, (True, False))
+
+class TestImplicitResolution(unittest.TestCase):
+
+    def test_matches_reference(self):
+        resolver = Resolver()
+        for attempt in range(2):
+            for value in VALUES:
+                self.assertEqual(resolver.resolve(ScalarNode, value, (True, False)),
+                        reference_resolve(resolver, value), repr(value))
+
+    def test_non_implicit_values(self):
+        resolver = Resolver()
+        self.assertEqual(resolver.resolve(ScalarNode, '1', (False, True)),
+                'tag:yaml.org,2002:str')
+        self.assertEqual(resolver.resolve(ScalarNode, '1', (True, False)),
+                'tag:yaml.org,2002:int')
+
+    def test_add_implicit_resolver_invalidates_cache(self):
+        class FirstResolver(Resolver):
+            pass
+        class SecondResolver(FirstResolver):
+            pass
+        self.assertEqual(resolve(SecondResolver, 'maybe'), 'tag:yaml.org,2002:str')
+        FirstResolver.add_implicit_resolver('!maybe', re.compile(r'^maybe$'), ['m'])
+        self.assertEqual(resolve(FirstResolver, 'maybe'), '!maybe')
+        self.assertEqual(resolve(SecondResolver, 'maybe'), '!maybe')
+        self.assertEqual(resolve(Resolver, 'maybe'), 'tag:yaml.org,2002:str')
+        SecondResolver.add_implicit_resolver('!any', re.compile(r'^any$'), None)
+        self.assertEqual(resolve(SecondResolver, 'any'), '!any')
+        self.assertEqual(resolve(FirstResolver, 'any'), 'tag:yaml.org,2002:str')
+
+    def test_replaced_resolvers_are_used(self):
+        class NoBoolResolver(Resolver):
+            pass
+        self.assertEqual(resolve(NoBoolResolver, 'yes'), 'tag:yaml.org,2002:bool')
+        NoBoolResolver.yaml_implicit_resolvers = dict(
+                (ch, [(tag, regexp) for tag, regexp in resolvers
+                    if tag != 'tag:yaml.org,2002:bool'])
+                for ch, resolvers in Resolver.yaml_implicit_resolvers.items())
+        self.assertEqual(resolve(NoBoolResolver, 'yes'), 'tag:yaml.org,2002:str')
+        self.assertEqual(yaml.load('a: yes', Loader=yaml.SafeLoader), {'a': True})
+
+    def test_cache_is_bounded(self):
+        class SmallCacheResolver(Resolver):
+            IMPLICIT_CACHE_SIZE = 10
+            IMPLICIT_CACHE_VALUE_LENGTH = 5
+        SmallCacheResolver.add_implicit_resolver('!small', re.compile(r'^small$'), ['s'])
+        resolver = SmallCacheResolver()
+        for number in range(100):
+            self.assertEqual(resolver.resolve(ScalarNode, str(number), (True, False)),
+                    'tag:yaml.org,2002:int')
+        resolver.resolve(ScalarNode, 'a long value', (True, False))
+        cache = SmallCacheResolver.yaml_implicit_state[-1]
+        self.assertLessEqual(len(cache), 10)
+        self.assertNotIn('a long value', cache)
+
+    def test_dump_round_trip(self):
+        data = {'values': VALUES, 'numbers': [1, 1.5, None, True]}
+        self.assertEqual(yaml.safe_load(yaml.safe_dump(data)), data)
+
+if __name__ == '__main__':
+    unittest.main()
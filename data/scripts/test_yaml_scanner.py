@@ -0,0 +1,321 @@
+import unittest
+import io
+import os
+import sys
+
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+from yaml.scanner import ScannerError
+from yaml.tokens import ScalarToken
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+CONFIGS_DIR = os.path.join(DATA_DIR, 'configs')
+
+class ReferenceLoader(yaml.SafeLoader):
+    # The character-by-character scanning loops the scanner used before
+    # switching to regular expressions. Tokens must come out identical.
+
+    def scan_to_next_token(self):
+        if self.index == 0 and self.peek() == '\uFEFF':
+            self.forward()
+        found = False
+        while not found:
+            while self.peek() == ' ':
+                self.forward()
+            if self.peek() == '#':
+                while self.peek() not in '\0\r\n\x85\u2028\u2029':
+                    self.forward()
+            if self.scan_line_break():
+                if not self.flow_level:
+                    self.allow_simple_key = True
+            else:
+                found = True
+
+    def scan_block_scalar(self, style):
+        # See the specification for details.
+
+        if style == '>':
+            folded = True
+        else:
+            folded = False
+
+        chunks = []
+        start_mark = self.get_mark()
+
+        # Scan the header.
+        self.forward()
+        chomping, increment = self.scan_block_scalar_indicators(start_mark)
+        self.scan_block_scalar_ignored_line(start_mark)
+
+        # Determine the indentation level and go to the first non-empty line.
+        min_indent = self.indent+1
+        if min_indent < 1:
+            min_indent = 1
+        if increment is None:
+            breaks, max_indent, end_mark = self.scan_block_scalar_indentation()
+            indent = max(min_indent, max_indent)
+        else:
+            indent = min_indent+increment-1
+            breaks, end_mark = self.scan_block_scalar_breaks(indent)
+        line_break = ''
+
+        # Scan the inner part of the block scalar.
+        while self.column == indent and self.peek() != '\0':
+            chunks.extend(breaks)
+            leading_non_space = self.peek() not in ' \t'
+            length = 0
+            while self.peek(length) not in '\0\r\n\x85\u2028\u2029':
+                length += 1
+            chunks.append(self.prefix(length))
+            self.forward(length)
+            line_break = self.scan_line_break()
+            breaks, end_mark = self.scan_block_scalar_breaks(indent)
+            if self.column == indent and self.peek() != '\0':
+
+                # Unfortunately, folding rules are ambiguous.
+                #
+                # This is the folding according to the specification:
+
+                if folded and line_break == '\n'    \
+                        and leading_non_space and self.peek() not in ' \t':
+                    if not breaks:
+                        chunks.append(' ')
+                else:
+                    chunks.append(line_break)
+
+                # This is Clark Evans's interpretation (also in the spec
+                # examples):
+                #
+                #if folded and line_break == '\n':
+                #    if not breaks:
+                #        if self.peek() not in ' \t':
+                #            chunks.append(' ')
+                #        else:
+                #            chunks.append(line_break)
+                #else:
+                #    chunks.append(line_break)
+            else:
+                break
+
+        # Chomp the tail.
+        if chomping is not False:
+            chunks.append(line_break)
+        if chomping is True:
+            chunks.extend(breaks)
+
+        # We are done.
+        return ScalarToken(''.join(chunks), False, start_mark, end_mark,
+                style)
+
+    def scan_flow_scalar_non_spaces(self, double, start_mark):
+        # See the specification for details.
+        chunks = []
+        while True:
+            length = 0
+            while self.peek(length) not in '\'\"\\\0 \t\r\n\x85\u2028\u2029':
+                length += 1
+            if length:
+                chunks.append(self.prefix(length))
+                self.forward(length)
+            ch = self.peek()
+            if not double and ch == '\'' and self.peek(1) == '\'':
+                chunks.append('\'')
+                self.forward(2)
+            elif (double and ch == '\'') or (not double and ch in '\"\\'):
+                chunks.append(ch)
+                self.forward()
+            elif double and ch == '\\':
+                self.forward()
+                ch = self.peek()
+                if ch in self.ESCAPE_REPLACEMENTS:
+                    chunks.append(self.ESCAPE_REPLACEMENTS[ch])
+                    self.forward()
+                elif ch in self.ESCAPE_CODES:
+                    length = self.ESCAPE_CODES[ch]
+                    self.forward()
+                    for k in range(length):
+                        if self.peek(k) not in '0123456789ABCDEFabcdef':
+                            raise ScannerError("while scanning a double-quoted scalar", start_mark,
+                                    "expected escape sequence of %d hexadecimal numbers, but found %r" %
+                                        (length, self.peek(k)), self.get_mark())
+                    code = int(self.prefix(length), 16)
+                    chunks.append(chr(code))
+                    self.forward(length)
+                elif ch in '\r\n\x85\u2028\u2029':
+                    self.scan_line_break()
+                    chunks.extend(self.scan_flow_scalar_breaks(double, start_mark))
+                else:
+                    raise ScannerError("while scanning a double-quoted scalar", start_mark,
+                            "found unknown escape character %r" % ch, self.get_mark())
+            else:
+                return chunks
+
+    def scan_plain(self):
+        # See the specification for details.
+        # We add an additional restriction for the flow context:
+        #   plain scalars in the flow context cannot contain ',' or '?'.
+        # We also keep track of the `allow_simple_key` flag here.
+        # Indentation rules are loosed for the flow context.
+        chunks = []
+        start_mark = self.get_mark()
+        end_mark = start_mark
+        indent = self.indent+1
+        # We allow zero indentation for scalars, but then we need to check for
+        # document separators at the beginning of the line.
+        #if indent == 0:
+        #    indent = 1
+        spaces = []
+        while True:
+            length = 0
+            if self.peek() == '#':
+                break
+            while True:
+                ch = self.peek(length)
+                if ch in '\0 \t\r\n\x85\u2028\u2029'    \
+                        or (ch == ':' and
+                                self.peek(length+1) in '\0 \t\r\n\x85\u2028\u2029'
+                                      + (u',[]{}' if self.flow_level else u''))\
+                        or (self.flow_level and ch in ',?[]{}'):
+                    break
+                length += 1
+            if length == 0:
+                break
+            self.allow_simple_key = False
+            chunks.extend(spaces)
+            chunks.append(self.prefix(length))
+            self.forward(length)
+            end_mark = self.get_mark()
+            spaces = self.scan_plain_spaces(indent, start_mark)
+            if not spaces or self.peek() == '#' \
+                    or (not self.flow_level and self.column < indent):
+                break
+        return ScalarToken(''.join(chunks), True, start_mark, end_mark)
+
+    def scan_plain_spaces(self, indent, start_mark):
+        # See the specification for details.
+        # The specification is really confusing about tabs in plain scalars.
+        # We just forbid them completely. Do not use tabs in YAML!
+        chunks = []
+        length = 0
+        while self.peek(length) in ' ':
+            length += 1
+        whitespaces = self.prefix(length)
+        self.forward(length)
+        ch = self.peek()
+        if ch in '\r\n\x85\u2028\u2029':
+            line_break = self.scan_line_break()
+            self.allow_simple_key = True
+            prefix = self.prefix(3)
+            if (prefix == '---' or prefix == '...')   \
+                    and self.peek(3) in '\0 \t\r\n\x85\u2028\u2029':
+                return
+            breaks = []
+            while self.peek() in ' \r\n\x85\u2028\u2029':
+                if self.peek() == ' ':
+                    self.forward()
+                else:
+                    breaks.append(self.scan_line_break())
+                    prefix = self.prefix(3)
+                    if (prefix == '---' or prefix == '...')   \
+                            and self.peek(3) in '\0 \t\r\n\x85\u2028\u2029':
+                        return
+            if line_break != '\n':
+                chunks.append(line_break)
+            elif not breaks:
+                chunks.append(' ')
+            chunks.extend(breaks)
+        elif whitespaces:
+            chunks.append(whitespaces)
+        return chunks
+
+class ChunkedLoader(yaml.SafeLoader):
+    WHOLE_FILE_LIMIT = -1
+
+class ChunkedReferenceLoader(ReferenceLoader):
+    WHOLE_FILE_LIMIT = -1
+
+def dump_mark(mark):
+    if mark is None:
+        return None
+    return (mark.index, mark.line, mark.column)
+
+def scan_tokens(stream, Loader):
+    # Scan the stream to a list of comparable tuples; a scanner error ends
+    # the list with the error message.
+    tokens = []
+    try:
+        for token in yaml.scan(stream, Loader=Loader):
+            values = [(key, getattr(token, key)) for cls in token.__class__.__mro__
+                    for key in cls.__dict__.get('__slots__', ())
+                    if not key.endswith('_mark')]
+            tokens.append((token.__class__.__name__, sorted(values),
+                    dump_mark(token.start_mark), dump_mark(token.end_mark)))
+    except yaml.YAMLError as exc:
+        tokens.append(('error', str(exc)))
+    return tokens
+
+def collect_files():
+    paths = [os.path.join(CONFIGS_DIR, name) for name in sorted(os.listdir(CONFIGS_DIR))]
+    paths += [os.path.join(DATA_DIR, name) for name in sorted(os.listdir(DATA_DIR))
+            if name.endswith(('.yaml', '.yml'))]
+    return [path for path in paths if os.path.isfile(path)]
+
+SAMPLES = [
+    "plain: value with spaces and a: colon\nurl: http://example.com:8080/path\n",
+    "flow: {a: b, c: [d, e:f, 'g', \"h\"], ? i : j, k:, :l}\n",
+    "multi: this plain scalar\n  spans several\n\n  lines # comment\n",
+    "single: 'it''s\n  folded\n\n  text'\ndouble: \"esc \\t \\x41 \\u00e9\\\n  next\"\n",
+    "literal: |\n  line 1\n    indented\n\n  line 3\nfolded: >-\n  a\n  b\n\n  c\n",
+    "- item\r\n- 'windows'\r\n- \"line\rends\"\r\n- \u2028sep\x85arator\n",
+    "%YAML 1.1\n--- !!map\n&a key: *a\n... # end\n---\n- [a, b]: c\n",
+    "key: value:\n",
+    "bad: \"unterminated\n",
+    "bad: 'document\n---\n'",
+    "\ufeffbom: first\n",
+    "key: #not-a-comment-start\nother: a #comment\n",
+]
+
+class TestYamlScanner(unittest.TestCase):
+
+    def assert_same_tokens(self, expected, actual, name):
+        self.assertTrue(expected, name)
+        self.assertEqual(expected, actual, name)
+
+    def test_configs_match_reference(self):
+        for path in collect_files():
+            with open(path, 'rb') as f:
+                data = f.read()
+            expected = scan_tokens(data, ReferenceLoader)
+            self.assert_same_tokens(expected, scan_tokens(data, yaml.SafeLoader), path)
+            for reference, loader in [(ReferenceLoader, yaml.SafeLoader),
+                    (ChunkedReferenceLoader, ChunkedLoader)]:
+                with open(path, 'rb') as f:
+                    expected = scan_tokens(f, reference)
+                with open(path, 'rb') as f:
+                    self.assert_same_tokens(expected, scan_tokens(f, loader), path)
+
+    def test_samples_match_reference(self):
+        for sample in SAMPLES:
+            expected = scan_tokens(sample, ReferenceLoader)
+            self.assert_same_tokens(expected, scan_tokens(sample, yaml.SafeLoader), sample)
+
+    def test_runs_across_chunk_boundaries(self):
+        # Long runs are split by the 4096-byte reads of a chunked stream.
+        data = "plain: " + "x" * 5000 + ":y" * 100 + "\n"    \
+                + "quoted: \"" + "q" * 9000 + "\"\n"    \
+                + "flow: [" + "f" * 4090 + ":, g]\n"    \
+                + "block: |\n" + ("  " + "b" * 3000 + "\n") * 4
+        expected = scan_tokens(io.StringIO(data), ChunkedReferenceLoader)
+        actual = scan_tokens(io.StringIO(data), ChunkedLoader)
+        self.assert_same_tokens(expected, actual, 'chunked')
+        scalars = [token for token in yaml.scan(data) if isinstance(token, ScalarToken)]
+        self.assertEqual(scalars[1].value, "x" * 5000 + ":y" * 100)
+
+    def test_scanner_errors(self):
+        with self.assertRaises(ScannerError):
+            list(yaml.scan("bad: 'document\n---\n'"))
+
+if __name__ == '__main__':
+    unittest.main()
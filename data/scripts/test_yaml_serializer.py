@@ -0,0 +1,61 @@
+import unittest
+import os
+import sys
+
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+
+CONFIGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'configs')
+
+class NoAnchorPassDumper(yaml.SafeDumper):
+
+    def anchor_node(self, node):
+        raise AssertionError("anchor pass with aliases=False")
+
+def config_documents():
+    documents = []
+    for name in sorted(os.listdir(CONFIGS_DIR)):
+        with open(os.path.join(CONFIGS_DIR, name), 'rb') as f:
+            try:
+                documents.extend(yaml.safe_load_all(f))
+            except yaml.YAMLError:
+                pass
+    return documents
+
+class TestSerializerAliases(unittest.TestCase):
+
+    def test_output_matches_without_shared_nodes(self):
+        documents = [{'a': [1, 2.5, None], 'b': {'c': 'd'}}, [[], {}], 'text'] + config_documents()
+        for document in documents:
+            for kwds in ({}, {'default_flow_style': None}, {'canonical': True}):
+                self.assertEqual(yaml.dump(document, Dumper=NoAnchorPassDumper, aliases=False, **kwds),
+                        yaml.dump(document, Dumper=yaml.SafeDumper, aliases=False, **kwds))
+            node = yaml.SafeDumper(None).represent_data(document)
+            for kwds in ({}, {'canonical': True}):
+                self.assertEqual(yaml.serialize(node, Dumper=NoAnchorPassDumper, aliases=False, **kwds),
+                        yaml.serialize(node, Dumper=yaml.SafeDumper, **kwds))
+
+    def test_shared_nodes(self):
+        node = yaml.compose("a: &x [1, 2]\nb: *x\n")
+        self.assertEqual(yaml.serialize(node), "a: &id001 [1, 2]\nb: *id001\n")
+        self.assertEqual(yaml.serialize(node, aliases=False), "a: [1, 2]\nb: [1, 2]\n")
+        node = yaml.compose("&x [*x]\n")
+        self.assertEqual(yaml.serialize(node), "&id001 [*id001]\n")
+        with self.assertRaises(RecursionError):
+            yaml.serialize(node, aliases=False)
+
+    def test_no_anchor_bookkeeping(self):
+        dumper = yaml.SafeDumper(None, aliases=False)
+        self.assertEqual(dumper.use_aliases, False)
+        emitted = []
+        dumper.emit = emitted.append
+        dumper.open()
+        dumper.represent([{'a': 1}, {'a': 1}])
+        self.assertEqual(dumper.anchors, {})
+        self.assertEqual(dumper.serialized_nodes, {})
+        self.assertFalse(any(isinstance(event, yaml.AliasEvent) for event in emitted))
+
+if __name__ == '__main__':
+    unittest.main()
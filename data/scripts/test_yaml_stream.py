@@ -0,0 +1,208 @@
+import unittest
+import os
+import sys
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+import tracemalloc
+
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+from yaml.reader import Reader, ChunkedStream, DocumentSizeError
+
+CONFIGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'configs')
+
+# Size of the generated stream in the memory test. Set YAML_STREAM_TEST_BYTES
+# to run it on a much longer stream (e.g. 1073741824 for 1 GB).
+STREAM_BYTES = int(os.environ.get('YAML_STREAM_TEST_BYTES', 96*1024))
+MEMORY_CEILING = 48*1024
+
+LOG_DOCUMENT = ("---\nid: 'reading-%d'\nsensor: temperature\n"
+        "values: [21.5, 21.7, 22.0]\nmeta: {ok: true, unit: C}\n")
+
+def log_document(number):
+    return LOG_DOCUMENT % number
+
+class GeneratedStream:
+    # A file-like object producing `size` characters of `document(number)`
+
+    def __init__(self, size, document=log_document):
+        self.size = size
+        self.document = document
+        self.count = 0
+        self.pending = ''
+        self.consumed = 0
+
+    def read(self, size=-1):
+        while (size < 0 or len(self.pending) < size) and self.consumed+len(self.pending) < self.size:
+            self.pending += self.document(self.count)
+            self.count += 1
+        if size < 0:
+            size = len(self.pending)
+        data, self.pending = self.pending[:size], self.pending[size:]
+        self.consumed += len(data)
+        return data
+
+class TestStreamLoadAll(unittest.TestCase):
+
+    def test_memory_stays_flat(self):
+        stream = GeneratedStream(STREAM_BYTES)
+        count = 0
+        tracemalloc.start()
+        try:
+            for data in yaml.safe_stream_load_all(stream):
+                self.assertEqual(data['id'], 'reading-%d' % count)
+                count += 1
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(count, stream.count)
+        self.assertLess(peak, MEMORY_CEILING)
+
+    def test_regular_file_is_read_in_chunks(self):
+        fd, path = tempfile.mkstemp(suffix='.yaml')
+        os.close(fd)
+        try:
+            with open(path, 'w') as f:
+                f.write(''.join(LOG_DOCUMENT % number for number in range(50)))
+            with open(path, 'rb') as f:
+                self.assertFalse(Reader(ChunkedStream(f)).eof)
+            with open(path, 'rb') as f:
+                streamed = list(yaml.safe_stream_load_all(f))
+            with open(path, 'rb') as f:
+                self.assertEqual(streamed, list(yaml.safe_load_all(f)))
+        finally:
+            os.remove(path)
+
+    def test_matches_load_all(self):
+        documents = ["a: 1\n--- [1, 2]\n...\n--- &x {b: *x}\n", "", "--- \n...\n"]
+        for name in sorted(os.listdir(CONFIGS_DIR)):
+            with open(os.path.join(CONFIGS_DIR, name), 'rb') as f:
+                documents.append(f.read())
+        for document in documents:
+            try:
+                expected = repr(list(yaml.safe_load_all(document)))
+            except yaml.YAMLError:
+                continue
+            self.assertEqual(repr(list(yaml.safe_stream_load_all(document))), expected)
+            self.assertEqual(repr(list(yaml.stream_load_all(document, yaml.FullLoader))),
+                    repr(list(yaml.full_load_all(document))))
+
+    def test_anchors_do_not_leak(self):
+        with self.assertRaises(yaml.composer.ComposerError):
+            list(yaml.safe_stream_load_all("--- &a 1\n--- *a\n"))
+
+    def test_max_document_bytes(self):
+        small = "--- {a: 1}\n" * 20
+        large = "--- [" + "1, " * 20000 + "1]\n"
+        self.assertEqual(len(list(yaml.safe_stream_load_all(small, max_document_bytes=100))), 20)
+        for stream in (small + large,
+                GeneratedStream(len(small + large), lambda number: small + large)):
+            with self.assertRaises(DocumentSizeError) as context:
+                for data in yaml.safe_stream_load_all(stream, max_document_bytes=10000):
+                    self.assertEqual(data, {'a': 1})
+            self.assertIn("longer than 10000 characters", str(context.exception))
+        stream = GeneratedStream(10**9, lambda number: large)
+        with self.assertRaises(DocumentSizeError):
+            list(yaml.safe_stream_load_all(stream, max_document_bytes=1000))
+        self.assertLess(stream.consumed, 10000)
+
+class DiscardingStream:
+
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+def readings(count):
+    for number in range(count):
+        yield {'id': 'reading-%d' % number, 'sensor': 'temperature',
+                'values': [21.5, 21.7, 22.0], 'meta': {'ok': True, 'unit': 'C'}}
+
+class TestStreamDump(unittest.TestCase):
+
+    def test_matches_dump(self):
+        documents = [{'a': [1, 2.5, None, True, 'x: y', ''], 'b': {'c': {'d': []}, 'e': {}}},
+                [b'binary', {1, 2}, (3, 4), 1e17, float('inf')], 'text\nwith lines\n', None,
+                {'d': [date(2020, 1, 1), date(2020, 1, 2)], 'e': {'at': datetime(2020, 1, 1, 12)}},
+                [datetime(2020, 1, 1, 12, 30, 5, 250, tzinfo=timezone(timedelta(hours=2))), 1],
+                {date(2020, 1, 1): 'new year', date(2020, 12, 25): 'xmas'},
+                [[b'x', 1], [date(2020, 1, 1), b'y']]]
+        for name in sorted(os.listdir(CONFIGS_DIR)):
+            with open(os.path.join(CONFIGS_DIR, name), 'rb') as f:
+                try:
+                    documents.extend(yaml.safe_load_all(f))
+                except yaml.YAMLError:
+                    pass
+        for document in documents:
+            for kwds in ({}, {'default_flow_style': None}, {'default_flow_style': True},
+                    {'sort_keys': False, 'explicit_start': True, 'canonical': True}):
+                self.assertEqual(yaml.safe_stream_dump(document, **kwds),
+                        yaml.safe_dump(document, aliases=False, **kwds))
+        self.assertEqual(yaml.safe_stream_dump_all(documents, explicit_end=True),
+                yaml.safe_dump_all(documents, explicit_end=True, aliases=False))
+
+    def test_custom_scalar_representers_keep_flow_style(self):
+        def represent_date(dumper, data):
+            return dumper.represent_scalar('tag:yaml.org,2002:timestamp', data.isoformat(), style='"')
+        class QuotedDumper(yaml.SafeDumper):
+            pass
+        class QuotedStreamDumper(yaml.StreamSafeDumper):
+            pass
+        QuotedDumper.add_representer(date, represent_date)
+        QuotedStreamDumper.add_representer(date, represent_date)
+        data = {'d': [date(2020, 1, 1)], 'n': [1, 2]}
+        for default_flow_style in (None, False, True):
+            self.assertEqual(yaml.dump(data, Dumper=QuotedStreamDumper, default_flow_style=default_flow_style),
+                    yaml.dump(data, Dumper=QuotedDumper, default_flow_style=default_flow_style))
+        self.assertEqual(yaml.dump(data, Dumper=QuotedStreamDumper, default_flow_style=None),
+                'd:\n- !!timestamp "2020-01-01"\nn: [1, 2]\n')
+
+    def test_iterators_are_sequences(self):
+        data = {'squares': (n * n for n in range(3)), 'keys': iter(['a', 'b'])}
+        self.assertEqual(yaml.safe_stream_dump(data),
+                'keys:\n- a\n- b\nsquares:\n- 0\n- 1\n- 4\n')
+        self.assertEqual(yaml.safe_stream_dump_all(n for n in range(2)),
+                '0\n--- 1\n...\n')
+
+    def test_memory_stays_flat(self):
+        # Only the bounded emitter and resolver caches grow
+        peaks = []
+        for dump, data in ((yaml.safe_stream_dump, {'readings': readings(2000)}),
+                (yaml.safe_dump, {'readings': list(readings(2000))})):
+            stream = DiscardingStream()
+            tracemalloc.start()
+            try:
+                dump(data, stream)
+                peaks.append(tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+            self.assertGreater(stream.size, 2000 * 80)
+        self.assertLess(peaks[0], 1024*1024)
+        self.assertLess(peaks[0] * 5, peaks[1])
+
+    def test_repeated_and_recursive_objects(self):
+        shared = [1]
+        self.assertEqual(yaml.safe_stream_dump([shared, shared]), '- - 1\n- - 1\n')
+        recursive = {}
+        recursive['self'] = recursive
+        with self.assertRaises(yaml.representer.RepresenterError):
+            yaml.safe_stream_dump(recursive)
+
+    def test_custom_representers(self):
+        class Point:
+            def __init__(self, x, y):
+                self.x, self.y = x, y
+        class PointDumper(yaml.StreamSafeDumper):
+            pass
+        PointDumper.add_representer(Point, lambda dumper, point:
+                dumper.represent_mapping('!point', {'x': point.x, 'y': point.y}))
+        self.assertEqual(yaml.dump([Point(1, 2)], Dumper=PointDumper),
+                "- !point\n  x: 1\n  y: 2\n")
+        with self.assertRaises(yaml.representer.RepresenterError):
+            yaml.safe_stream_dump(Point(1, 2))
+
+if __name__ == '__main__':
+    unittest.main()
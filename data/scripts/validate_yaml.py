@@ -1,26 +1,25 @@
-import yaml
 import sys
 import os
 
-def validate_yaml_file(filepath):
+from validation_cache import open_cache
+from validation_engine import validate_file
+
+def validate_yaml_file(filepath, cache=None):
     """
     Validates a YAML file for correct syntax.
+    Returns False on failure instead of exiting.
+    Unchanged files are answered from `cache` if one is given.
     """
     if not os.path.exists(filepath):
         print(f"Error: File not found at {filepath}", file=sys.stderr)
-        sys.exit(1)
-        
-    try:
-        with open(filepath, 'r') as file:
-            yaml.safe_load(file)
-        print(f"Success: {filepath} is a valid YAML file.")
-        return True
-    except yaml.YAMLError as e:
-        print(f"Error: Invalid YAML syntax in {filepath}: {e}", file=sys.stderr)
-        sys.exit(1)
-    except Exception as e:
-        print(f"An unexpected error occurred while processing {filepath}: {e}", file=sys.stderr)
-        sys.exit(1)
+        return False
+
+    result = validate_file(filepath, 'yaml', cache)
+    if not result['valid']:
+        print(f"Error: Invalid YAML syntax in {filepath}: {result['error']}", file=sys.stderr)
+        return False
+    print(f"Success: {filepath} is a valid YAML file.")
+    return True
 
 if __name__ == "__main__":
     if len(sys.argv) != 2:
@@ -28,4 +27,10 @@ if __name__ == "__main__":
         sys.exit(1)
     
     yaml_file_path = sys.argv[1]
-    validate_yaml_file(yaml_file_path)
+    cache = open_cache()
+    try:
+        valid = validate_yaml_file(yaml_file_path, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    sys.exit(0 if valid else 1)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Validation Cache for GAA System
+Remembers validation verdicts in SQLite so unchanged files are answered
+without parsing them again.
+
+An entry is keyed by path and format and stores the size, mtime and SHA-256
+of the content that was validated together with the verdict and the error
+location. A file with the same size and mtime is a hit without reading it;
+a file with the same size but a new mtime is a hit if its hash still
+matches (and the mtime is refreshed); anything else is validated again.
+The hit and miss counts are added to a stats table when results are
+stored and when the cache is closed, so `stats` reports them across runs.
+
+CLI use:
+    python validation_cache.py stats
+    python validation_cache.py invalidate [path ...]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Tuple
+
+DEFAULT_DB_PATH = "./data/gaa.db"
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of the file content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def open_cache(db_path: str = DEFAULT_DB_PATH) -> Optional['ValidationCache']:
+    """Open the cache, or return None if the database is not usable"""
+    try:
+        return ValidationCache(db_path)
+    except sqlite3.Error:
+        return None
+
+
+class ValidationCache:
+    """Persistent cache of validation results keyed by file content"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        # Part of the counts above already added to the stats table
+        self.saved_hits = 0
+        self.saved_misses = 0
+        # Fingerprints of files looked up but not stored yet
+        self.pending: Dict[Tuple[str, str], Tuple[int, int, str]] = {}
+        self.conn = sqlite3.connect(self.db_path)
+        self._init_database()
+
+    def _init_database(self):
+        """Initialize validation cache table"""
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS validation_cache (
+                path TEXT,
+                format TEXT,
+                size INTEGER,
+                mtime_ns INTEGER,
+                content_hash TEXT,
+                valid INTEGER,
+                error TEXT,
+                line INTEGER,
+                column INTEGER,
+                validated_at TEXT,
+                PRIMARY KEY (path, format)
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS validation_cache_stats (
+                hits INTEGER,
+                misses INTEGER
+            )
+        ''')
+        self.conn.execute(
+            'INSERT INTO validation_cache_stats SELECT 0, 0 '
+            'WHERE NOT EXISTS (SELECT 1 FROM validation_cache_stats)')
+        self.conn.commit()
+
+    def close(self):
+        self.save_stats()
+        self.conn.close()
+
+    def save_stats(self):
+        """Add the lookups counted since the last save to the stats table"""
+        if self.hits != self.saved_hits or self.misses != self.saved_misses:
+            with self.conn:
+                self._add_stats()
+
+    def _add_stats(self):
+        # Runs inside the caller's transaction
+        self.conn.execute(
+            'UPDATE validation_cache_stats SET hits = hits + ?, misses = misses + ?',
+            (self.hits - self.saved_hits, self.misses - self.saved_misses))
+        self.saved_hits = self.hits
+        self.saved_misses = self.misses
+
+    def get(self, path: str, kind: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for an unchanged file, or None"""
+        key = (path, kind)
+        db_key = (os.path.abspath(path), kind)
+        try:
+            status = os.stat(path)
+        except OSError:
+            # Missing files are always validated (and reported) again
+            self.pending.pop(key, None)
+            self.misses += 1
+            return None
+        row = self.conn.execute(
+            'SELECT size, mtime_ns, content_hash, valid, error, line, column '
+            'FROM validation_cache WHERE path = ? AND format = ?', db_key).fetchone()
+        if row is not None and row[0] == status.st_size and row[1] == status.st_mtime_ns:
+            self.hits += 1
+            return self._make_result(path, kind, row)
+        try:
+            content_hash = file_hash(path)
+        except OSError:
+            self.pending.pop(key, None)
+            self.misses += 1
+            return None
+        if row is not None and row[0] == status.st_size and row[2] == content_hash:
+            # Touched but unchanged
+            with self.conn:
+                self.conn.execute(
+                    'UPDATE validation_cache SET mtime_ns = ? WHERE path = ? AND format = ?',
+                    (status.st_mtime_ns,) + db_key)
+            self.hits += 1
+            return self._make_result(path, kind, row)
+        self.pending[key] = (status.st_size, status.st_mtime_ns, content_hash)
+        self.misses += 1
+        return None
+
+    def put(self, result: Dict[str, Any]):
+        """Store a result for a file previously looked up with `get`"""
+        fingerprint = self.pending.pop((result['path'], result['format']), None)
+        if fingerprint is None:
+            return
+        size, mtime_ns, content_hash = fingerprint
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO validation_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (os.path.abspath(result['path']), result['format'], size, mtime_ns, content_hash,
+                 int(result['valid']), result['error'], result['line'], result['column'],
+                 datetime.now().isoformat()))
+            self._add_stats()
+
+    def _make_result(self, path: str, kind: str, row: tuple) -> Dict[str, Any]:
+        return {
+            'path': path,
+            'format': kind,
+            'valid': bool(row[3]),
+            'error': row[4],
+            'line': row[5],
+            'column': row[6],
+        }
+
+    def invalidate(self, paths: Optional[List[str]] = None) -> int:
+        """Drop the entries of the given paths (all entries if None)"""
+        with self.conn:
+            if paths is None:
+                cursor = self.conn.execute('DELETE FROM validation_cache')
+            else:
+                cursor = self.conn.executemany(
+                    'DELETE FROM validation_cache WHERE path = ?',
+                    [(os.path.abspath(path),) for path in paths])
+        return cursor.rowcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        entries, valid = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(valid), 0) FROM validation_cache').fetchone()
+        hits, misses = self.conn.execute(
+            'SELECT hits, misses FROM validation_cache_stats').fetchone()
+        hits += self.hits - self.saved_hits
+        misses += self.misses - self.saved_misses
+        total_requests = hits + misses
+        hit_rate = hits / total_requests if total_requests > 0 else 0
+
+        return {
+            'db_path': self.db_path,
+            'entries': entries,
+            'valid_entries': valid,
+            'invalid_entries': entries - valid,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hit_rate
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect or invalidate the validation cache')
+    parser.add_argument('--db', type=str, default=DEFAULT_DB_PATH, help='SQLite database path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('stats', help='Print cache statistics as JSON')
+    invalidate_parser = subparsers.add_parser('invalidate', help='Drop cached verdicts')
+    invalidate_parser.add_argument('paths', nargs='*', help='Paths to drop (default: all)')
+    args = parser.parse_args(argv)
+
+    cache = ValidationCache(args.db)
+    try:
+        if args.command == 'stats':
+            print(json.dumps(cache.get_stats(), indent=2))
+        else:
+            removed = cache.invalidate(args.paths or None)
+            print(f"Removed {removed} cached verdict(s) from {args.db}")
+    finally:
+        cache.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
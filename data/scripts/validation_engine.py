@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Validation engine for YAML and JSON files.
+
+Expands files, directories and glob patterns, validates the files over a
+process pool and streams one result per file. A broken file (or a crashed
+worker) is reported as a result and never stops the rest of the batch.
+
+Library use:
+    for result in validate_paths(['data/configs', 'output/*.json']):
+        print(result['path'], result['valid'])
+
+CLI use (one JSON object per line, exit status 1 if any file is invalid):
+    python validation_engine.py data/configs 'artifacts/**/*.yaml' --workers 4
+
+With a ValidationCache (`cache=` or `--cache [DB]`), unchanged files are
+answered from the cache without being parsed.
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Use the bundled yaml package from the data directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yaml
+import yaml.fast
+from validation_cache import DEFAULT_DB_PATH, ValidationCache
+
+YAML_EXTENSIONS = ('.yaml', '.yml')
+JSON_EXTENSIONS = ('.json',)
+
+# Files handed to a worker at a time
+BATCH_SIZE = 16
+
+def file_format(path):
+    """Returns 'json' for JSON files and 'yaml' for anything else."""
+    if path.lower().endswith(JSON_EXTENSIONS):
+        return 'json'
+    return 'yaml'
+
+def collect_paths(targets):
+    """
+    Expands files, directories (recursively) and glob patterns into a
+    sorted list of files. Directories and patterns contribute only YAML and
+    JSON files; explicitly named files are always kept, even if missing, so
+    they are reported.
+    """
+    paths = []
+    for target in targets:
+        if os.path.isdir(target):
+            for root, dirs, files in os.walk(target):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(YAML_EXTENSIONS + JSON_EXTENSIONS):
+                        paths.append(os.path.join(root, name))
+        elif glob.has_magic(target):
+            for path in sorted(glob.glob(target, recursive=True)):
+                if os.path.isfile(path) and path.lower().endswith(YAML_EXTENSIONS + JSON_EXTENSIONS):
+                    paths.append(path)
+        else:
+            paths.append(target)
+    unique = []
+    seen = set()
+    for path in paths:
+        if path not in seen:
+            seen.add(path)
+            unique.append(path)
+    return unique
+
+def make_result(path, kind, error=None, line=None, column=None):
+    return {
+        'path': path,
+        'format': kind,
+        'valid': error is None,
+        'error': error,
+        'line': line,
+        'column': column,
+    }
+
+def validate_file(path, kind=None, cache=None):
+    """
+    Validates a single YAML (all documents) or JSON file and returns its
+    result. `kind` ('yaml' or 'json') overrides the format implied by the
+    file name. Never raises for problems with the file itself.
+    """
+    if kind is None:
+        kind = file_format(path)
+    if cache is None:
+        return check_file(path, kind)
+    result = cache.get(path, kind)
+    if result is None:
+        result = check_file(path, kind)
+        cache.put(result)
+    return result
+
+def check_file(path, kind):
+    try:
+        if kind == 'json':
+            with open(path, 'r') as f:
+                json.load(f)
+        else:
+            with open(path, 'rb') as f:
+                for _ in yaml.fast.load_all(f):
+                    pass
+    except json.JSONDecodeError as e:
+        return make_result(path, kind, str(e), e.lineno, e.colno)
+    except yaml.MarkedYAMLError as e:
+        mark = e.problem_mark or e.context_mark
+        if mark is None:
+            return make_result(path, kind, str(e))
+        return make_result(path, kind, str(e), mark.line+1, mark.column+1)
+    except (yaml.YAMLError, OSError, UnicodeDecodeError, ValueError, RecursionError) as e:
+        return make_result(path, kind, f"{e.__class__.__name__}: {e}")
+    return make_result(path, kind)
+
+def validate_batch(paths):
+    return [validate_file(path) for path in paths]
+
+def validate_paths(targets, workers=None, cache=None):
+    """
+    Validates every file found in `targets` and yields the results in the
+    order of the files. With `workers` > 1 (default: the number of CPUs)
+    the files are validated by a process pool.
+    """
+    paths = collect_paths(targets)
+    if cache is None:
+        for result in validate_each(paths, workers):
+            yield result
+        return
+    cached = {}
+    for path in paths:
+        result = cache.get(path, file_format(path))
+        if result is not None:
+            cached[path] = result
+    results = validate_each([path for path in paths if path not in cached], workers)
+    for path in paths:
+        if path in cached:
+            yield cached[path]
+        else:
+            result = next(results)
+            cache.put(result)
+            yield result
+
+def validate_each(paths, workers=None):
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(paths) <= BATCH_SIZE:
+        for path in paths:
+            yield validate_file(path)
+        return
+    batches = [paths[start:start+BATCH_SIZE] for start in range(0, len(paths), BATCH_SIZE)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(validate_batch, batch) for batch in batches]
+        for batch, future in zip(batches, futures):
+            try:
+                results = future.result()
+            except Exception as e:
+                results = [make_result(path, file_format(path), f"worker failed: {e.__class__.__name__}: {e}")
+                        for path in batch]
+            for result in results:
+                yield result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate YAML and JSON files in parallel')
+    parser.add_argument('targets', nargs='+', help='Files, directories or glob patterns')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: number of CPUs)')
+    parser.add_argument('--output', type=str, default=None, help='Write JSON lines here instead of stdout')
+    parser.add_argument('--cache', type=str, nargs='?', const=DEFAULT_DB_PATH, default=None,
+                        help=f'Reuse verdicts of unchanged files from this SQLite database (default: {DEFAULT_DB_PATH})')
+    args = parser.parse_args(argv)
+
+    cache = ValidationCache(args.cache) if args.cache else None
+    output = open(args.output, 'w') if args.output else sys.stdout
+    all_valid = True
+    try:
+        for result in validate_paths(args.targets, args.workers, cache):
+            all_valid = all_valid and result['valid']
+            output.write(json.dumps(result) + '\n')
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if cache is not None:
+            cache.close()
+    return 0 if all_valid else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
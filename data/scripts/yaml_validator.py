@@ -1,15 +1,14 @@
-import yaml
 import sys
 
+from validation_engine import validate_file
+
 def validate_yaml(filename):
-  try:
-    with open(filename, 'r') as f:
-      yaml.safe_load(f)
-    print(f"{filename}: OK")
-    return True
-  except yaml.YAMLError as e:
-    print(f"{filename}: ERROR - {e}")
+  result = validate_file(filename, 'yaml')
+  if not result['valid']:
+    print(f"{filename}: ERROR - {result['error']}")
     return False
+  print(f"{filename}: OK")
+  return True
 
 if __name__ == "__main__":
   if len(sys.argv) > 1:
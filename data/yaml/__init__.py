@@ -6,17 +6,64 @@ from .events import *
 from .nodes import *
 
 from .loader import *
-from .dumper import *
+from .reader import ChunkedStream, DocumentSizeError
 
 __version__ = '6.0.2'
-try:
-    from .cyaml import *
-    __with_libyaml__ = True
-except ImportError:
-    __with_libyaml__ = False
 
 import io
 
+#------------------------------------------------------------------------------
+# The dumpers and the libyaml bindings are not needed to load documents, so
+# they are imported the first time one of their names is looked up.
+#------------------------------------------------------------------------------
+LAZY_MODULES = ['emitter', 'serializer', 'representer', 'dumper', 'cyaml', 'fast', 'incremental']
+DUMPER_NAMES = ['BaseDumper', 'SafeDumper', 'StreamSafeDumper', 'Dumper']
+CYAML_NAMES = [
+    'CBaseLoader', 'CSafeLoader', 'CFullLoader', 'CUnsafeLoader', 'CLoader',
+    'CBaseDumper', 'CSafeDumper', 'CDumper'
+]
+INTERNAL_NAMES = ['LAZY_MODULES', 'DUMPER_NAMES', 'CYAML_NAMES', 'INTERNAL_NAMES']
+
+def __getattr__(name):
+    if name == '__all__':
+        # Star imports export the public names, the dumpers included, as they
+        # did when everything was imported eagerly. Only they need `__all__`.
+        value = [key for key in globals() if not key.startswith('_')
+                and key not in LAZY_MODULES and key not in INTERNAL_NAMES]
+        value += ['emitter', 'serializer', 'representer', 'dumper'] + DUMPER_NAMES
+        if __getattr__('__with_libyaml__'):
+            value += ['cyaml'] + CYAML_NAMES
+        globals()['__all__'] = value
+        return value
+    if name in LAZY_MODULES:
+        import importlib
+        try:
+            return importlib.import_module('.'+name, __name__)
+        except ImportError:
+            raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    if name in DUMPER_NAMES:
+        from . import dumper
+        value = getattr(dumper, name)
+    elif name in CYAML_NAMES or name == '__with_libyaml__':
+        try:
+            from . import cyaml
+        except ImportError:
+            cyaml = None
+        globals()['__with_libyaml__'] = cyaml is not None
+        if name == '__with_libyaml__':
+            return cyaml is not None
+        if cyaml is None:
+            raise AttributeError("module %r has no attribute %r" % (__name__, name))
+        value = getattr(cyaml, name)
+    else:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(LAZY_MODULES) | set(DUMPER_NAMES)
+            | set(CYAML_NAMES) | {'__with_libyaml__'})
+
 #------------------------------------------------------------------------------
 # XXX "Warnings control" is now deprecated. Leaving in the API function to not
 # break code that uses it.
@@ -94,6 +141,38 @@ def load_all(stream, Loader):
     finally:
         loader.dispose()
 
+def stream_load_all(stream, Loader, max_document_bytes=None):
+    """
+    Parse all YAML documents in a stream
+    and produce corresponding Python objects,
+    keeping memory flat however many documents
+    the stream holds.
+
+    File-like streams are always read in chunks, and
+    the anchors, objects and input of a document are
+    released before the next one is parsed. Drop each
+    document once it is processed. FastSafeLoader reads
+    the whole stream at once and is not suitable here.
+
+    If max_document_bytes is given, DocumentSizeError
+    is raised for a document that is longer than that
+    many characters.
+    """
+    if not isinstance(stream, (str, bytes)):
+        stream = ChunkedStream(stream)
+    loader = Loader(stream)
+    loader.document_limit = max_document_bytes
+    try:
+        while loader.check_data():
+            data = loader.get_data()
+            if max_document_bytes is not None:
+                loader.check_document_size()
+            loader.document_start = loader.index
+            yield data
+            data = None
+    finally:
+        loader.dispose()
+
 def full_load(stream):
     """
     Parse the first YAML document in a stream
@@ -134,6 +213,17 @@ def safe_load_all(stream):
     """
     return load_all(stream, SafeLoader)
 
+def safe_stream_load_all(stream, max_document_bytes=None):
+    """
+    Parse all YAML documents in a stream
+    and produce corresponding Python objects
+    in constant memory (see stream_load_all).
+
+    Resolve only basic YAML tags. This is known
+    to be safe for untrusted input.
+    """
+    return stream_load_all(stream, SafeLoader, max_document_bytes)
+
 def unsafe_load(stream):
     """
     Parse the first YAML document in a stream
@@ -154,13 +244,15 @@ def unsafe_load_all(stream):
     """
     return load_all(stream, UnsafeLoader)
 
-def emit(events, stream=None, Dumper=Dumper,
+def emit(events, stream=None, Dumper=None,
         canonical=None, indent=None, width=None,
         allow_unicode=None, line_break=None):
     """
     Emit YAML parsing events into a stream.
     If stream is None, return the produced string instead.
     """
+    if Dumper is None:
+        from .dumper import Dumper
     getvalue = None
     if stream is None:
         stream = io.StringIO()
@@ -175,15 +267,19 @@ def emit(events, stream=None, Dumper=Dumper,
     if getvalue:
         return getvalue()
 
-def serialize_all(nodes, stream=None, Dumper=Dumper,
+def serialize_all(nodes, stream=None, Dumper=None,
         canonical=None, indent=None, width=None,
         allow_unicode=None, line_break=None,
         encoding=None, explicit_start=None, explicit_end=None,
-        version=None, tags=None):
+        version=None, tags=None, aliases=True):
     """
     Serialize a sequence of representation trees into a YAML stream.
     If stream is None, return the produced string instead.
+    With aliases=False, the anchor pass is skipped and shared nodes are
+    serialized every time, which is faster for trees known to be acyclic.
     """
+    if Dumper is None:
+        from .dumper import Dumper
     getvalue = None
     if stream is None:
         if encoding is None:
@@ -194,7 +290,8 @@ def serialize_all(nodes, stream=None, Dumper=Dumper,
     dumper = Dumper(stream, canonical=canonical, indent=indent, width=width,
             allow_unicode=allow_unicode, line_break=line_break,
             encoding=encoding, version=version, tags=tags,
-            explicit_start=explicit_start, explicit_end=explicit_end)
+            explicit_start=explicit_start, explicit_end=explicit_end,
+            aliases=aliases)
     try:
         dumper.open()
         for node in nodes:
@@ -205,23 +302,28 @@ def serialize_all(nodes, stream=None, Dumper=Dumper,
     if getvalue:
         return getvalue()
 
-def serialize(node, stream=None, Dumper=Dumper, **kwds):
+def serialize(node, stream=None, Dumper=None, **kwds):
     """
     Serialize a representation tree into a YAML stream.
     If stream is None, return the produced string instead.
     """
     return serialize_all([node], stream, Dumper=Dumper, **kwds)
 
-def dump_all(documents, stream=None, Dumper=Dumper,
+def dump_all(documents, stream=None, Dumper=None,
         default_style=None, default_flow_style=False,
         canonical=None, indent=None, width=None,
         allow_unicode=None, line_break=None,
         encoding=None, explicit_start=None, explicit_end=None,
-        version=None, tags=None, sort_keys=True):
+        version=None, tags=None, sort_keys=True, aliases=True):
     """
     Serialize a sequence of Python objects into a YAML stream.
     If stream is None, return the produced string instead.
+    With aliases=False, repeated objects are neither detected nor anchored
+    (and recursive objects cannot be dumped), which is faster for trees
+    known to be acyclic.
     """
+    if Dumper is None:
+        from .dumper import Dumper
     getvalue = None
     if stream is None:
         if encoding is None:
@@ -234,7 +336,8 @@ def dump_all(documents, stream=None, Dumper=Dumper,
             canonical=canonical, indent=indent, width=width,
             allow_unicode=allow_unicode, line_break=line_break,
             encoding=encoding, version=version, tags=tags,
-            explicit_start=explicit_start, explicit_end=explicit_end, sort_keys=sort_keys)
+            explicit_start=explicit_start, explicit_end=explicit_end, sort_keys=sort_keys,
+            aliases=aliases)
     try:
         dumper.open()
         for data in documents:
@@ -245,7 +348,7 @@ def dump_all(documents, stream=None, Dumper=Dumper,
     if getvalue:
         return getvalue()
 
-def dump(data, stream=None, Dumper=Dumper, **kwds):
+def dump(data, stream=None, Dumper=None, **kwds):
     """
     Serialize a Python object into a YAML stream.
     If stream is None, return the produced string instead.
@@ -258,6 +361,7 @@ def safe_dump_all(documents, stream=None, **kwds):
     Produce only basic YAML tags.
     If stream is None, return the produced string instead.
     """
+    from .dumper import SafeDumper
     return dump_all(documents, stream, Dumper=SafeDumper, **kwds)
 
 def safe_dump(data, stream=None, **kwds):
@@ -266,10 +370,30 @@ def safe_dump(data, stream=None, **kwds):
     Produce only basic YAML tags.
     If stream is None, return the produced string instead.
     """
+    from .dumper import SafeDumper
     return dump_all([data], stream, Dumper=SafeDumper, **kwds)
 
+def safe_stream_dump_all(documents, stream=None, **kwds):
+    """
+    Serialize a sequence of Python objects into a YAML stream as they are
+    walked, without building a node graph. Iterators and generators are
+    dumped as sequences. Produce only basic YAML tags and no aliases.
+    If stream is None, return the produced string instead.
+    """
+    from .dumper import StreamSafeDumper
+    return dump_all(documents, stream, Dumper=StreamSafeDumper, **kwds)
+
+def safe_stream_dump(data, stream=None, **kwds):
+    """
+    Serialize a Python object into a YAML stream as it is walked.
+    Produce only basic YAML tags and no aliases.
+    If stream is None, return the produced string instead.
+    """
+    from .dumper import StreamSafeDumper
+    return dump_all([data], stream, Dumper=StreamSafeDumper, **kwds)
+
 def add_implicit_resolver(tag, regexp, first=None,
-        Loader=None, Dumper=Dumper):
+        Loader=None, Dumper=None):
     """
     Add an implicit scalar detector.
     If an implicit scalar value matches the given regexp,
@@ -282,9 +406,11 @@ def add_implicit_resolver(tag, regexp, first=None,
         loader.UnsafeLoader.add_implicit_resolver(tag, regexp, first)
     else:
         Loader.add_implicit_resolver(tag, regexp, first)
+    if Dumper is None:
+        from .dumper import Dumper
     Dumper.add_implicit_resolver(tag, regexp, first)
 
-def add_path_resolver(tag, path, kind=None, Loader=None, Dumper=Dumper):
+def add_path_resolver(tag, path, kind=None, Loader=None, Dumper=None):
     """
     Add a path based resolver for the given tag.
     A path is a list of keys that forms a path
@@ -297,6 +423,8 @@ def add_path_resolver(tag, path, kind=None, Loader=None, Dumper=Dumper):
         loader.UnsafeLoader.add_path_resolver(tag, path, kind)
     else:
         Loader.add_path_resolver(tag, path, kind)
+    if Dumper is None:
+        from .dumper import Dumper
     Dumper.add_path_resolver(tag, path, kind)
 
 def add_constructor(tag, constructor, Loader=None):
@@ -326,24 +454,36 @@ def add_multi_constructor(tag_prefix, multi_constructor, Loader=None):
     else:
         Loader.add_multi_constructor(tag_prefix, multi_constructor)
 
-def add_representer(data_type, representer, Dumper=Dumper):
+def add_representer(data_type, representer, Dumper=None):
     """
     Add a representer for the given type.
     Representer is a function accepting a Dumper instance
     and an instance of the given data type
     and producing the corresponding representation node.
     """
+    if Dumper is None:
+        from .dumper import Dumper
     Dumper.add_representer(data_type, representer)
 
-def add_multi_representer(data_type, multi_representer, Dumper=Dumper):
+def add_multi_representer(data_type, multi_representer, Dumper=None):
     """
     Add a representer for the given type.
     Multi-representer is a function accepting a Dumper instance
     and an instance of the given data type or subtype
     and producing the corresponding representation node.
     """
+    if Dumper is None:
+        from .dumper import Dumper
     Dumper.add_multi_representer(data_type, multi_representer)
 
+class DefaultDumper:
+    """
+    The default YAMLObject.yaml_dumper, which is Dumper.
+    """
+    def __get__(self, instance, owner):
+        from .dumper import Dumper
+        return Dumper
+
 class YAMLObjectMetaclass(type):
     """
     The metaclass for YAMLObject.
@@ -368,7 +508,7 @@ class YAMLObject(metaclass=YAMLObjectMetaclass):
     __slots__ = ()  # no direct instantiation, so allow immutable subclasses
 
     yaml_loader = [Loader, FullLoader, UnsafeLoader]
-    yaml_dumper = Dumper
+    yaml_dumper = DefaultDumper()
 
     yaml_tag = None
     yaml_flow_style = None
@@ -2,6 +2,7 @@
 __all__ = [
     'BaseConstructor',
     'SafeConstructor',
+    'SafeEventConstructor',
     'FullConstructor',
     'UnsafeConstructor',
     'Constructor',
@@ -9,7 +10,9 @@ __all__ = [
 ]
 
 from .error import *
+from .events import *
 from .nodes import *
+from .composer import ComposerError
 
 import collections.abc, datetime, base64, binascii, re, sys, types
 
@@ -21,6 +24,17 @@ class BaseConstructor:
     yaml_constructors = {}
     yaml_multi_constructors = {}
 
+    # Tags without an exact constructor are matched against the multi
+    # constructor prefixes only once per set of constructors. The dispatch
+    # cache maps such a tag to the pair `(constructor, tag_suffix)`; tags
+    # that only match the fallback for their node kind are cached as
+    # `(None, None)`. It is rebuilt after `add_constructor` or
+    # `add_multi_constructor` is called on any class or after the
+    # constructor dicts are replaced.
+    DISPATCH_CACHE_SIZE = 1024
+    yaml_constructors_version = 0
+    yaml_dispatch_state = (None, None, None, None)
+
     def __init__(self):
         self.constructed_objects = {}
         self.recursive_objects = {}
@@ -53,6 +67,11 @@ class BaseConstructor:
 
     def construct_document(self, node):
         data = self.construct_object(node)
+        self.finish_document()
+        return data
+
+    def finish_document(self):
+        # Run the postponed constructors and reset the per-document state.
         while self.state_generators:
             state_generators = self.state_generators
             self.state_generators = []
@@ -62,7 +81,6 @@ class BaseConstructor:
         self.constructed_objects = {}
         self.recursive_objects = {}
         self.deep_construct = False
-        return data
 
     def construct_object(self, node, deep=False):
         if node in self.constructed_objects:
@@ -74,28 +92,32 @@ class BaseConstructor:
             raise ConstructorError(None, None,
                     "found unconstructable recursive node", node.start_mark)
         self.recursive_objects[node] = None
-        constructor = None
+        tag = node.tag
         tag_suffix = None
-        if node.tag in self.yaml_constructors:
-            constructor = self.yaml_constructors[node.tag]
+        if tag in self.yaml_constructors:
+            constructor = self.yaml_constructors[tag]
         else:
-            for tag_prefix in self.yaml_multi_constructors:
-                if tag_prefix is not None and node.tag.startswith(tag_prefix):
-                    tag_suffix = node.tag[len(tag_prefix):]
-                    constructor = self.yaml_multi_constructors[tag_prefix]
-                    break
+            version, constructors, multi_constructors, dispatch \
+                    = self.yaml_dispatch_state
+            if version != BaseConstructor.yaml_constructors_version  \
+                    or constructors is not self.yaml_constructors    \
+                    or multi_constructors is not self.yaml_multi_constructors:
+                version, constructors, multi_constructors, dispatch \
+                        = self.get_dispatch_state()
+            if tag in dispatch:
+                constructor, tag_suffix = dispatch[tag]
             else:
-                if None in self.yaml_multi_constructors:
-                    tag_suffix = node.tag
-                    constructor = self.yaml_multi_constructors[None]
-                elif None in self.yaml_constructors:
-                    constructor = self.yaml_constructors[None]
-                elif isinstance(node, ScalarNode):
-                    constructor = self.__class__.construct_scalar
-                elif isinstance(node, SequenceNode):
-                    constructor = self.__class__.construct_sequence
-                elif isinstance(node, MappingNode):
-                    constructor = self.__class__.construct_mapping
+                constructor, tag_suffix = self.dispatch_constructor(tag)
+                if len(dispatch) >= self.DISPATCH_CACHE_SIZE:
+                    dispatch.clear()
+                dispatch[tag] = constructor, tag_suffix
+        if constructor is None:
+            if isinstance(node, ScalarNode):
+                constructor = self.__class__.construct_scalar
+            elif isinstance(node, SequenceNode):
+                constructor = self.__class__.construct_sequence
+            elif isinstance(node, MappingNode):
+                constructor = self.__class__.construct_mapping
         if tag_suffix is None:
             data = constructor(self, node)
         else:
@@ -156,17 +178,47 @@ class BaseConstructor:
             pairs.append((key, value))
         return pairs
 
+    @classmethod
+    def get_dispatch_state(cls):
+        # Return `(version, constructors, multi_constructors, dispatch)` for
+        # the class, rebuilding it if it is out of date.
+        state = cls.yaml_dispatch_state
+        if state[0] != BaseConstructor.yaml_constructors_version   \
+                or state[1] is not cls.yaml_constructors            \
+                or state[2] is not cls.yaml_multi_constructors:
+            state = (BaseConstructor.yaml_constructors_version,
+                    cls.yaml_constructors, cls.yaml_multi_constructors, {})
+            cls.yaml_dispatch_state = state
+        return state
+
+    @classmethod
+    def dispatch_constructor(cls, tag):
+        # Find `(constructor, tag_suffix)` for the tag. The constructor is
+        # None if only the fallback for the node kind applies.
+        if tag in cls.yaml_constructors:
+            return cls.yaml_constructors[tag], None
+        for tag_prefix in cls.yaml_multi_constructors:
+            if tag_prefix is not None and tag.startswith(tag_prefix):
+                return cls.yaml_multi_constructors[tag_prefix], tag[len(tag_prefix):]
+        if None in cls.yaml_multi_constructors:
+            return cls.yaml_multi_constructors[None], tag
+        if None in cls.yaml_constructors:
+            return cls.yaml_constructors[None], None
+        return None, None
+
     @classmethod
     def add_constructor(cls, tag, constructor):
         if not 'yaml_constructors' in cls.__dict__:
             cls.yaml_constructors = cls.yaml_constructors.copy()
         cls.yaml_constructors[tag] = constructor
+        BaseConstructor.yaml_constructors_version += 1
 
     @classmethod
     def add_multi_constructor(cls, tag_prefix, multi_constructor):
         if not 'yaml_multi_constructors' in cls.__dict__:
             cls.yaml_multi_constructors = cls.yaml_multi_constructors.copy()
         cls.yaml_multi_constructors[tag_prefix] = multi_constructor
+        BaseConstructor.yaml_constructors_version += 1
 
 class SafeConstructor(BaseConstructor):
 
@@ -479,6 +531,168 @@ SafeConstructor.add_constructor(
 SafeConstructor.add_constructor(None,
         SafeConstructor.construct_undefined)
 
+class SafeEventConstructor(SafeConstructor):
+    # Builds the objects of the safe schema straight from the parser events,
+    # without composing the representation tree first. Scalars, sequences
+    # and mappings with the standard tags and constructors are built in
+    # place. Anything that needs nodes -- anchored subtrees, aliases, values
+    # of merge keys, other tags -- is composed and constructed as usual, so
+    # the resulting objects (and their identities) are the same as with
+    # SafeConstructor. Overriding `construct_mapping` and friends has no
+    # effect on the directly built collections.
+
+    # Scalar constructors that look at nothing but the value and the marks
+    # of their node. They are called with a single reused node.
+    event_scalar_constructors = {
+        SafeConstructor.construct_yaml_null,
+        SafeConstructor.construct_yaml_bool,
+        SafeConstructor.construct_yaml_int,
+        SafeConstructor.construct_yaml_float,
+        SafeConstructor.construct_yaml_binary,
+        SafeConstructor.construct_yaml_timestamp,
+    }
+
+    def __init__(self):
+        SafeConstructor.__init__(self)
+        self.event_scalar_node = ScalarNode(None, None)
+
+    def get_data(self):
+        # Construct and return the next document.
+        if self.check_node():
+            return self.construct_event_document()[0]
+
+    def get_single_data(self):
+        # Drop the STREAM-START event.
+        self.get_event()
+
+        # Construct a document if the stream is not empty.
+        data = start_mark = None
+        if not self.check_event(StreamEndEvent):
+            data, start_mark = self.construct_event_document()
+
+        # Ensure that the stream contains no more documents.
+        if not self.check_event(StreamEndEvent):
+            event = self.get_event()
+            raise ComposerError("expected a single document in the stream",
+                    start_mark, "but found another document",
+                    event.start_mark)
+
+        # Drop the STREAM-END event.
+        self.get_event()
+
+        return data
+
+    def construct_event_document(self):
+        # Return the next document and the start mark of its root node.
+        if self.yaml_path_resolvers:
+            # Path resolvers need the parent nodes.
+            node = self.compose_document()
+            return self.construct_document(node), node.start_mark
+
+        # Drop the DOCUMENT-START event.
+        self.get_event()
+
+        start_mark = self.peek_event().start_mark
+        data = self.construct_event()
+
+        # Drop the DOCUMENT-END event.
+        self.get_event()
+
+        self.anchors = {}
+        self.finish_document()
+        return data, start_mark
+
+    def construct_event_node(self, key=False):
+        # Compose the next node and construct it the usual way.
+        node = self.compose_node(None, None)
+        if key and node.tag == 'tag:yaml.org,2002:value':
+            # See `flatten_mapping`.
+            node.tag = 'tag:yaml.org,2002:str'
+        return self.construct_object(node)
+
+    def construct_event(self, key=False):
+        event = self.peek_event()
+        if event.__class__ is AliasEvent or event.anchor is not None:
+            return self.construct_event_node(key)
+        tag = event.tag
+        if event.__class__ is ScalarEvent:
+            if tag is None or tag == '!':
+                tag = self.resolve(ScalarNode, event.value, event.implicit)
+            constructor = self.yaml_constructors.get(tag)
+            if constructor is SafeConstructor.construct_yaml_str \
+                    or (key and tag == 'tag:yaml.org,2002:value'):
+                self.get_event()
+                return event.value
+            if constructor not in self.event_scalar_constructors:
+                return self.construct_event_node(key)
+            self.get_event()
+            node = self.event_scalar_node
+            node.tag = tag
+            node.value = event.value
+            node.start_mark = event.start_mark
+            node.end_mark = event.end_mark
+            return constructor(self, node)
+        elif event.__class__ is SequenceStartEvent:
+            if tag is None or tag == '!':
+                tag = self.resolve(SequenceNode, None, event.implicit)
+            if self.yaml_constructors.get(tag) is not SafeConstructor.construct_yaml_seq:
+                return self.construct_event_node(key)
+            self.get_event()
+            data = []
+            while not self.check_event(SequenceEndEvent):
+                data.append(self.construct_event())
+            self.get_event()
+            return data
+        else:
+            if tag is None or tag == '!':
+                tag = self.resolve(MappingNode, None, event.implicit)
+            if self.yaml_constructors.get(tag) is not SafeConstructor.construct_yaml_map:
+                return self.construct_event_node(key)
+            return self.construct_event_mapping()
+
+    def construct_event_mapping(self):
+        start_event = self.get_event()
+        mapping = {}
+        merge = None
+        while not self.check_event(MappingEndEvent):
+            key_event = self.peek_event()
+            if key_event.__class__ is ScalarEvent and self.is_merge_key(key_event):
+                # Let `flatten_mapping` do the merging on the nodes.
+                key_node = self.compose_node(None, None)
+                node = MappingNode('tag:yaml.org,2002:map',
+                        [(key_node, self.compose_node(None, None))],
+                        start_event.start_mark, None)
+                self.flatten_mapping(node)
+                if merge is None:
+                    merge = []
+                for key_node, value_node in node.value:
+                    key = self.construct_object(key_node)
+                    if not isinstance(key, collections.abc.Hashable):
+                        raise ConstructorError("while constructing a mapping",
+                                start_event.start_mark,
+                                "found unhashable key", key_node.start_mark)
+                    merge.append((key, self.construct_object(value_node)))
+                continue
+            key = self.construct_event(True)
+            if not isinstance(key, collections.abc.Hashable):
+                raise ConstructorError("while constructing a mapping",
+                        start_event.start_mark,
+                        "found unhashable key", key_event.start_mark)
+            mapping[key] = self.construct_event()
+        self.get_event()
+        if merge:
+            # Merged keys come first, the mapping's own values win.
+            data = dict(merge)
+            data.update(mapping)
+            return data
+        return mapping
+
+    def is_merge_key(self, event):
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = self.resolve(ScalarNode, event.value, event.implicit)
+        return tag == 'tag:yaml.org,2002:merge'
+
 class FullConstructor(SafeConstructor):
     # 'extend' is blacklisted because it is used by
     # construct_python_object_apply to add `listitems` to a newly generate
@@ -55,14 +55,15 @@ class CBaseDumper(CEmitter, BaseRepresenter, BaseResolver):
             canonical=None, indent=None, width=None,
             allow_unicode=None, line_break=None,
             encoding=None, explicit_start=None, explicit_end=None,
-            version=None, tags=None, sort_keys=True):
+            version=None, tags=None, sort_keys=True, aliases=True):
         CEmitter.__init__(self, stream, canonical=canonical,
                 indent=indent, width=width, encoding=encoding,
                 allow_unicode=allow_unicode, line_break=line_break,
                 explicit_start=explicit_start, explicit_end=explicit_end,
                 version=version, tags=tags)
         Representer.__init__(self, default_style=default_style,
-                default_flow_style=default_flow_style, sort_keys=sort_keys)
+                default_flow_style=default_flow_style, sort_keys=sort_keys,
+                aliases=aliases)
         Resolver.__init__(self)
 
 class CSafeDumper(CEmitter, SafeRepresenter, Resolver):
@@ -72,14 +73,15 @@ class CSafeDumper(CEmitter, SafeRepresenter, Resolver):
             canonical=None, indent=None, width=None,
             allow_unicode=None, line_break=None,
             encoding=None, explicit_start=None, explicit_end=None,
-            version=None, tags=None, sort_keys=True):
+            version=None, tags=None, sort_keys=True, aliases=True):
         CEmitter.__init__(self, stream, canonical=canonical,
                 indent=indent, width=width, encoding=encoding,
                 allow_unicode=allow_unicode, line_break=line_break,
                 explicit_start=explicit_start, explicit_end=explicit_end,
                 version=version, tags=tags)
         SafeRepresenter.__init__(self, default_style=default_style,
-                default_flow_style=default_flow_style, sort_keys=sort_keys)
+                default_flow_style=default_flow_style, sort_keys=sort_keys,
+                aliases=aliases)
         Resolver.__init__(self)
 
 class CDumper(CEmitter, Serializer, Representer, Resolver):
@@ -89,13 +91,14 @@ class CDumper(CEmitter, Serializer, Representer, Resolver):
             canonical=None, indent=None, width=None,
             allow_unicode=None, line_break=None,
             encoding=None, explicit_start=None, explicit_end=None,
-            version=None, tags=None, sort_keys=True):
+            version=None, tags=None, sort_keys=True, aliases=True):
         CEmitter.__init__(self, stream, canonical=canonical,
                 indent=indent, width=width, encoding=encoding,
                 allow_unicode=allow_unicode, line_break=line_break,
                 explicit_start=explicit_start, explicit_end=explicit_end,
                 version=version, tags=tags)
         Representer.__init__(self, default_style=default_style,
-                default_flow_style=default_flow_style, sort_keys=sort_keys)
+                default_flow_style=default_flow_style, sort_keys=sort_keys,
+                aliases=aliases)
         Resolver.__init__(self)
 
@@ -1,5 +1,5 @@
 
-__all__ = ['BaseDumper', 'SafeDumper', 'Dumper']
+__all__ = ['BaseDumper', 'SafeDumper', 'StreamSafeDumper', 'Dumper']
 
 from .emitter import *
 from .serializer import *
@@ -13,15 +13,16 @@ class BaseDumper(Emitter, Serializer, BaseRepresenter, BaseResolver):
             canonical=None, indent=None, width=None,
             allow_unicode=None, line_break=None,
             encoding=None, explicit_start=None, explicit_end=None,
-            version=None, tags=None, sort_keys=True):
+            version=None, tags=None, sort_keys=True, aliases=True):
         Emitter.__init__(self, stream, canonical=canonical,
                 indent=indent, width=width,
                 allow_unicode=allow_unicode, line_break=line_break)
         Serializer.__init__(self, encoding=encoding,
                 explicit_start=explicit_start, explicit_end=explicit_end,
-                version=version, tags=tags)
+                version=version, tags=tags, aliases=aliases)
         Representer.__init__(self, default_style=default_style,
-                default_flow_style=default_flow_style, sort_keys=sort_keys)
+                default_flow_style=default_flow_style, sort_keys=sort_keys,
+                aliases=aliases)
         Resolver.__init__(self)
 
 class SafeDumper(Emitter, Serializer, SafeRepresenter, Resolver):
@@ -31,15 +32,37 @@ class SafeDumper(Emitter, Serializer, SafeRepresenter, Resolver):
             canonical=None, indent=None, width=None,
             allow_unicode=None, line_break=None,
             encoding=None, explicit_start=None, explicit_end=None,
-            version=None, tags=None, sort_keys=True):
+            version=None, tags=None, sort_keys=True, aliases=True):
         Emitter.__init__(self, stream, canonical=canonical,
                 indent=indent, width=width,
                 allow_unicode=allow_unicode, line_break=line_break)
         Serializer.__init__(self, encoding=encoding,
                 explicit_start=explicit_start, explicit_end=explicit_end,
-                version=version, tags=tags)
+                version=version, tags=tags, aliases=aliases)
         SafeRepresenter.__init__(self, default_style=default_style,
-                default_flow_style=default_flow_style, sort_keys=sort_keys)
+                default_flow_style=default_flow_style, sort_keys=sort_keys,
+                aliases=aliases)
+        Resolver.__init__(self)
+
+class StreamSafeDumper(Emitter, Serializer, SafeEventRepresenter, Resolver):
+    # Dumps the same documents as SafeDumper (without aliases) but emits
+    # the events while walking the objects; see SafeEventRepresenter.
+
+    def __init__(self, stream,
+            default_style=None, default_flow_style=False,
+            canonical=None, indent=None, width=None,
+            allow_unicode=None, line_break=None,
+            encoding=None, explicit_start=None, explicit_end=None,
+            version=None, tags=None, sort_keys=True, aliases=True):
+        Emitter.__init__(self, stream, canonical=canonical,
+                indent=indent, width=width,
+                allow_unicode=allow_unicode, line_break=line_break)
+        Serializer.__init__(self, encoding=encoding,
+                explicit_start=explicit_start, explicit_end=explicit_end,
+                version=version, tags=tags, aliases=aliases)
+        SafeEventRepresenter.__init__(self, default_style=default_style,
+                default_flow_style=default_flow_style, sort_keys=sort_keys,
+                aliases=aliases)
         Resolver.__init__(self)
 
 class Dumper(Emitter, Serializer, Representer, Resolver):
@@ -49,14 +72,15 @@ class Dumper(Emitter, Serializer, Representer, Resolver):
             canonical=None, indent=None, width=None,
             allow_unicode=None, line_break=None,
             encoding=None, explicit_start=None, explicit_end=None,
-            version=None, tags=None, sort_keys=True):
+            version=None, tags=None, sort_keys=True, aliases=True):
         Emitter.__init__(self, stream, canonical=canonical,
                 indent=indent, width=width,
                 allow_unicode=allow_unicode, line_break=line_break)
         Serializer.__init__(self, encoding=encoding,
                 explicit_start=explicit_start, explicit_end=explicit_end,
-                version=version, tags=tags)
+                version=version, tags=tags, aliases=aliases)
         Representer.__init__(self, default_style=default_style,
-                default_flow_style=default_flow_style, sort_keys=sort_keys)
+                default_flow_style=default_flow_style, sort_keys=sort_keys,
+                aliases=aliases)
         Resolver.__init__(self)
 
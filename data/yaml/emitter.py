@@ -11,6 +11,8 @@ __all__ = ['Emitter', 'EmitterError']
 from .error import YAMLError
 from .events import *
 
+import re
+
 class EmitterError(YAMLError):
     pass
 
@@ -35,6 +37,20 @@ class Emitter:
         'tag:yaml.org,2002:' : '!!',
     }
 
+    # The output is collected in memory and written to the stream (encoded,
+    # if needed) in one piece at the first line break after this many
+    # fragments are pending, at the end of every document and at the end of
+    # the stream.
+    FLUSH_CHUNKS = 4096
+
+    # Scalars made only of these characters (and not a lone '-' or a
+    # document indicator) allow every style and skip the character walk.
+    # The analyses of short scalars are kept in a per-emitter LRU cache, as
+    # the same keys and values tend to repeat throughout a stream.
+    SIMPLE_SCALAR = re.compile(r'(?!---|\.\.\.|-\Z)[A-Za-z0-9_.-]+\Z')
+    ANALYSIS_CACHE_SIZE = 1024
+    ANALYSIS_CACHE_VALUE_LENGTH = 128
+
     def __init__(self, stream, canonical=None, indent=None, width=None,
             allow_unicode=None, line_break=None):
 
@@ -44,6 +60,9 @@ class Emitter:
         # Encoding can be overridden by STREAM-START.
         self.encoding = None
 
+        # Output not written to the stream yet.
+        self.chunks = []
+
         # Emitter is a state machine with a stack of states to handle nested
         # structures.
         self.states = []
@@ -103,6 +122,9 @@ class Emitter:
         self.analysis = None
         self.style = None
 
+        # Recent scalar analyses, least recently used first.
+        self.analyses = {}
+
     def dispose(self):
         # Reset the state attributes (to clear self-references)
         self.states = []
@@ -624,6 +646,23 @@ class Emitter:
         return anchor
 
     def analyze_scalar(self, scalar):
+        analyses = self.analyses
+        if scalar in analyses:
+            analysis = analyses[scalar] = analyses.pop(scalar)
+            return analysis
+        if self.SIMPLE_SCALAR.match(scalar):
+            analysis = ScalarAnalysis(scalar, False, False,
+                    True, True, True, True, True)
+        else:
+            analysis = self.analyze_scalar_characters(scalar)
+        if 0 < self.ANALYSIS_CACHE_SIZE \
+                and len(scalar) <= self.ANALYSIS_CACHE_VALUE_LENGTH:
+            if len(analyses) >= self.ANALYSIS_CACHE_SIZE:
+                del analyses[next(iter(analyses))]
+            analyses[scalar] = analysis
+        return analysis
+
+    def analyze_scalar_characters(self, scalar):
 
         # Empty scalar is a special case.
         if not scalar:
@@ -785,14 +824,24 @@ class Emitter:
 
     # Writers.
 
+    def flush_chunks(self):
+        # Write the pending output to the stream, encoded at once.
+        if self.chunks:
+            data = ''.join(self.chunks)
+            self.chunks = []
+            if self.encoding:
+                data = data.encode(self.encoding)
+            self.stream.write(data)
+
     def flush_stream(self):
+        self.flush_chunks()
         if hasattr(self.stream, 'flush'):
             self.stream.flush()
 
     def write_stream_start(self):
         # Write BOM if needed.
         if self.encoding and self.encoding.startswith('utf-16'):
-            self.stream.write('\uFEFF'.encode(self.encoding))
+            self.chunks.append('\uFEFF')
 
     def write_stream_end(self):
         self.flush_stream()
@@ -807,9 +856,7 @@ class Emitter:
         self.indention = self.indention and indention
         self.column += len(data)
         self.open_ended = False
-        if self.encoding:
-            data = data.encode(self.encoding)
-        self.stream.write(data)
+        self.chunks.append(data)
 
     def write_indent(self):
         indent = self.indent or 0
@@ -820,9 +867,7 @@ class Emitter:
             self.whitespace = True
             data = ' '*(indent-self.column)
             self.column = indent
-            if self.encoding:
-                data = data.encode(self.encoding)
-            self.stream.write(data)
+            self.chunks.append(data)
 
     def write_line_break(self, data=None):
         if data is None:
@@ -831,22 +876,18 @@ class Emitter:
         self.indention = True
         self.line += 1
         self.column = 0
-        if self.encoding:
-            data = data.encode(self.encoding)
-        self.stream.write(data)
+        self.chunks.append(data)
+        if len(self.chunks) >= self.FLUSH_CHUNKS:
+            self.flush_chunks()
 
     def write_version_directive(self, version_text):
         data = '%%YAML %s' % version_text
-        if self.encoding:
-            data = data.encode(self.encoding)
-        self.stream.write(data)
+        self.chunks.append(data)
         self.write_line_break()
 
     def write_tag_directive(self, handle_text, prefix_text):
         data = '%%TAG %s %s' % (handle_text, prefix_text)
-        if self.encoding:
-            data = data.encode(self.encoding)
-        self.stream.write(data)
+        self.chunks.append(data)
         self.write_line_break()
 
     # Scalar streams.
@@ -868,9 +909,7 @@ class Emitter:
                     else:
                         data = text[start:end]
                         self.column += len(data)
-                        if self.encoding:
-                            data = data.encode(self.encoding)
-                        self.stream.write(data)
+                        self.chunks.append(data)
                     start = end
             elif breaks:
                 if ch is None or ch not in '\n\x85\u2028\u2029':
@@ -888,16 +927,12 @@ class Emitter:
                     if start < end:
                         data = text[start:end]
                         self.column += len(data)
-                        if self.encoding:
-                            data = data.encode(self.encoding)
-                        self.stream.write(data)
+                        self.chunks.append(data)
                         start = end
             if ch == '\'':
                 data = '\'\''
                 self.column += 2
-                if self.encoding:
-                    data = data.encode(self.encoding)
-                self.stream.write(data)
+                self.chunks.append(data)
                 start = end + 1
             if ch is not None:
                 spaces = (ch == ' ')
@@ -938,9 +973,7 @@ class Emitter:
                 if start < end:
                     data = text[start:end]
                     self.column += len(data)
-                    if self.encoding:
-                        data = data.encode(self.encoding)
-                    self.stream.write(data)
+                    self.chunks.append(data)
                     start = end
                 if ch is not None:
                     if ch in self.ESCAPE_REPLACEMENTS:
@@ -952,9 +985,7 @@ class Emitter:
                     else:
                         data = '\\U%08X' % ord(ch)
                     self.column += len(data)
-                    if self.encoding:
-                        data = data.encode(self.encoding)
-                    self.stream.write(data)
+                    self.chunks.append(data)
                     start = end+1
             if 0 < end < len(text)-1 and (ch == ' ' or start >= end)    \
                     and self.column+(end-start) > self.best_width and split:
@@ -962,18 +993,14 @@ class Emitter:
                 if start < end:
                     start = end
                 self.column += len(data)
-                if self.encoding:
-                    data = data.encode(self.encoding)
-                self.stream.write(data)
+                self.chunks.append(data)
                 self.write_indent()
                 self.whitespace = False
                 self.indention = False
                 if text[start] == ' ':
                     data = '\\'
                     self.column += len(data)
-                    if self.encoding:
-                        data = data.encode(self.encoding)
-                    self.stream.write(data)
+                    self.chunks.append(data)
             end += 1
         self.write_indicator('"', False)
 
@@ -1023,17 +1050,13 @@ class Emitter:
                     else:
                         data = text[start:end]
                         self.column += len(data)
-                        if self.encoding:
-                            data = data.encode(self.encoding)
-                        self.stream.write(data)
+                        self.chunks.append(data)
                     start = end
             else:
                 if ch is None or ch in ' \n\x85\u2028\u2029':
                     data = text[start:end]
                     self.column += len(data)
-                    if self.encoding:
-                        data = data.encode(self.encoding)
-                    self.stream.write(data)
+                    self.chunks.append(data)
                     if ch is None:
                         self.write_line_break()
                     start = end
@@ -1067,9 +1090,7 @@ class Emitter:
             else:
                 if ch is None or ch in '\n\x85\u2028\u2029':
                     data = text[start:end]
-                    if self.encoding:
-                        data = data.encode(self.encoding)
-                    self.stream.write(data)
+                    self.chunks.append(data)
                     if ch is None:
                         self.write_line_break()
                     start = end
@@ -1085,9 +1106,7 @@ class Emitter:
         if not self.whitespace:
             data = ' '
             self.column += len(data)
-            if self.encoding:
-                data = data.encode(self.encoding)
-            self.stream.write(data)
+            self.chunks.append(data)
         self.whitespace = False
         self.indention = False
         spaces = False
@@ -1106,9 +1125,7 @@ class Emitter:
                     else:
                         data = text[start:end]
                         self.column += len(data)
-                        if self.encoding:
-                            data = data.encode(self.encoding)
-                        self.stream.write(data)
+                        self.chunks.append(data)
                     start = end
             elif breaks:
                 if ch not in '\n\x85\u2028\u2029':
@@ -1127,9 +1144,7 @@ class Emitter:
                 if ch is None or ch in ' \n\x85\u2028\u2029':
                     data = text[start:end]
                     self.column += len(data)
-                    if self.encoding:
-                        data = data.encode(self.encoding)
-                    self.stream.write(data)
+                    self.chunks.append(data)
                     start = end
             if ch is not None:
                 spaces = (ch == ' ')
@@ -2,6 +2,7 @@
 __all__ = ['Mark', 'YAMLError', 'MarkedYAMLError']
 
 class Mark:
+    __slots__ = ('name', 'index', 'line', 'column', 'buffer', 'pointer')
 
     def __init__(self, name, index, line, column, buffer, pointer):
         self.name = name
@@ -0,0 +1,46 @@
+
+# Safe loading and dumping with the fastest classes available: the libyaml
+# based CSafeLoader and CSafeDumper when the extension is built, and the
+# pure-Python FastSafeLoader and SafeDumper otherwise. Both resolve only
+# basic YAML tags. `scripts/benchmark_yaml.py` reports what the pure-Python
+# classes cost on the files in `data/configs`.
+
+__all__ = ['SafeLoader', 'SafeDumper', 'load', 'load_all', 'dump', 'dump_all']
+
+from . import load as yaml_load, load_all as yaml_load_all, dump_all as yaml_dump_all
+
+try:
+    from .cyaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+    __with_libyaml__ = True
+except ImportError:
+    from .loader import FastSafeLoader as SafeLoader
+    from .dumper import SafeDumper
+    __with_libyaml__ = False
+
+def load(stream):
+    """
+    Parse the first YAML document in a stream
+    and produce the corresponding Python object.
+    """
+    return yaml_load(stream, SafeLoader)
+
+def load_all(stream):
+    """
+    Parse all YAML documents in a stream
+    and produce corresponding Python objects.
+    """
+    return yaml_load_all(stream, SafeLoader)
+
+def dump_all(documents, stream=None, **kwds):
+    """
+    Serialize a sequence of Python objects into a YAML stream.
+    If stream is None, return the produced string instead.
+    """
+    return yaml_dump_all(documents, stream, Dumper=SafeDumper, **kwds)
+
+def dump(data, stream=None, **kwds):
+    """
+    Serialize a Python object into a YAML stream.
+    If stream is None, return the produced string instead.
+    """
+    return yaml_dump_all([data], stream, Dumper=SafeDumper, **kwds)
@@ -0,0 +1,294 @@
+
+# Incremental re-parsing of a single YAML document that is edited in place.
+#
+# IncrementalDocument keeps the text, the representation tree and the
+# constructed data of a document whose root is a block mapping. An edit
+# re-composes only the top-level entries it touches: the text from the
+# start of the first touched key up to the next untouched key is parsed on
+# its own, and the resulting key/value pairs replace the old ones in the
+# root node. Top-level keys start at column 0, so nothing in such a slice
+# can continue into the next entry; when the slice does not parse the same
+# way on its own (unclosed quotes or flow collections, document markers,
+# directives, keys that are not at column 0, a root of another kind) the
+# whole document is parsed again instead, and so is a slice that defines
+# an anchor name used elsewhere. Documents with top-level merge keys or
+# aliases that cross top-level entries are always parsed whole.
+#
+# The marks of the nodes carry no buffer, like the marks of a document
+# read from a file. Marks of the entries after an edit are moved when
+# `node` is next looked up; `data` does not need them. The data of each
+# entry is constructed once and kept until the entry is re-parsed. As with
+# any constructor, constructing it flattens nested merge keys in `node`.
+
+__all__ = ['IncrementalDocument']
+
+import bisect
+import collections.abc
+import re
+
+from .error import Mark, YAMLError
+from .nodes import MappingNode
+from .constructor import ConstructorError
+from .loader import SafeLoader
+
+# Lines that end a document or start a directive in a re-parsed slice.
+DOCUMENT_MARKERS = re.compile('(?:^|(?<=[\r\n\x85\u2028\u2029]))(?:---|\\.\\.\\.|%)')
+LINE_BREAKS = re.compile('\r\n|[\r\n\x85\u2028\u2029]')
+
+MAP_TAG = 'tag:yaml.org,2002:map'
+MERGE_TAG = 'tag:yaml.org,2002:merge'
+
+def position(mark):
+    # FastSafeLoader nodes carry plain character indices as their marks.
+    return mark if isinstance(mark, int) else mark.index
+
+class IncrementalDocument:
+    """
+    A YAML document that can be edited and re-parsed incrementally.
+
+    `text` is the current text, `node` its representation tree and
+    `data` the corresponding Python object. `edit` replaces a range
+    of the text and re-composes only the top-level entries of the
+    root mapping that the range touches.
+    """
+
+    def __init__(self, text, Loader=SafeLoader, name="<unicode string>"):
+        self.Loader = Loader
+        self.name = name
+        self.parse(text)
+
+    @property
+    def node(self):
+        # Bring the marks of the entries moved by earlier edits up to date.
+        if self.starts is not None:
+            for index, (key_node, value_node) in enumerate(self.root.value):
+                shift = self.starts[index]-position(key_node.start_mark)
+                line_shift = self.lines[index]-self.line_of(key_node.start_mark)
+                if shift or line_shift:
+                    self.move_marks([key_node, value_node], shift, line_shift)
+        return self.root
+
+    @property
+    def data(self):
+        if self.starts is None:
+            if self.whole_data is None and self.root is not None:
+                self.whole_data = self.make_loader('').construct_document(self.root)
+            return self.whole_data
+        loader = None
+        data = {}
+        for index, (key_node, value_node) in enumerate(self.root.value):
+            if self.values[index] is None:
+                if loader is None:
+                    loader = self.make_loader('')
+                key = loader.construct_object(key_node, deep=True)
+                if not isinstance(key, collections.abc.Hashable):
+                    raise ConstructorError("while constructing a mapping", self.root.start_mark,
+                            "found unhashable key", key_node.start_mark)
+                self.values[index] = (key, loader.construct_object(value_node, deep=True))
+            key, value = self.values[index]
+            data[key] = value
+        return data
+
+    def edit(self, start, end, replacement):
+        """
+        Replace the characters between `start` and `end`
+        with `replacement` and update the tree. Return True
+        if only the touched entries were re-parsed and False
+        if the whole document was. If the new text does not
+        parse, the error is raised and nothing is changed.
+        """
+        if not 0 <= start <= end <= len(self.text):
+            raise ValueError("edit range %d:%d is outside the document" % (start, end))
+        text = self.text[:start]+replacement+self.text[end:]
+        starts = self.starts
+        if starts is None or start < starts[0]:
+            self.parse(text)
+            return False
+
+        # The touched entries. An edit at the very start of an entry may
+        # also continue the value of the entry before it.
+        first = max(bisect.bisect_left(starts, start)-1, 0)
+        last = bisect.bisect_right(starts, end)-1
+        region_start = starts[first]
+        shift = len(replacement)-(end-start)
+        at_end = last+1 == len(starts)
+        # A root with an anchor or a tag starts before its first key.
+        root_at_first_key = position(self.root.start_mark) == starts[0]
+        if not at_end:
+            old_end = starts[last+1]
+            new_end = old_end+shift
+        else:
+            old_end = len(self.text)
+            new_end = len(text)
+        region = text[region_start:new_end]
+        composed = self.compose_region(region, region_start, self.lines[first], at_end)
+        if composed is None or (first == 0 and not composed[0]):
+            self.parse(text)
+            return False
+        pairs, start_mark, end_mark, anchors = composed
+
+        # Anchor names are unique in a document.
+        names = set()
+        for entry_anchors in anchors:
+            names.update(entry_anchors)
+        old_names = set()
+        for entry_anchors in self.anchors[first:last+1]:
+            old_names.update(entry_anchors)
+        if not names.isdisjoint(self.anchor_names-old_names):
+            self.parse(text)
+            return False
+
+        # Splice the new entries in and move the ones after them.
+        line_shift = (len(LINE_BREAKS.findall(region))
+                - len(LINE_BREAKS.findall(self.text, region_start, old_end)))
+        self.root.value[first:last+1] = pairs
+        self.starts[first:last+1] = [position(key_node.start_mark) for key_node, value_node in pairs]
+        self.lines[first:last+1] = [self.line_of(key_node.start_mark) for key_node, value_node in pairs]
+        self.values[first:last+1] = [None]*len(pairs)
+        self.anchors[first:last+1] = anchors
+        self.anchor_names = (self.anchor_names-old_names)|names
+        for index in range(first+len(pairs), len(self.starts)):
+            self.starts[index] += shift
+            self.lines[index] += line_shift
+        if first == 0 and root_at_first_key:
+            self.root.start_mark = start_mark
+        if at_end:
+            self.root.end_mark = end_mark
+        else:
+            self.root.end_mark = self.moved_mark(self.root.end_mark, shift, line_shift)
+        self.text = text
+        return True
+
+    # Parsing.
+
+    def make_loader(self, text):
+        loader = self.Loader(text)
+        loader.name = self.name
+        return loader
+
+    def compose(self, text):
+        # Return the root node and the anchors of the document. The composer
+        # fills `anchors` and replaces it with an empty dict at the end of
+        # the document.
+        loader = self.make_loader(text)
+        anchors = loader.anchors
+        try:
+            return loader.get_single_node(), anchors
+        finally:
+            loader.dispose()
+
+    def parse(self, text):
+        # Parse the whole text and record where the top-level entries start.
+        root, anchors = self.compose(text)
+        self.text = text
+        self.root = root
+        self.whole_data = None
+        self.starts = self.lines = self.values = self.anchors = None
+        if root is not None:
+            self.move_marks([root], 0, 0)
+        if (isinstance(root, MappingNode) and root.tag == MAP_TAG and not root.flow_style
+                and root.value):
+            entry_anchors = self.entry_anchors(root.value, text, anchors)
+            if entry_anchors is not None:
+                self.starts = [position(key_node.start_mark) for key_node, value_node in root.value]
+                self.lines = [self.line_of(key_node.start_mark) for key_node, value_node in root.value]
+                self.values = [None]*len(root.value)
+                self.anchors = entry_anchors
+                self.anchor_names = set(anchors)
+
+    def compose_region(self, region, region_start, region_line, at_end):
+        # Compose the entries in `region`, which starts at the character
+        # `region_start` of the new text, and return them with the start and
+        # end marks of the region. Return None if the region does not parse the same
+        # way on its own.
+        if DOCUMENT_MARKERS.search(region):
+            return None
+        try:
+            node, anchors = self.compose(region)
+        except YAMLError:
+            return None
+        if node is None:
+            # Only comments and blanks are left.
+            if at_end:
+                return None
+            return [], None, None, []
+        if not isinstance(node, MappingNode) or node.tag != MAP_TAG or node.flow_style:
+            return None
+        entry_anchors = self.entry_anchors(node.value, region, anchors)
+        if entry_anchors is None:
+            return None
+        self.move_marks([node], region_start, region_line)
+        return node.value, node.start_mark, node.end_mark, entry_anchors
+
+    def entry_anchors(self, pairs, text, anchors):
+        # Return the anchor names defined in each top-level entry, or None
+        # unless each key starts a line, is not a merge key, and shares no
+        # nodes with the other entries.
+        names = dict((id(node), name) for name, node in anchors.items())
+        result = []
+        seen = set()
+        for key_node, value_node in pairs:
+            index = position(key_node.start_mark)
+            if index and text[index-1] not in '\r\n\x85\u2028\u2029':
+                return None
+            if key_node.tag == MERGE_TAG:
+                return None
+            entry = set()
+            self.collect_nodes(key_node, entry)
+            self.collect_nodes(value_node, entry)
+            if not seen.isdisjoint(entry):
+                return None
+            seen |= entry
+            result.append([names[node_id] for node_id in entry if node_id in names])
+        return result
+
+    def collect_nodes(self, node, ids):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if id(node) in ids:
+                continue
+            ids.add(id(node))
+            if isinstance(node, MappingNode):
+                for key_node, value_node in node.value:
+                    stack.append(key_node)
+                    stack.append(value_node)
+            elif isinstance(node.value, list):
+                stack.extend(node.value)
+
+    # Marks.
+
+    def line_of(self, mark):
+        return 0 if isinstance(mark, int) else mark.line
+
+    def moved_mark(self, mark, shift, line_shift):
+        if isinstance(mark, int):
+            return mark+shift
+        return Mark(self.name, mark.index+shift, mark.line+line_shift, mark.column, None, None)
+
+    def move_marks(self, nodes, shift, line_shift):
+        # Move the marks of the given subtrees and detach them from the
+        # parsed text. Marks may be shared between nodes.
+        seen = set()
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            for key in ['start_mark', 'end_mark']:
+                mark = getattr(node, key)
+                if isinstance(mark, int):
+                    setattr(node, key, mark+shift)
+                elif mark is not None and id(mark) not in seen:
+                    seen.add(id(mark))
+                    mark.name = self.name
+                    mark.index += shift
+                    mark.line += line_shift
+                    mark.buffer = mark.pointer = None
+            if isinstance(node, MappingNode):
+                for key_node, value_node in node.value:
+                    stack.append(key_node)
+                    stack.append(value_node)
+            elif isinstance(node.value, list):
+                stack.extend(node.value)
@@ -1,5 +1,6 @@
 
-__all__ = ['BaseLoader', 'FullLoader', 'SafeLoader', 'Loader', 'UnsafeLoader']
+__all__ = ['BaseLoader', 'FullLoader', 'SafeLoader', 'FastSafeLoader',
+        'Loader', 'UnsafeLoader']
 
 from .reader import *
 from .scanner import *
@@ -7,6 +8,7 @@ from .parser import *
 from .composer import *
 from .constructor import *
 from .resolver import *
+from .error import MarkedYAMLError
 
 class BaseLoader(Reader, Scanner, Parser, Composer, BaseConstructor, BaseResolver):
 
@@ -38,6 +40,154 @@ class SafeLoader(Reader, Scanner, Parser, Composer, SafeConstructor, Resolver):
         SafeConstructor.__init__(self)
         Resolver.__init__(self)
 
+class FastSafeLoader(Reader, Scanner, Parser, Composer, SafeEventConstructor, Resolver):
+    # Loads the same objects as SafeLoader, but builds them straight from
+    # the events (see SafeEventConstructor) and does not create Mark objects
+    # on the happy path. `get_mark` returns the character index, so tokens,
+    # events and nodes carry plain integers as their marks. When an error
+    # escapes, the indices stored in it are turned into proper marks. This
+    # needs the whole stream in memory, so file-like streams are read at
+    # once.
+
+    def __init__(self, stream):
+        name = None
+        if not isinstance(stream, (str, bytes)):
+            name = getattr(stream, 'name', "<file>")
+            stream = stream.read()
+        Reader.__init__(self, stream)
+        Scanner.__init__(self)
+        Parser.__init__(self)
+        Composer.__init__(self)
+        SafeEventConstructor.__init__(self)
+        Resolver.__init__(self)
+        if name is not None:
+            self.name = name
+
+    def get_mark(self):
+        return self.index
+
+    def build_marks(self, exc):
+        # Replace the character indices of a raised error by marks.
+        for key in ['context_mark', 'problem_mark']:
+            mark = getattr(exc, key, None)
+            if isinstance(mark, int):
+                setattr(exc, key, self.get_mark_at(mark))
+
+    # Every error is raised below one of the following methods. The token
+    # and event accessors are called several times per token, so their
+    # bodies are repeated here rather than wrapped in another call.
+
+    def check_token(self, *choices):
+        try:
+            while self.need_more_tokens():
+                self.fetch_more_tokens()
+        except MarkedYAMLError as exc:
+            self.build_marks(exc)
+            raise
+        if self.tokens:
+            if not choices:
+                return True
+            for choice in choices:
+                if isinstance(self.tokens[0], choice):
+                    return True
+        return False
+
+    def peek_token(self):
+        try:
+            while self.need_more_tokens():
+                self.fetch_more_tokens()
+        except MarkedYAMLError as exc:
+            self.build_marks(exc)
+            raise
+        if self.tokens:
+            return self.tokens[0]
+        else:
+            return None
+
+    def get_token(self):
+        try:
+            while self.need_more_tokens():
+                self.fetch_more_tokens()
+        except MarkedYAMLError as exc:
+            self.build_marks(exc)
+            raise
+        if self.tokens:
+            self.tokens_taken += 1
+            return self.tokens.pop(0)
+
+    def check_event(self, *choices):
+        if self.current_event is None:
+            if self.state:
+                try:
+                    self.current_event = self.state()
+                except MarkedYAMLError as exc:
+                    self.build_marks(exc)
+                    raise
+        if self.current_event is not None:
+            if not choices:
+                return True
+            for choice in choices:
+                if isinstance(self.current_event, choice):
+                    return True
+        return False
+
+    def peek_event(self):
+        if self.current_event is None:
+            if self.state:
+                try:
+                    self.current_event = self.state()
+                except MarkedYAMLError as exc:
+                    self.build_marks(exc)
+                    raise
+        return self.current_event
+
+    def get_event(self):
+        if self.current_event is None:
+            if self.state:
+                try:
+                    self.current_event = self.state()
+                except MarkedYAMLError as exc:
+                    self.build_marks(exc)
+                    raise
+        value = self.current_event
+        self.current_event = None
+        return value
+
+    def get_single_node(self):
+        try:
+            return Composer.get_single_node(self)
+        except MarkedYAMLError as exc:
+            self.build_marks(exc)
+            raise
+
+    def compose_document(self):
+        try:
+            return Composer.compose_document(self)
+        except MarkedYAMLError as exc:
+            self.build_marks(exc)
+            raise
+
+    def construct_document(self, node):
+        try:
+            return SafeEventConstructor.construct_document(self, node)
+        except MarkedYAMLError as exc:
+            self.build_marks(exc)
+            raise
+
+    def get_single_data(self):
+        try:
+            return SafeEventConstructor.get_single_data(self)
+        except MarkedYAMLError as exc:
+            self.build_marks(exc)
+            raise
+
+    def construct_event_document(self):
+        try:
+            return SafeEventConstructor.construct_event_document(self)
+        except MarkedYAMLError as exc:
+            self.build_marks(exc)
+            raise
+
 class Loader(Reader, Scanner, Parser, Composer, Constructor, Resolver):
 
     def __init__(self, stream):
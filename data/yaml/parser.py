@@ -69,6 +69,64 @@ from .scanner import *
 class ParserError(MarkedYAMLError):
     pass
 
+# The parser looks at the next token through a small integer id rather than
+# testing it against the token classes one at a time. Classes that are not
+# listed (subclasses of listed ones are) get OTHER_TOKEN.
+
+TOKEN_CLASSES = [
+    StreamStartToken, StreamEndToken, DirectiveToken,
+    DocumentStartToken, DocumentEndToken,
+    BlockSequenceStartToken, BlockMappingStartToken, BlockEndToken,
+    FlowSequenceStartToken, FlowMappingStartToken,
+    FlowSequenceEndToken, FlowMappingEndToken,
+    KeyToken, ValueToken, BlockEntryToken, FlowEntryToken,
+    AliasToken, AnchorToken, TagToken, ScalarToken,
+]
+
+(STREAM_START_TOKEN, STREAM_END_TOKEN, DIRECTIVE_TOKEN,
+    DOCUMENT_START_TOKEN, DOCUMENT_END_TOKEN,
+    BLOCK_SEQUENCE_START_TOKEN, BLOCK_MAPPING_START_TOKEN, BLOCK_END_TOKEN,
+    FLOW_SEQUENCE_START_TOKEN, FLOW_MAPPING_START_TOKEN,
+    FLOW_SEQUENCE_END_TOKEN, FLOW_MAPPING_END_TOKEN,
+    KEY_TOKEN, VALUE_TOKEN, BLOCK_ENTRY_TOKEN, FLOW_ENTRY_TOKEN,
+    ALIAS_TOKEN, ANCHOR_TOKEN, TAG_TOKEN, SCALAR_TOKEN,
+    OTHER_TOKEN) = range(len(TOKEN_CLASSES)+1)
+
+TOKEN_IDS = dict((token_class, token_id)
+        for token_id, token_class in enumerate(TOKEN_CLASSES))
+
+def token_class_id(token_class):
+    # The id of an unlisted class, remembered in TOKEN_IDS.
+    token_id = OTHER_TOKEN
+    for index, listed_class in enumerate(TOKEN_CLASSES):
+        if issubclass(token_class, listed_class):
+            token_id = index
+            break
+    TOKEN_IDS[token_class] = token_id
+    return token_id
+
+# The tokens that end a document, a collection entry or a key before a node
+# starts, in each context where the node may be empty.
+
+DOCUMENT_START_TOKENS = frozenset([DIRECTIVE_TOKEN, DOCUMENT_START_TOKEN,
+        STREAM_END_TOKEN])
+DOCUMENT_CONTENT_END_TOKENS = frozenset([DIRECTIVE_TOKEN,
+        DOCUMENT_START_TOKEN, DOCUMENT_END_TOKEN, STREAM_END_TOKEN])
+BLOCK_SEQUENCE_ENTRY_END_TOKENS = frozenset([BLOCK_ENTRY_TOKEN,
+        BLOCK_END_TOKEN])
+INDENTLESS_SEQUENCE_ENTRY_END_TOKENS = frozenset([BLOCK_ENTRY_TOKEN,
+        KEY_TOKEN, VALUE_TOKEN, BLOCK_END_TOKEN])
+BLOCK_MAPPING_ENTRY_END_TOKENS = frozenset([KEY_TOKEN, VALUE_TOKEN,
+        BLOCK_END_TOKEN])
+FLOW_SEQUENCE_KEY_END_TOKENS = frozenset([VALUE_TOKEN, FLOW_ENTRY_TOKEN,
+        FLOW_SEQUENCE_END_TOKEN])
+FLOW_SEQUENCE_VALUE_END_TOKENS = frozenset([FLOW_ENTRY_TOKEN,
+        FLOW_SEQUENCE_END_TOKEN])
+FLOW_MAPPING_KEY_END_TOKENS = frozenset([VALUE_TOKEN, FLOW_ENTRY_TOKEN,
+        FLOW_MAPPING_END_TOKEN])
+FLOW_MAPPING_VALUE_END_TOKENS = frozenset([FLOW_ENTRY_TOKEN,
+        FLOW_MAPPING_END_TOKEN])
+
 class Parser:
     # Since writing a recursive-descendant parser is a straightforward task, we
     # do not give many comments here.
@@ -120,6 +178,14 @@ class Parser:
         self.current_event = None
         return value
 
+    def peek_token_id(self):
+        # Get the id of the next token.
+        token_class = self.peek_token().__class__
+        try:
+            return TOKEN_IDS[token_class]
+        except KeyError:
+            return token_class_id(token_class)
+
     # stream    ::= STREAM-START implicit_document? explicit_document* STREAM-END
     # implicit_document ::= block_node DOCUMENT-END*
     # explicit_document ::= DIRECTIVE* DOCUMENT-START block_node? DOCUMENT-END*
@@ -139,8 +205,7 @@ class Parser:
     def parse_implicit_document_start(self):
 
         # Parse an implicit document.
-        if not self.check_token(DirectiveToken, DocumentStartToken,
-                StreamEndToken):
+        if self.peek_token_id() not in DOCUMENT_START_TOKENS:
             self.tag_handles = self.DEFAULT_TAGS
             token = self.peek_token()
             start_mark = end_mark = token.start_mark
@@ -159,15 +224,15 @@ class Parser:
     def parse_document_start(self):
 
         # Parse any extra document end indicators.
-        while self.check_token(DocumentEndToken):
+        while self.peek_token_id() == DOCUMENT_END_TOKEN:
             self.get_token()
 
         # Parse an explicit document.
-        if not self.check_token(StreamEndToken):
+        if self.peek_token_id() != STREAM_END_TOKEN:
             token = self.peek_token()
             start_mark = token.start_mark
             version, tags = self.process_directives()
-            if not self.check_token(DocumentStartToken):
+            if self.peek_token_id() != DOCUMENT_START_TOKEN:
                 raise ParserError(None, None,
                         "expected '<document start>', but found %r"
                         % self.peek_token().id,
@@ -193,7 +258,7 @@ class Parser:
         token = self.peek_token()
         start_mark = end_mark = token.start_mark
         explicit = False
-        if self.check_token(DocumentEndToken):
+        if self.peek_token_id() == DOCUMENT_END_TOKEN:
             token = self.get_token()
             end_mark = token.end_mark
             explicit = True
@@ -206,8 +271,7 @@ class Parser:
         return event
 
     def parse_document_content(self):
-        if self.check_token(DirectiveToken,
-                DocumentStartToken, DocumentEndToken, StreamEndToken):
+        if self.peek_token_id() in DOCUMENT_CONTENT_END_TOKENS:
             event = self.process_empty_scalar(self.peek_token().start_mark)
             self.state = self.states.pop()
             return event
@@ -217,7 +281,7 @@ class Parser:
     def process_directives(self):
         self.yaml_version = None
         self.tag_handles = {}
-        while self.check_token(DirectiveToken):
+        while self.peek_token_id() == DIRECTIVE_TOKEN:
             token = self.get_token()
             if token.name == 'YAML':
                 if self.yaml_version is not None:
@@ -271,7 +335,8 @@ class Parser:
         return self.parse_node(block=True, indentless_sequence=True)
 
     def parse_node(self, block=False, indentless_sequence=False):
-        if self.check_token(AliasToken):
+        token_id = self.peek_token_id()
+        if token_id == ALIAS_TOKEN:
             token = self.get_token()
             event = AliasEvent(token.value, token.start_mark, token.end_mark)
             self.state = self.states.pop()
@@ -279,25 +344,29 @@ class Parser:
             anchor = None
             tag = None
             start_mark = end_mark = tag_mark = None
-            if self.check_token(AnchorToken):
+            if token_id == ANCHOR_TOKEN:
                 token = self.get_token()
                 start_mark = token.start_mark
                 end_mark = token.end_mark
                 anchor = token.value
-                if self.check_token(TagToken):
+                token_id = self.peek_token_id()
+                if token_id == TAG_TOKEN:
                     token = self.get_token()
                     tag_mark = token.start_mark
                     end_mark = token.end_mark
                     tag = token.value
-            elif self.check_token(TagToken):
+                    token_id = self.peek_token_id()
+            elif token_id == TAG_TOKEN:
                 token = self.get_token()
                 start_mark = tag_mark = token.start_mark
                 end_mark = token.end_mark
                 tag = token.value
-                if self.check_token(AnchorToken):
+                token_id = self.peek_token_id()
+                if token_id == ANCHOR_TOKEN:
                     token = self.get_token()
                     end_mark = token.end_mark
                     anchor = token.value
+                    token_id = self.peek_token_id()
             if tag is not None:
                 handle, suffix = tag
                 if handle is not None:
@@ -316,13 +385,13 @@ class Parser:
                 start_mark = end_mark = self.peek_token().start_mark
             event = None
             implicit = (tag is None or tag == '!')
-            if indentless_sequence and self.check_token(BlockEntryToken):
+            if indentless_sequence and token_id == BLOCK_ENTRY_TOKEN:
                 end_mark = self.peek_token().end_mark
                 event = SequenceStartEvent(anchor, tag, implicit,
                         start_mark, end_mark)
                 self.state = self.parse_indentless_sequence_entry
             else:
-                if self.check_token(ScalarToken):
+                if token_id == SCALAR_TOKEN:
                     token = self.get_token()
                     end_mark = token.end_mark
                     if (token.plain and tag is None) or tag == '!':
@@ -334,22 +403,22 @@ class Parser:
                     event = ScalarEvent(anchor, tag, implicit, token.value,
                             start_mark, end_mark, style=token.style)
                     self.state = self.states.pop()
-                elif self.check_token(FlowSequenceStartToken):
+                elif token_id == FLOW_SEQUENCE_START_TOKEN:
                     end_mark = self.peek_token().end_mark
                     event = SequenceStartEvent(anchor, tag, implicit,
                             start_mark, end_mark, flow_style=True)
                     self.state = self.parse_flow_sequence_first_entry
-                elif self.check_token(FlowMappingStartToken):
+                elif token_id == FLOW_MAPPING_START_TOKEN:
                     end_mark = self.peek_token().end_mark
                     event = MappingStartEvent(anchor, tag, implicit,
                             start_mark, end_mark, flow_style=True)
                     self.state = self.parse_flow_mapping_first_key
-                elif block and self.check_token(BlockSequenceStartToken):
+                elif block and token_id == BLOCK_SEQUENCE_START_TOKEN:
                     end_mark = self.peek_token().start_mark
                     event = SequenceStartEvent(anchor, tag, implicit,
                             start_mark, end_mark, flow_style=False)
                     self.state = self.parse_block_sequence_first_entry
-                elif block and self.check_token(BlockMappingStartToken):
+                elif block and token_id == BLOCK_MAPPING_START_TOKEN:
                     end_mark = self.peek_token().start_mark
                     event = MappingStartEvent(anchor, tag, implicit,
                             start_mark, end_mark, flow_style=False)
@@ -379,15 +448,16 @@ class Parser:
         return self.parse_block_sequence_entry()
 
     def parse_block_sequence_entry(self):
-        if self.check_token(BlockEntryToken):
+        token_id = self.peek_token_id()
+        if token_id == BLOCK_ENTRY_TOKEN:
             token = self.get_token()
-            if not self.check_token(BlockEntryToken, BlockEndToken):
+            if self.peek_token_id() not in BLOCK_SEQUENCE_ENTRY_END_TOKENS:
                 self.states.append(self.parse_block_sequence_entry)
                 return self.parse_block_node()
             else:
                 self.state = self.parse_block_sequence_entry
                 return self.process_empty_scalar(token.end_mark)
-        if not self.check_token(BlockEndToken):
+        if token_id != BLOCK_END_TOKEN:
             token = self.peek_token()
             raise ParserError("while parsing a block collection", self.marks[-1],
                     "expected <block end>, but found %r" % token.id, token.start_mark)
@@ -400,10 +470,9 @@ class Parser:
     # indentless_sequence ::= (BLOCK-ENTRY block_node?)+
 
     def parse_indentless_sequence_entry(self):
-        if self.check_token(BlockEntryToken):
+        if self.peek_token_id() == BLOCK_ENTRY_TOKEN:
             token = self.get_token()
-            if not self.check_token(BlockEntryToken,
-                    KeyToken, ValueToken, BlockEndToken):
+            if self.peek_token_id() not in INDENTLESS_SEQUENCE_ENTRY_END_TOKENS:
                 self.states.append(self.parse_indentless_sequence_entry)
                 return self.parse_block_node()
             else:
@@ -425,15 +494,16 @@ class Parser:
         return self.parse_block_mapping_key()
 
     def parse_block_mapping_key(self):
-        if self.check_token(KeyToken):
+        token_id = self.peek_token_id()
+        if token_id == KEY_TOKEN:
             token = self.get_token()
-            if not self.check_token(KeyToken, ValueToken, BlockEndToken):
+            if self.peek_token_id() not in BLOCK_MAPPING_ENTRY_END_TOKENS:
                 self.states.append(self.parse_block_mapping_value)
                 return self.parse_block_node_or_indentless_sequence()
             else:
                 self.state = self.parse_block_mapping_value
                 return self.process_empty_scalar(token.end_mark)
-        if not self.check_token(BlockEndToken):
+        if token_id != BLOCK_END_TOKEN:
             token = self.peek_token()
             raise ParserError("while parsing a block mapping", self.marks[-1],
                     "expected <block end>, but found %r" % token.id, token.start_mark)
@@ -444,9 +514,9 @@ class Parser:
         return event
 
     def parse_block_mapping_value(self):
-        if self.check_token(ValueToken):
+        if self.peek_token_id() == VALUE_TOKEN:
             token = self.get_token()
-            if not self.check_token(KeyToken, ValueToken, BlockEndToken):
+            if self.peek_token_id() not in BLOCK_MAPPING_ENTRY_END_TOKENS:
                 self.states.append(self.parse_block_mapping_key)
                 return self.parse_block_node_or_indentless_sequence()
             else:
@@ -474,23 +544,25 @@ class Parser:
         return self.parse_flow_sequence_entry(first=True)
 
     def parse_flow_sequence_entry(self, first=False):
-        if not self.check_token(FlowSequenceEndToken):
+        token_id = self.peek_token_id()
+        if token_id != FLOW_SEQUENCE_END_TOKEN:
             if not first:
-                if self.check_token(FlowEntryToken):
+                if token_id == FLOW_ENTRY_TOKEN:
                     self.get_token()
+                    token_id = self.peek_token_id()
                 else:
                     token = self.peek_token()
                     raise ParserError("while parsing a flow sequence", self.marks[-1],
                             "expected ',' or ']', but got %r" % token.id, token.start_mark)
             
-            if self.check_token(KeyToken):
+            if token_id == KEY_TOKEN:
                 token = self.peek_token()
                 event = MappingStartEvent(None, None, True,
                         token.start_mark, token.end_mark,
                         flow_style=True)
                 self.state = self.parse_flow_sequence_entry_mapping_key
                 return event
-            elif not self.check_token(FlowSequenceEndToken):
+            elif token_id != FLOW_SEQUENCE_END_TOKEN:
                 self.states.append(self.parse_flow_sequence_entry)
                 return self.parse_flow_node()
         token = self.get_token()
@@ -501,8 +573,7 @@ class Parser:
 
     def parse_flow_sequence_entry_mapping_key(self):
         token = self.get_token()
-        if not self.check_token(ValueToken,
-                FlowEntryToken, FlowSequenceEndToken):
+        if self.peek_token_id() not in FLOW_SEQUENCE_KEY_END_TOKENS:
             self.states.append(self.parse_flow_sequence_entry_mapping_value)
             return self.parse_flow_node()
         else:
@@ -510,9 +581,9 @@ class Parser:
             return self.process_empty_scalar(token.end_mark)
 
     def parse_flow_sequence_entry_mapping_value(self):
-        if self.check_token(ValueToken):
+        if self.peek_token_id() == VALUE_TOKEN:
             token = self.get_token()
-            if not self.check_token(FlowEntryToken, FlowSequenceEndToken):
+            if self.peek_token_id() not in FLOW_SEQUENCE_VALUE_END_TOKENS:
                 self.states.append(self.parse_flow_sequence_entry_mapping_end)
                 return self.parse_flow_node()
             else:
@@ -540,24 +611,25 @@ class Parser:
         return self.parse_flow_mapping_key(first=True)
 
     def parse_flow_mapping_key(self, first=False):
-        if not self.check_token(FlowMappingEndToken):
+        token_id = self.peek_token_id()
+        if token_id != FLOW_MAPPING_END_TOKEN:
             if not first:
-                if self.check_token(FlowEntryToken):
+                if token_id == FLOW_ENTRY_TOKEN:
                     self.get_token()
+                    token_id = self.peek_token_id()
                 else:
                     token = self.peek_token()
                     raise ParserError("while parsing a flow mapping", self.marks[-1],
                             "expected ',' or '}', but got %r" % token.id, token.start_mark)
-            if self.check_token(KeyToken):
+            if token_id == KEY_TOKEN:
                 token = self.get_token()
-                if not self.check_token(ValueToken,
-                        FlowEntryToken, FlowMappingEndToken):
+                if self.peek_token_id() not in FLOW_MAPPING_KEY_END_TOKENS:
                     self.states.append(self.parse_flow_mapping_value)
                     return self.parse_flow_node()
                 else:
                     self.state = self.parse_flow_mapping_value
                     return self.process_empty_scalar(token.end_mark)
-            elif not self.check_token(FlowMappingEndToken):
+            elif token_id != FLOW_MAPPING_END_TOKEN:
                 self.states.append(self.parse_flow_mapping_empty_value)
                 return self.parse_flow_node()
         token = self.get_token()
@@ -567,9 +639,9 @@ class Parser:
         return event
 
     def parse_flow_mapping_value(self):
-        if self.check_token(ValueToken):
+        if self.peek_token_id() == VALUE_TOKEN:
             token = self.get_token()
-            if not self.check_token(FlowEntryToken, FlowMappingEndToken):
+            if self.peek_token_id() not in FLOW_MAPPING_VALUE_END_TOKENS:
                 self.states.append(self.parse_flow_mapping_key)
                 return self.parse_flow_node()
             else:
@@ -12,14 +12,23 @@
 # Reader provides the following methods and attributes:
 #   reader.peek(length=1) - return the next `length` characters
 #   reader.forward(length=1) - move the current position to `length` characters.
+#   reader.match_length(regexp) - the length of the run matched by `regexp`.
 #   reader.index - the number of the current character.
 #   reader.line, stream.column - the line and the column of the current character.
+#
+# Regular files are read and decoded in a single pass, so the whole document
+# sits in `reader.buffer` and is never sliced or concatenated while scanning.
+# Other streams (pipes, sockets, huge files, streams wrapped in
+# `ChunkedStream`) are pulled in chunks.
+#
+# If `reader.document_limit` is set, DocumentSizeError is raised once the
+# reader gets more than that many characters past `reader.document_start`.
 
-__all__ = ['Reader', 'ReaderError']
+__all__ = ['Reader', 'ReaderError', 'DocumentSizeError', 'ChunkedStream']
 
-from .error import YAMLError, Mark
+from .error import YAMLError, MarkedYAMLError, Mark
 
-import codecs, re
+import codecs, os, re, stat
 
 class ReaderError(YAMLError):
 
@@ -42,6 +51,20 @@ class ReaderError(YAMLError):
                     % (self.character, self.reason,
                             self.name, self.position)
 
+class DocumentSizeError(MarkedYAMLError):
+    pass
+
+class ChunkedStream:
+    # Wraps a file-like object so that Reader pulls it in chunks even if it
+    # is a regular file.
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.name = getattr(stream, 'name', "<file>")
+
+    def read(self, size=-1):
+        return self.stream.read(size)
+
 class Reader(object):
     # Reader:
     # - determines the data encoding and converts it to a unicode string,
@@ -56,6 +79,9 @@ class Reader(object):
 
     # Yeah, it's ugly and slow.
 
+    # Regular files not larger than this are read and decoded at once.
+    WHOLE_FILE_LIMIT = 64*1024*1024
+
     def __init__(self, stream):
         self.name = None
         self.stream = None
@@ -69,6 +95,8 @@ class Reader(object):
         self.index = 0
         self.line = 0
         self.column = 0
+        self.document_start = 0
+        self.document_limit = None
         if isinstance(stream, str):
             self.name = "<unicode string>"
             self.check_printable(stream)
@@ -82,6 +110,9 @@ class Reader(object):
             self.name = getattr(stream, 'name', "<file>")
             self.eof = False
             self.raw_buffer = None
+            if self.is_whole_file(stream):
+                self.update_raw(-1)
+                self.eof = True
             self.determine_encoding()
 
     def peek(self, index=0):
@@ -99,17 +130,61 @@ class Reader(object):
     def forward(self, length=1):
         if self.pointer+length+1 >= len(self.buffer):
             self.update(length+1)
-        while length:
-            ch = self.buffer[self.pointer]
-            self.pointer += 1
-            self.index += 1
+        buffer = self.buffer
+        start = self.pointer
+        end = start+length
+        self.pointer = end
+        self.index += length
+        if length == 1:
+            ch = buffer[start]
             if ch in '\n\x85\u2028\u2029'  \
-                    or (ch == '\r' and self.buffer[self.pointer] != '\n'):
+                    or (ch == '\r' and buffer[end] != '\n'):
                 self.line += 1
                 self.column = 0
             elif ch != '\uFEFF':
                 self.column += 1
-            length -= 1
+            return
+        # Longer runs are counted in bulk.
+        breaks, last = self.scan_breaks(start, end)
+        if breaks:
+            self.line += breaks
+            self.column = end-last-1-buffer.count('\uFEFF', last+1, end)
+        else:
+            self.column += length-buffer.count('\uFEFF', start, end)
+
+    def scan_breaks(self, start, end):
+        # Return the number of line breaks in `buffer[start:end]` and the
+        # position of the last one (-1 if there are none). A '\r' is a line
+        # break only if it is not followed by '\n', so `buffer[end]` must be
+        # available.
+        buffer = self.buffer
+        breaks = buffer.count('\n', start, end)   \
+                + buffer.count('\r', start, end)   \
+                - buffer.count('\r\n', start, end+1)
+        last = buffer.rfind('\n', start, end)
+        position = buffer.rfind('\r', start, end)
+        if position == end-1 and buffer[end] == '\n':
+            position = buffer.rfind('\r', start, position)
+        if position > last:
+            last = position
+        for ch in '\x85\u2028\u2029':
+            position = buffer.rfind(ch, start, end)
+            if position != -1:
+                breaks += buffer.count(ch, start, end)
+                if position > last:
+                    last = position
+        return breaks, last
+
+    def match_length(self, regexp):
+        # Match the compiled `regexp` at the current position and return the
+        # length of the match. The pattern must not match '\0' and may look
+        # one character past the end of the match. If the match runs into the
+        # end of a partially read buffer, more data is read and we try again.
+        while True:
+            end = regexp.match(self.buffer, self.pointer).end()
+            if self.raw_buffer is None or end+1 < len(self.buffer):
+                return end-self.pointer
+            self.update(end-self.pointer+2)
 
     def get_mark(self):
         if self.stream is None:
@@ -119,6 +194,17 @@ class Reader(object):
             return Mark(self.name, self.index, self.line, self.column,
                     None, None)
 
+    def get_mark_at(self, index):
+        # Build the mark of the character `index` after the fact. Only works
+        # when the whole stream has been decoded into the buffer and nothing
+        # has been discarded from it, i.e. for string and byte input.
+        breaks, last = self.scan_breaks(0, index)
+        if breaks:
+            column = index-last-1-self.buffer.count('\uFEFF', last+1, index)
+        else:
+            column = index-self.buffer.count('\uFEFF', 0, index)
+        return Mark(self.name, index, breaks, column, self.buffer, index)
+
     def determine_encoding(self):
         while not self.eof and (self.raw_buffer is None or len(self.raw_buffer) < 2):
             self.update_raw()
@@ -134,7 +220,10 @@ class Reader(object):
                 self.encoding = 'utf-8'
         self.update(1)
 
-    NON_PRINTABLE = re.compile('[^\x09\x0A\x0D\x20-\x7E\x85\xA0-\uD7FF\uE000-\uFFFD\U00010000-\U0010ffff]')
+    # The complement of the printable characters (TAB, LF, CR, #x20-#x7E,
+    # NEL, #xA0-#xD7FF, #xE000-#xFFFD and #x10000-#x10FFFF), which compiles
+    # much faster than the equivalent negated class.
+    NON_PRINTABLE = re.compile('[\x00-\x08\x0B\x0C\x0E-\x1F\x7F-\x84\x86-\x9F\uD800-\uDFFF\uFFFE\uFFFF]')
     def check_printable(self, data):
         match = self.NON_PRINTABLE.search(data)
         if match:
@@ -143,7 +232,26 @@ class Reader(object):
             raise ReaderError(self.name, position, ord(character),
                     'unicode', "special characters are not allowed")
 
+    def is_whole_file(self, stream):
+        # Check if `stream` is a regular file that may be read in one go.
+        # Once the whole file is decoded into the buffer, `update` becomes
+        # a no-op and `peek`, `prefix` and `forward` work by index only.
+        try:
+            status = os.fstat(stream.fileno())
+        except (AttributeError, OSError, ValueError):
+            return False
+        return stat.S_ISREG(status.st_mode)   \
+                and status.st_size <= self.WHOLE_FILE_LIMIT
+
+    def check_document_size(self):
+        if self.index-self.document_start > self.document_limit:
+            raise DocumentSizeError(None, None,
+                    "found a document longer than %d characters"
+                    % self.document_limit, self.get_mark())
+
     def update(self, length):
+        if self.document_limit is not None:
+            self.check_document_size()
         if self.raw_buffer is None:
             return
         self.buffer = self.buffer[self.pointer:]
@@ -1,11 +1,13 @@
 
-__all__ = ['BaseRepresenter', 'SafeRepresenter', 'Representer',
-    'RepresenterError']
+__all__ = ['BaseRepresenter', 'SafeRepresenter', 'SafeEventRepresenter',
+    'Representer', 'RepresenterError']
 
 from .error import *
+from .events import *
 from .nodes import *
+from .serializer import SerializerError
 
-import datetime, copyreg, types, base64, collections
+import datetime, copyreg, types, base64, collections, collections.abc
 
 class RepresenterError(YAMLError):
     pass
@@ -15,13 +17,28 @@ class BaseRepresenter:
     yaml_representers = {}
     yaml_multi_representers = {}
 
-    def __init__(self, default_style=None, default_flow_style=False, sort_keys=True):
+    # Values of these exact types are never aliased. As long as their
+    # representer is the stock one, they are turned into nodes directly with
+    # `(tag, convert(representer, data))`, skipping the representer lookup
+    # and the alias bookkeeping.
+    yaml_primitive_representers = {}
+
+    def __init__(self, default_style=None, default_flow_style=False, sort_keys=True,
+            aliases=True):
         self.default_style = default_style
         self.sort_keys = sort_keys
         self.default_flow_style = default_flow_style
+        # Without alias detection, an object that appears more than once is
+        # represented every time and a recursive object cannot be dumped.
+        self.aliases = aliases
         self.represented_objects = {}
         self.object_keeper = []
         self.alias_key = None
+        self.primitive_representers = {}
+        for data_type, (representer, tag, convert)  \
+                in self.yaml_primitive_representers.items():
+            if self.yaml_representers.get(data_type) is representer:
+                self.primitive_representers[data_type] = (tag, convert)
 
     def represent(self, data):
         node = self.represent_data(data)
@@ -31,7 +48,11 @@ class BaseRepresenter:
         self.alias_key = None
 
     def represent_data(self, data):
-        if self.ignore_aliases(data):
+        if type(data) in self.primitive_representers:
+            tag, convert = self.primitive_representers[type(data)]
+            return ScalarNode(tag, convert(self, data), None, None,
+                    self.default_style)
+        if not self.aliases or self.ignore_aliases(data):
             self.alias_key = None
         else:
             self.alias_key = id(data)
@@ -88,8 +109,14 @@ class BaseRepresenter:
         if self.alias_key is not None:
             self.represented_objects[self.alias_key] = node
         best_style = True
+        primitive_representers = self.primitive_representers
         for item in sequence:
-            node_item = self.represent_data(item)
+            if type(item) in primitive_representers:
+                tag, convert = primitive_representers[type(item)]
+                node_item = ScalarNode(tag, convert(self, item), None, None,
+                        self.default_style)
+            else:
+                node_item = self.represent_data(item)
             if not (isinstance(node_item, ScalarNode) and not node_item.style):
                 best_style = False
             value.append(node_item)
@@ -113,9 +140,20 @@ class BaseRepresenter:
                     mapping = sorted(mapping)
                 except TypeError:
                     pass
+        primitive_representers = self.primitive_representers
         for item_key, item_value in mapping:
-            node_key = self.represent_data(item_key)
-            node_value = self.represent_data(item_value)
+            if type(item_key) in primitive_representers:
+                tag, convert = primitive_representers[type(item_key)]
+                node_key = ScalarNode(tag, convert(self, item_key), None, None,
+                        self.default_style)
+            else:
+                node_key = self.represent_data(item_key)
+            if type(item_value) in primitive_representers:
+                tag, convert = primitive_representers[type(item_value)]
+                node_value = ScalarNode(tag, convert(self, item_value), None, None,
+                        self.default_style)
+            else:
+                node_value = self.represent_data(item_value)
             if not (isinstance(node_key, ScalarNode) and not node_key.style):
                 best_style = False
             if not (isinstance(node_value, ScalarNode) and not node_value.style):
@@ -169,6 +207,14 @@ class SafeRepresenter(BaseRepresenter):
         inf_value *= inf_value
 
     def represent_float(self, data):
+        return self.represent_scalar('tag:yaml.org,2002:float',
+                self.float_value(data))
+
+    def float_value(self, data):
+        value = repr(data)
+        if 'e' not in value and 'n' not in value:
+            # A plain finite number
+            return value
         if data != data or (data == 0.0 and data == 1.0):
             value = '.nan'
         elif data == self.inf_value:
@@ -186,7 +232,7 @@ class SafeRepresenter(BaseRepresenter):
             # '.0' before the 'e' symbol.
             if '.' not in value and 'e' in value:
                 value = value.replace('e', '.0e', 1)
-        return self.represent_scalar('tag:yaml.org,2002:float', value)
+        return value
 
     def represent_list(self, data):
         #pairs = (len(data) > 0 and isinstance(data, list))
@@ -269,6 +315,130 @@ SafeRepresenter.add_representer(datetime.datetime,
 SafeRepresenter.add_representer(None,
         SafeRepresenter.represent_undefined)
 
+SafeRepresenter.yaml_primitive_representers = {
+    type(None): (SafeRepresenter.represent_none, 'tag:yaml.org,2002:null',
+        lambda representer, data: 'null'),
+    str: (SafeRepresenter.represent_str, 'tag:yaml.org,2002:str',
+        lambda representer, data: data),
+    bool: (SafeRepresenter.represent_bool, 'tag:yaml.org,2002:bool',
+        lambda representer, data: 'true' if data else 'false'),
+    int: (SafeRepresenter.represent_int, 'tag:yaml.org,2002:int',
+        lambda representer, data: str(data)),
+    float: (SafeRepresenter.represent_float, 'tag:yaml.org,2002:float',
+        SafeRepresenter.float_value),
+}
+
+class SafeEventRepresenter(SafeRepresenter):
+    # Represents objects as events passed to `emit` right away instead of
+    # building a node graph for the Serializer, so memory does not grow with
+    # the document and iterators (generators included) can be dumped as
+    # sequences without being materialized. Objects are never aliased: a
+    # repeated object is written out again and a recursive one is an error.
+    # Representers work as long as they go through `represent_scalar`,
+    # `represent_sequence` and `represent_mapping`, which return None here.
+    # Uses the document settings and `closed` state of the Serializer.
+
+    # Other types whose stock representers give plain scalars, which
+    # SafeRepresenter also counts as simple enough for the flow style.
+    yaml_plain_scalar_representers = {
+        datetime.date: SafeRepresenter.represent_date,
+        datetime.datetime: SafeRepresenter.represent_datetime,
+    }
+
+    def __init__(self, default_style=None, default_flow_style=False, sort_keys=True,
+            aliases=True):
+        SafeRepresenter.__init__(self, default_style=default_style,
+                default_flow_style=default_flow_style, sort_keys=sort_keys,
+                aliases=False)
+        self.plain_scalar_types = set(self.primitive_representers)
+        for data_type, representer in self.yaml_plain_scalar_representers.items():
+            if self.yaml_representers.get(data_type) is representer:
+                self.plain_scalar_types.add(data_type)
+
+    def represent(self, data):
+        if self.closed is None:
+            raise SerializerError("serializer is not opened")
+        elif self.closed:
+            raise SerializerError("serializer is closed")
+        if self.yaml_path_resolvers:
+            raise RepresenterError("path resolvers are not supported"
+                    " when representing events")
+        self.emit(DocumentStartEvent(explicit=self.use_explicit_start,
+            version=self.use_version, tags=self.use_tags))
+        self.represent_data(data)
+        self.emit(DocumentEndEvent(explicit=self.use_explicit_end))
+        self.represented_objects = {}
+
+    def represent_data(self, data):
+        if type(data) in self.primitive_representers:
+            tag, convert = self.primitive_representers[type(data)]
+            self.represent_scalar(tag, convert(self, data))
+            return
+        # `represented_objects` holds the objects being represented.
+        key = id(data)
+        if key in self.represented_objects:
+            raise RepresenterError("recursive objects are not allowed", data)
+        self.represented_objects[key] = data
+        BaseRepresenter.represent_data(self, data)
+        del self.represented_objects[key]
+
+    def represent_scalar(self, tag, value, style=None):
+        if style is None:
+            style = self.default_style
+        implicit = (tag == self.resolve(ScalarNode, value, (True, False)),
+                tag == self.resolve(ScalarNode, value, (False, True)))
+        self.emit(ScalarEvent(None, tag, implicit, value, style=style))
+
+    def represent_sequence(self, tag, sequence, flow_style=None):
+        if flow_style is None:
+            flow_style = self.default_flow_style
+        if flow_style is None:
+            # Only sized sequences of plain scalars are known to be
+            # simple enough for the flow style in advance.
+            flow_style = (isinstance(sequence, (list, tuple))
+                    and not self.default_style
+                    and self.all_primitive(sequence))
+        implicit = (tag == self.resolve(SequenceNode, None, True))
+        self.emit(SequenceStartEvent(None, tag, implicit, flow_style=flow_style))
+        for item in sequence:
+            self.represent_data(item)
+        self.emit(SequenceEndEvent())
+
+    def represent_mapping(self, tag, mapping, flow_style=None):
+        if hasattr(mapping, 'items'):
+            mapping = list(mapping.items())
+            if self.sort_keys:
+                try:
+                    mapping = sorted(mapping)
+                except TypeError:
+                    pass
+        if flow_style is None:
+            flow_style = self.default_flow_style
+        if flow_style is None:
+            flow_style = (not self.default_style
+                    and self.all_primitive([key for key, value in mapping])
+                    and self.all_primitive([value for key, value in mapping]))
+        implicit = (tag == self.resolve(MappingNode, None, True))
+        self.emit(MappingStartEvent(None, tag, implicit, flow_style=flow_style))
+        for item_key, item_value in mapping:
+            self.represent_data(item_key)
+            self.represent_data(item_value)
+        self.emit(MappingEndEvent())
+
+    def all_primitive(self, items):
+        for item in items:
+            if type(item) not in self.plain_scalar_types:
+                return False
+        return True
+
+    def represent_undefined(self, data):
+        if isinstance(data, collections.abc.Iterator):
+            return self.represent_sequence('tag:yaml.org,2002:seq', data)
+        return SafeRepresenter.represent_undefined(self, data)
+
+SafeEventRepresenter.add_representer(None,
+        SafeEventRepresenter.represent_undefined)
+
 class Representer(SafeRepresenter):
 
     def represent_complex(self, data):
@@ -9,6 +9,25 @@ import re
 class ResolverError(YAMLError):
     pass
 
+class LazyRegexp:
+    # A regular expression that is compiled when it is first used, so that
+    # importing the module does not pay for patterns that are never matched.
+    # The first `match` replaces itself with the compiled pattern's method.
+
+    def __init__(self, pattern, flags=0):
+        self.pattern = pattern
+        self.flags = flags
+
+    def compile(self):
+        return re.compile(self.pattern, self.flags)
+
+    def match(self, string):
+        self.match = self.compile().match
+        return self.match(string)
+
+    def __getattr__(self, name):
+        return getattr(self.compile(), name)
+
 class BaseResolver:
 
     DEFAULT_SCALAR_TAG = 'tag:yaml.org,2002:str'
@@ -18,6 +37,17 @@ class BaseResolver:
     yaml_implicit_resolvers = {}
     yaml_path_resolvers = {}
 
+    # Implicit resolution of plain scalars is memoized per set of implicit
+    # resolvers. The resolvers for each first character are combined with
+    # the wildcard resolvers once, and the resulting tag of every short value
+    # is kept in a bounded cache. Both are rebuilt on the next `resolve`
+    # after `add_implicit_resolver` is called on any class or after
+    # `yaml_implicit_resolvers` is replaced.
+    IMPLICIT_CACHE_SIZE = 4096
+    IMPLICIT_CACHE_VALUE_LENGTH = 64
+    yaml_implicit_version = 0
+    yaml_implicit_state = (None, None, None, None, None)
+
     def __init__(self):
         self.resolver_exact_paths = []
         self.resolver_prefix_paths = []
@@ -33,6 +63,25 @@ class BaseResolver:
             first = [None]
         for ch in first:
             cls.yaml_implicit_resolvers.setdefault(ch, []).append((tag, regexp))
+        BaseResolver.yaml_implicit_version += 1
+
+    @classmethod
+    def get_implicit_state(cls):
+        # Return `(version, resolvers, table, wildcard_resolvers, cache)`
+        # for the class, rebuilding it if it is out of date.
+        state = cls.yaml_implicit_state
+        if state[0] != BaseResolver.yaml_implicit_version \
+                or state[1] is not cls.yaml_implicit_resolvers:
+            resolvers = cls.yaml_implicit_resolvers
+            wildcard_resolvers = resolvers.get(None, [])
+            table = {}
+            for ch in resolvers:
+                if ch is not None:
+                    table[ch] = resolvers[ch] + wildcard_resolvers
+            state = (BaseResolver.yaml_implicit_version, resolvers, table,
+                    wildcard_resolvers, {})
+            cls.yaml_implicit_state = state
+        return state
 
     @classmethod
     def add_path_resolver(cls, tag, path, kind=None):
@@ -142,14 +191,26 @@ class BaseResolver:
 
     def resolve(self, kind, value, implicit):
         if kind is ScalarNode and implicit[0]:
-            if value == '':
-                resolvers = self.yaml_implicit_resolvers.get('', [])
+            version, resolvers, table, wildcard_resolvers, cache \
+                    = self.yaml_implicit_state
+            if version != BaseResolver.yaml_implicit_version \
+                    or resolvers is not self.yaml_implicit_resolvers:
+                version, resolvers, table, wildcard_resolvers, cache \
+                        = self.get_implicit_state()
+            if value in cache:
+                tag = cache[value]
             else:
-                resolvers = self.yaml_implicit_resolvers.get(value[0], [])
-            wildcard_resolvers = self.yaml_implicit_resolvers.get(None, [])
-            for tag, regexp in resolvers + wildcard_resolvers:
-                if regexp.match(value):
-                    return tag
+                tag = None
+                for candidate, regexp in table.get(value[:1], wildcard_resolvers):
+                    if regexp.match(value):
+                        tag = candidate
+                        break
+                if len(value) <= self.IMPLICIT_CACHE_VALUE_LENGTH:
+                    if len(cache) >= self.IMPLICIT_CACHE_SIZE:
+                        cache.clear()
+                    cache[value] = tag
+            if tag is not None:
+                return tag
             implicit = implicit[1]
         if self.yaml_path_resolvers:
             exact_paths = self.resolver_exact_paths[-1]
@@ -169,14 +230,14 @@ class Resolver(BaseResolver):
 
 Resolver.add_implicit_resolver(
         'tag:yaml.org,2002:bool',
-        re.compile(r'''^(?:yes|Yes|YES|no|No|NO
+        LazyRegexp(r'''^(?:yes|Yes|YES|no|No|NO
                     |true|True|TRUE|false|False|FALSE
                     |on|On|ON|off|Off|OFF)$''', re.X),
         list('yYnNtTfFoO'))
 
 Resolver.add_implicit_resolver(
         'tag:yaml.org,2002:float',
-        re.compile(r'''^(?:[-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+][0-9]+)?
+        LazyRegexp(r'''^(?:[-+]?(?:[0-9][0-9_]*)\.[0-9_]*(?:[eE][-+][0-9]+)?
                     |\.[0-9][0-9_]*(?:[eE][-+][0-9]+)?
                     |[-+]?[0-9][0-9_]*(?::[0-5]?[0-9])+\.[0-9_]*
                     |[-+]?\.(?:inf|Inf|INF)
@@ -185,7 +246,7 @@ Resolver.add_implicit_resolver(
 
 Resolver.add_implicit_resolver(
         'tag:yaml.org,2002:int',
-        re.compile(r'''^(?:[-+]?0b[0-1_]+
+        LazyRegexp(r'''^(?:[-+]?0b[0-1_]+
                     |[-+]?0[0-7_]+
                     |[-+]?(?:0|[1-9][0-9_]*)
                     |[-+]?0x[0-9a-fA-F_]+
@@ -194,19 +255,19 @@ Resolver.add_implicit_resolver(
 
 Resolver.add_implicit_resolver(
         'tag:yaml.org,2002:merge',
-        re.compile(r'^(?:<<)$'),
+        LazyRegexp(r'^(?:<<)$'),
         ['<'])
 
 Resolver.add_implicit_resolver(
         'tag:yaml.org,2002:null',
-        re.compile(r'''^(?: ~
+        LazyRegexp(r'''^(?: ~
                     |null|Null|NULL
                     | )$''', re.X),
         ['~', 'n', 'N', ''])
 
 Resolver.add_implicit_resolver(
         'tag:yaml.org,2002:timestamp',
-        re.compile(r'''^(?:[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]
+        LazyRegexp(r'''^(?:[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]
                     |[0-9][0-9][0-9][0-9] -[0-9][0-9]? -[0-9][0-9]?
                      (?:[Tt]|[ \t]+)[0-9][0-9]?
                      :[0-9][0-9] :[0-9][0-9] (?:\.[0-9]*)?
@@ -215,13 +276,13 @@ Resolver.add_implicit_resolver(
 
 Resolver.add_implicit_resolver(
         'tag:yaml.org,2002:value',
-        re.compile(r'^(?:=)$'),
+        LazyRegexp(r'^(?:=)$'),
         ['='])
 
 # The following resolver is only for documentation purposes. It cannot work
 # because plain scalars cannot start with '!', '&', or '*'.
 Resolver.add_implicit_resolver(
         'tag:yaml.org,2002:yaml',
-        re.compile(r'^(?:!|&|\*)$'),
+        LazyRegexp(r'^(?:!|&|\*)$'),
         list('!&*'))
 
@@ -29,6 +29,8 @@ __all__ = ['Scanner', 'ScannerError']
 from .error import MarkedYAMLError
 from .tokens import *
 
+import re
+
 class ScannerError(MarkedYAMLError):
     pass
 
@@ -55,6 +57,7 @@ class Scanner:
         #   self.peek(i=0)       # peek the next i-th character
         #   self.prefix(l=1)     # peek the next l characters
         #   self.forward(l=1)    # read the next l characters and move the pointer.
+        #   self.match_length(r) # the length of the run matched by regexp r.
 
         # Had we reached the end of the stream?
         self.done = False
@@ -108,6 +111,21 @@ class Scanner:
         # '[', or '{' tokens.
         self.possible_simple_keys = {}
 
+    # Runs of characters that the scanners below consume in one step. None of
+    # them match '\0', so a match always stops at the end of the stream.
+
+    SPACES = re.compile(' *')
+
+    NON_BREAKS = re.compile('[^\0\r\n\x85\u2028\u2029]*')
+
+    PLAIN_BLOCK = re.compile('(?:[^\0 \t\r\n\x85\u2028\u2029:]'
+            '|:(?=[^\0 \t\r\n\x85\u2028\u2029]))*')
+
+    PLAIN_FLOW = re.compile('(?:[^\0 \t\r\n\x85\u2028\u2029:,?\\[\\]{}]'
+            '|:(?=[^\0 \t\r\n\x85\u2028\u2029,\\[\\]{}]))*')
+
+    QUOTED_NON_SPACES = re.compile('[^\'\"\\\\\0 \t\r\n\x85\u2028\u2029]*')
+
     # Public methods.
 
     def check_token(self, *choices):
@@ -773,11 +791,10 @@ class Scanner:
             self.forward()
         found = False
         while not found:
-            while self.peek() == ' ':
-                self.forward()
+            if self.peek() == ' ':
+                self.forward(self.match_length(self.SPACES))
             if self.peek() == '#':
-                while self.peek() not in '\0\r\n\x85\u2028\u2029':
-                    self.forward()
+                self.forward(self.match_length(self.NON_BREAKS))
             if self.scan_line_break():
                 if not self.flow_level:
                     self.allow_simple_key = True
@@ -1005,9 +1022,7 @@ class Scanner:
         while self.column == indent and self.peek() != '\0':
             chunks.extend(breaks)
             leading_non_space = self.peek() not in ' \t'
-            length = 0
-            while self.peek(length) not in '\0\r\n\x85\u2028\u2029':
-                length += 1
+            length = self.match_length(self.NON_BREAKS)
             chunks.append(self.prefix(length))
             self.forward(length)
             line_break = self.scan_line_break()
@@ -1186,9 +1201,7 @@ class Scanner:
         # See the specification for details.
         chunks = []
         while True:
-            length = 0
-            while self.peek(length) not in '\'\"\\\0 \t\r\n\x85\u2028\u2029':
-                length += 1
+            length = self.match_length(self.QUOTED_NON_SPACES)
             if length:
                 chunks.append(self.prefix(length))
                 self.forward(length)
@@ -1283,18 +1296,15 @@ class Scanner:
         #    indent = 1
         spaces = []
         while True:
-            length = 0
             if self.peek() == '#':
                 break
-            while True:
-                ch = self.peek(length)
-                if ch in '\0 \t\r\n\x85\u2028\u2029'    \
-                        or (ch == ':' and
-                                self.peek(length+1) in '\0 \t\r\n\x85\u2028\u2029'
-                                      + (u',[]{}' if self.flow_level else u''))\
-                        or (self.flow_level and ch in ',?[]{}'):
-                    break
-                length += 1
+            # A run ends at a space or a line break, at ':' followed by one
+            # of them, and in the flow context at ',?[]{}' or ':' followed by
+            # ',[]{}'.
+            if self.flow_level:
+                length = self.match_length(self.PLAIN_FLOW)
+            else:
+                length = self.match_length(self.PLAIN_BLOCK)
             if length == 0:
                 break
             self.allow_simple_key = False
@@ -1313,9 +1323,7 @@ class Scanner:
         # The specification is really confusing about tabs in plain scalars.
         # We just forbid them completely. Do not use tabs in YAML!
         chunks = []
-        length = 0
-        while self.peek(length) in ' ':
-            length += 1
+        length = self.match_length(self.SPACES)
         whitespaces = self.prefix(length)
         self.forward(length)
         ch = self.peek()
@@ -13,12 +13,17 @@ class Serializer:
     ANCHOR_TEMPLATE = 'id%03d'
 
     def __init__(self, encoding=None,
-            explicit_start=None, explicit_end=None, version=None, tags=None):
+            explicit_start=None, explicit_end=None, version=None, tags=None,
+            aliases=True):
         self.use_encoding = encoding
         self.use_explicit_start = explicit_start
         self.use_explicit_end = explicit_end
         self.use_version = version
         self.use_tags = tags
+        # Without aliases, the anchor pass over the node graph is skipped and
+        # a node that appears more than once is serialized every time (a
+        # recursive graph cannot be serialized).
+        self.use_aliases = aliases
         self.serialized_nodes = {}
         self.anchors = {}
         self.last_anchor_id = 0
@@ -50,7 +55,8 @@ class Serializer:
             raise SerializerError("serializer is closed")
         self.emit(DocumentStartEvent(explicit=self.use_explicit_start,
             version=self.use_version, tags=self.use_tags))
-        self.anchor_node(node)
+        if self.use_aliases:
+            self.anchor_node(node)
         self.serialize_node(node, None, None)
         self.emit(DocumentEndEvent(explicit=self.use_explicit_end))
         self.serialized_nodes = {}
@@ -76,11 +82,15 @@ class Serializer:
         return self.ANCHOR_TEMPLATE % self.last_anchor_id
 
     def serialize_node(self, node, parent, index):
-        alias = self.anchors[node]
+        if self.use_aliases:
+            alias = self.anchors[node]
+        else:
+            alias = None
         if node in self.serialized_nodes:
             self.emit(AliasEvent(alias))
         else:
-            self.serialized_nodes[node] = True
+            if self.use_aliases:
+                self.serialized_nodes[node] = True
             self.descend_resolver(parent, index)
             if isinstance(node, ScalarNode):
                 detected_tag = self.resolve(ScalarNode, node.value, (True, False))